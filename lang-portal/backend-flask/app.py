@@ -1,13 +1,18 @@
+import os
+
 from flask import Flask, g
 from flask_cors import CORS
 
 from lib.db import Db
+from lib import profiling
+from lib.review_queue import ReviewQueue, queue_path
 
 import routes.words
 import routes.groups
 import routes.study_sessions
 import routes.dashboard
 import routes.study_activities
+import routes.debug
 
 def get_allowed_origins(app):
     try:
@@ -33,13 +38,26 @@ def create_app(test_config=None):
     
     if test_config is None:
         app.config.from_mapping(
-            DATABASE='words.db'
+            DATABASE='words.db',
+            # Acknowledge review submissions once queued and apply them in the background
+            REVIEW_WRITE_BEHIND=os.environ.get('REVIEW_WRITE_BEHIND') == '1',
+            # Time requests and SQL statements, log slow ones and serve /debug/metrics
+            SQL_PROFILE=os.environ.get('SQL_PROFILE') == '1'
         )
     else:
         app.config.update(test_config)
     
     # Initialize database first since we need it for CORS configuration
-    app.db = Db(database=app.config['DATABASE'])
+    app.db = Db(database=app.config['DATABASE'], profile=app.config.get('SQL_PROFILE', False))
+
+    # Write-behind review queue; its flusher replays anything a crash left behind
+    app.review_queue = None
+    if app.config.get('REVIEW_WRITE_BEHIND'):
+        app.review_queue = ReviewQueue(
+            app.config.get('REVIEW_QUEUE') or queue_path(app.config['DATABASE']),
+            app.db.connect
+        )
+        app.review_queue.start()
     
     # Get allowed origins from study_activities table
     allowed_origins = get_allowed_origins(app)
@@ -68,6 +86,10 @@ def create_app(test_config=None):
     routes.study_sessions.load(app)
     routes.dashboard.load(app)
     routes.study_activities.load(app)
+
+    if app.config.get('SQL_PROFILE'):
+        profiling.install(app)
+        routes.debug.load(app)
     
     return app
 
@@ -0,0 +1,90 @@
+"""Due-word queue of a 1M word group: /groups/<id>/due against pulling /words/raw.
+
+  python -m bench.due_queue [words]
+
+Builds a throwaway database next to this file, so words.db is not touched.
+The due query only reads word_schedules, so no review history is generated.
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from app import create_app
+from lib import scheduler
+
+GROUP_ID = 1
+REVIEW_BATCH = 50
+
+def populate(path, words):
+  conn = sqlite3.connect(path)
+  conn.execute("INSERT INTO groups (name) VALUES ('Core')")
+  conn.executemany('INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)',
+                   ((f'語{i}', f'go{i}', f'word {i}', '{}') for i in range(words)))
+  # The word_groups trigger gives every word a schedule
+  conn.execute('INSERT INTO word_groups (word_id, group_id) SELECT id, ? FROM words', (GROUP_ID,))
+  # Spread the schedules over a year either side of now, as after months of study
+  conn.execute('''
+    UPDATE word_schedules SET
+      repetitions = abs(random()) % 8,
+      interval_days = 1 + abs(random()) % 180,
+      ease = 1.3 + (abs(random()) % 120) / 100.0,
+      due_at = datetime('now', ((abs(random()) % 730) - 365) || ' days')
+  ''')
+  conn.commit()
+  conn.execute('ANALYZE')
+  conn.close()
+
+def timed(fn, repeat=5):
+  best = float('inf')
+  for _ in range(repeat):
+    start = time.perf_counter()
+    fn()
+    best = min(best, time.perf_counter() - start)
+  return best * 1000
+
+def main():
+  words = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+  path = os.path.join(tempfile.mkdtemp(dir=os.path.dirname(__file__)), 'bench.db')
+  try:
+    app = create_app({'DATABASE': path})
+    with app.app_context():
+      app.db.setup_tables(app.db.cursor())
+    start = time.perf_counter()
+    populate(path, words)
+    print(f"Populated {words:,} scheduled words in {time.perf_counter() - start:.0f}s")
+
+    conn = sqlite3.connect(path)
+    plan = conn.execute('''
+      EXPLAIN QUERY PLAN
+      SELECT w.id FROM word_schedules ws JOIN words w ON w.id = ws.word_id
+      WHERE ws.group_id = ? AND ws.due_at <= datetime('now') ORDER BY ws.due_at LIMIT 20
+    ''', (GROUP_ID,)).fetchall()
+    print('Plan: ' + '; '.join(row[-1] for row in plan))
+
+    client = app.test_client()
+    for url in (f'/groups/{GROUP_ID}/due?limit=20', f'/groups/{GROUP_ID}/due?limit=100',
+                f'/groups/{GROUP_ID}/words/raw'):
+      response = client.get(url)
+      assert response.status_code == 200, response.get_json()
+      repeat = 1 if url.endswith('raw') else 20
+      print(f"{url:28s} {timed(lambda: client.get(url), repeat):9.2f}ms")
+
+    # Rescheduling a submitted batch touches only the reviewed words
+    rng = random.Random(0)
+    def review_batch():
+      reviews = [(rng.randint(1, words), rng.random() < 0.7) for _ in range(REVIEW_BATCH)]
+      scheduler.apply_reviews(conn.cursor(), GROUP_ID, reviews)
+      conn.commit()
+    print(f"{f'apply_reviews x{REVIEW_BATCH}':28s} {timed(review_batch, 20):9.2f}ms")
+    conn.close()
+  finally:
+    for suffix in ('', '-journal', '-wal', '-shm'):
+      if os.path.exists(path + suffix):
+        os.remove(path + suffix)
+    os.rmdir(os.path.dirname(path))
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,145 @@
+"""Exporting a 200k-word group: streamed /groups/<id>/words/raw against fetchall + jsonify.
+
+  python -m bench.group_export [words]
+
+Peak RSS (Linux only) is measured in a fresh process per variant; transfer time over a
+local HTTP server. Builds a throwaway database next to this file, so
+words.db is not touched.
+"""
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from flask import jsonify
+from werkzeug.serving import make_server
+
+from app import create_app
+from lib import streaming
+
+GROUP_ID = 1
+
+# (label, path, headers)
+VARIANTS = [
+  ('before: fetchall + jsonify', '/bench/words/raw-before', {}),
+  ('streamed JSON', '/groups/1/words/raw', {}),
+  ('streamed NDJSON', '/groups/1/words/raw?format=ndjson', {}),
+  ('streamed JSON, gzip', '/groups/1/words/raw', {'Accept-Encoding': 'gzip'}),
+  ('streamed JSON, br', '/groups/1/words/raw', {'Accept-Encoding': 'br'}),
+]
+
+def bench_app(path):
+  app = create_app({'DATABASE': path})
+
+  # The endpoint as it was before streaming
+  @app.route('/bench/words/raw-before')
+  def words_raw_before():
+    cursor = app.db.cursor()
+    cursor.execute('''
+      SELECT w.id, w.kanji, w.romaji, w.english
+      FROM words w
+      JOIN word_groups wg ON w.id = wg.word_id
+      WHERE wg.group_id = ?
+      ORDER BY w.kanji
+    ''', (GROUP_ID,))
+    words = cursor.fetchall()
+    return jsonify([{
+      "id": word["id"],
+      "kanji": word["kanji"],
+      "romaji": word["romaji"],
+      "english": word["english"]
+    } for word in words])
+
+  return app
+
+def populate(path, words):
+  conn = sqlite3.connect(path)
+  rng = random.Random(0)
+  conn.execute("INSERT INTO groups (name) VALUES ('Everything')")
+  conn.executemany("INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, '[]')", (
+    (''.join(chr(rng.randint(0x4E00, 0x9FFF)) for _ in range(rng.randint(1, 3))) + 'する',
+     f'word{i}suru', f'to do thing number {i}') for i in range(words)))
+  conn.execute('INSERT INTO word_groups (word_id, group_id) SELECT id, ? FROM words', (GROUP_ID,))
+  conn.commit()
+  conn.close()
+
+def memory_mb(field):
+  with open('/proc/self/status') as f:
+    return next(int(line.split()[1]) for line in f if line.startswith(field)) // 1024
+
+def child(path, url, headers):
+  # Runs in its own process: RSS before serving one export and its peak while serving it
+  app = bench_app(path)
+  client = app.test_client()
+  client.get('/groups/99/words/raw')  # Import and warm everything but the export itself
+  idle = memory_mb('VmRSS:')
+  with open('/proc/self/clear_refs', 'w') as f:
+    f.write('5')  # Reset VmHWM, the peak RSS, to the current RSS
+  response = client.get(url, headers=headers, buffered=False)
+  for _ in response.response:
+    pass
+  response.close()
+  print(idle, memory_mb('VmHWM:'))
+
+def main():
+  words = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+  path = os.path.join(tempfile.mkdtemp(dir=os.path.dirname(__file__)), 'bench.db')
+  server = None
+  try:
+    app = bench_app(path)
+    with app.app_context():
+      app.db.setup_tables(app.db.cursor())
+    populate(path, words)
+    print(f"Populated a {words:,}-word group" + ('' if streaming.brotli else ' (brotli not installed, br falls back to identity)'))
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    for label, url, headers in VARIANTS:
+      idle_mb, peak_mb = subprocess.run(
+        [sys.executable, '-m', 'bench.group_export', '--child', path, url, repr(headers)],
+        capture_output=True, text=True, check=True
+      ).stdout.split()
+
+      best, first_byte, size = float('inf'), None, 0
+      for _ in range(3):
+        start = time.perf_counter()
+        with urllib.request.urlopen(urllib.request.Request(base + url, headers=headers)) as response:
+          chunk = response.read(1)
+          ttfb = time.perf_counter() - start
+          size = len(chunk) + len(response.read())
+        elapsed = time.perf_counter() - start
+        if elapsed < best:
+          best, first_byte = elapsed, ttfb
+      print(f"{label:28s} peak RSS {peak_mb:>4s}MB ({idle_mb}MB idle)   first byte {first_byte * 1000:7.1f}ms   "
+            f"total {best * 1000:7.1f}ms   {size / 1e6:6.1f}MB on the wire")
+
+    # A client revalidating an unchanged group
+    with urllib.request.urlopen(base + '/groups/1/words/raw') as response:
+      etag = response.headers['ETag']
+    start = time.perf_counter()
+    try:
+      urllib.request.urlopen(urllib.request.Request(base + '/groups/1/words/raw', headers={'If-None-Match': etag}))
+    except urllib.error.HTTPError as e:
+      assert e.code == 304
+    print(f"{'unchanged, If-None-Match':28s} 304 in {(time.perf_counter() - start) * 1000:.1f}ms")
+  finally:
+    if server:
+      server.shutdown()
+    for suffix in ('', '-journal', '-wal', '-shm'):
+      if os.path.exists(path + suffix):
+        os.remove(path + suffix)
+    os.rmdir(os.path.dirname(path))
+
+if __name__ == '__main__':
+  if sys.argv[1:2] == ['--child']:
+    import ast
+    child(sys.argv[2], sys.argv[3], ast.literal_eval(sys.argv[4]))
+  else:
+    main()
@@ -0,0 +1,78 @@
+"""List totals on 1M words and 1M sessions: cached counters against COUNT(*).
+
+  python -m bench.list_counts [rows]
+
+Builds a throwaway database next to this file, so words.db is not touched.
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from app import create_app
+
+GROUP_ID = 1
+
+# Endpoint -> the COUNT(*) it ran for its total before the counters
+OLD_COUNTS = {
+  '/words?page=2': ('SELECT COUNT(*) FROM words', ()),
+  '/groups': ('SELECT COUNT(*) FROM groups', ()),
+  '/groups/1/words?page=2': ('SELECT COUNT(*) FROM word_groups WHERE group_id = ?', (GROUP_ID,)),
+  '/api/study-sessions': ('SELECT COUNT(*) FROM study_sessions', ()),
+  '/dashboard/stats': ('SELECT (SELECT COUNT(*) FROM words), (SELECT COUNT(*) FROM study_sessions)', ()),
+}
+
+def populate(path, rows):
+  conn = sqlite3.connect(path)
+  rng = random.Random(0)
+  conn.executemany('INSERT INTO groups (name) VALUES (?)', [(f'Group {i}',) for i in range(100)])
+  conn.execute("INSERT INTO study_activities (name, url) VALUES ('Typing', 'http://localhost:8080')")
+  conn.executemany("INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, '[]')",
+                   ((f'語{i}', f'go{i}', f'word {i}') for i in range(rows)))
+  conn.execute('INSERT INTO word_groups (word_id, group_id) SELECT id, ? FROM words', (GROUP_ID,))
+  conn.executemany('INSERT INTO study_sessions (group_id, study_activity_id, created_at) '
+                   "VALUES (?, 1, datetime('2024-01-01', ? || ' minutes'))",
+                   ((rng.randint(1, 100), i) for i in range(rows)))
+  conn.commit()
+  conn.execute('ANALYZE')
+  conn.close()
+
+def timed(fn, repeat=5):
+  best = float('inf')
+  for _ in range(repeat):
+    start = time.perf_counter()
+    fn()
+    best = min(best, time.perf_counter() - start)
+  return best * 1000
+
+def main():
+  rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+  path = os.path.join(tempfile.mkdtemp(dir=os.path.dirname(__file__)), 'bench.db')
+  try:
+    app = create_app({'DATABASE': path})
+    with app.app_context():
+      app.db.setup_tables(app.db.cursor())
+    start = time.perf_counter()
+    populate(path, rows)
+    print(f"Populated {rows:,} words in one group and {rows:,} sessions in {time.perf_counter() - start:.0f}s")
+
+    client = app.test_client()
+    conn = sqlite3.connect(path)
+    counter = timed(lambda: conn.execute("SELECT value FROM counters WHERE name = 'words'").fetchone())
+    print(f"{'counter read':28s} {counter:8.3f}ms")
+    for url, (sql, params) in OLD_COUNTS.items():
+      response = client.get(url)
+      assert response.status_code == 200, response.get_json()
+      count = timed(lambda: conn.execute(sql, params).fetchone())
+      print(f"{url:28s} COUNT(*) it no longer runs {count:8.2f}ms   request now {timed(lambda: client.get(url)):8.2f}ms")
+    conn.close()
+  finally:
+    for suffix in ('', '-journal', '-wal', '-shm'):
+      if os.path.exists(path + suffix):
+        os.remove(path + suffix)
+    os.rmdir(os.path.dirname(path))
+
+if __name__ == '__main__':
+  main()
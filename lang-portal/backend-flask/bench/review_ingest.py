@@ -0,0 +1,139 @@
+"""Review submissions from 200 concurrent submitters: applied per request against write-behind.
+
+  python -m bench.review_ingest [seconds] [submitters]
+
+Each submitter posts 20 reviews at a time to its own study session over a
+local HTTP server. Builds a throwaway database next to this file, so
+words.db is not touched.
+"""
+import json
+import logging
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from werkzeug.serving import make_server
+
+from app import create_app
+
+GROUP_ID = 1
+WORDS = 10_000
+REVIEWS_PER_SUBMIT = 20
+
+def populate(path, sessions):
+  conn = sqlite3.connect(path)
+  conn.execute("INSERT INTO groups (name) VALUES ('Everything')")
+  conn.execute("INSERT INTO study_activities (name, url) VALUES ('Typing', 'http://localhost:8080')")
+  conn.executemany("INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, '[]')",
+                   ((f'語{i}', f'go{i}', f'word {i}') for i in range(WORDS)))
+  conn.execute('INSERT INTO word_groups (word_id, group_id) SELECT id, ? FROM words', (GROUP_ID,))
+  conn.executemany('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (?, 1)',
+                   [(GROUP_ID,)] * sessions)
+  conn.commit()
+  conn.close()
+
+def submitter(base, session_id, deadline, latencies, errors):
+  rng = random.Random(session_id)
+  while time.perf_counter() < deadline:
+    body = json.dumps([{'word_id': rng.randint(1, WORDS), 'correct': rng.random() < 0.8}
+                       for _ in range(REVIEWS_PER_SUBMIT)]).encode()
+    request = urllib.request.Request(f'{base}/api/study-sessions/{session_id}/reviews', data=body,
+                                     headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+      with urllib.request.urlopen(request, timeout=60) as response:
+        response.read()
+      latencies.append(time.perf_counter() - start)
+    except (urllib.error.URLError, OSError):
+      errors.append(session_id)
+
+def serve(path, write_behind):
+  # Runs in its own process, so the submitters don't compete with it for the GIL
+  app = create_app({'DATABASE': path, 'REVIEW_WRITE_BEHIND': write_behind})
+  logging.getLogger('werkzeug').setLevel(logging.ERROR)  # No line per request
+  server = make_server('127.0.0.1', 0, app, threaded=True)
+  server.socket.listen(1024)
+  print(server.server_port, flush=True)
+  server.serve_forever()
+
+def queue_stats(base):
+  with urllib.request.urlopen(f'{base}/api/study-sessions/review-queue') as response:
+    return json.load(response)
+
+def run(path, seconds, submitters, write_behind):
+  server = subprocess.Popen([sys.executable, '-m', 'bench.review_ingest', '--serve', path, str(write_behind)],
+                            stdout=subprocess.PIPE, text=True)
+  base = f'http://127.0.0.1:{server.stdout.readline().strip()}'
+  try:
+    latencies, errors = [], []
+    start = time.perf_counter()
+    threads = [threading.Thread(target=submitter, args=(base, session_id, start + seconds, latencies, errors))
+               for session_id in range(1, submitters + 1)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    acked = time.perf_counter() - start
+    stats = {}
+    if write_behind:
+      # Sustained means applied, so wait for the flusher to catch up
+      while queue_stats(base)['pending']:
+        time.sleep(0.01)
+      stats = queue_stats(base)
+    applied = time.perf_counter() - start
+  finally:
+    server.terminate()
+    server.wait()
+
+  latencies.sort()
+  reviews = len(latencies) * REVIEWS_PER_SUBMIT
+  p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+  p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+  label = 'write-behind' if write_behind else 'per request'
+  print(f"{label:14s} {reviews / acked:8,.0f} reviews/s acknowledged   {reviews / applied:8,.0f} reviews/s applied   "
+        f"p50 {p50:7.1f}ms   p99 {p99:7.1f}ms   {len(errors)} failed")
+  if stats:
+    print(f"{'':14s} {stats['flushed_submissions']:,} submissions in {stats['flushed_batches']:,} flushes, "
+          f"max flush lag {stats['max_lag_seconds'] * 1000:.0f}ms")
+
+  conn = sqlite3.connect(path)
+  applied_reviews = conn.execute('SELECT COUNT(*) FROM word_review_items').fetchone()[0]
+  counted = conn.execute('SELECT COALESCE(SUM(correct_count + wrong_count), 0) FROM word_reviews').fetchone()[0]
+  rollup = conn.execute('SELECT SUM(review_count) FROM study_sessions').fetchone()[0]
+  conn.execute('DELETE FROM word_review_items')
+  conn.execute('DELETE FROM word_reviews')
+  conn.execute('UPDATE study_sessions SET review_count = 0')
+  conn.commit()
+  conn.close()
+  assert applied_reviews == counted == rollup == reviews, (applied_reviews, counted, rollup, reviews)
+
+def main():
+  seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+  submitters = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+  directory = tempfile.mkdtemp(dir=os.path.dirname(__file__))
+  path = os.path.join(directory, 'bench.db')
+  try:
+    app = create_app({'DATABASE': path})
+    with app.app_context():
+      app.db.setup_tables(app.db.cursor())
+    populate(path, submitters)
+    print(f"{submitters} submitters for {seconds:.0f}s, {REVIEWS_PER_SUBMIT} reviews per submit, {WORDS:,}-word group")
+    run(path, seconds, submitters, write_behind=False)
+    run(path, seconds, submitters, write_behind=True)
+  finally:
+    for name in os.listdir(directory):
+      os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+if __name__ == '__main__':
+  if sys.argv[1:2] == ['--serve']:
+    serve(sys.argv[2], sys.argv[3] == 'True')
+  else:
+    main()
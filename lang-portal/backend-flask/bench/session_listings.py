@@ -0,0 +1,150 @@
+"""Study session listings on 1M sessions: rollup columns vs per-row aggregation.
+
+  python -m bench.session_listings [sessions]
+
+Builds a throwaway database next to this file, so words.db is not touched.
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from app import create_app
+
+GROUPS = 100
+ACTIVITIES = 5
+REVIEWS_PER_SESSION = 3
+# Old queries still running after this many seconds are reported as timed out
+BEFORE_TIMEOUT = 60
+
+# The listing queries as they were before the rollup columns
+OLD_QUERIES = {
+  '/api/study-sessions?page=500': ('''
+    SELECT ss.id, ss.group_id, g.name as group_name, sa.id as activity_id, sa.name as activity_name,
+      ss.created_at, COUNT(wri.id) as review_items_count
+    FROM study_sessions ss
+    JOIN groups g ON g.id = ss.group_id
+    JOIN study_activities sa ON sa.id = ss.study_activity_id
+    LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
+    GROUP BY ss.id
+    ORDER BY ss.created_at DESC
+    LIMIT 10 OFFSET 4990
+  ''', ()),
+  '/groups/7/study_sessions': ('''
+    SELECT s.id, s.group_id, s.study_activity_id, s.created_at as start_time,
+      (SELECT MAX(created_at) FROM word_review_items WHERE study_session_id = s.id) as last_activity_time,
+      a.name as activity_name, g.name as group_name,
+      (SELECT COUNT(*) FROM word_review_items WHERE study_session_id = s.id) as review_count
+    FROM study_sessions s
+    JOIN study_activities a ON s.study_activity_id = a.id
+    JOIN groups g ON s.group_id = g.id
+    WHERE s.group_id = ?
+    ORDER BY created_at desc
+    LIMIT 10 OFFSET 0
+  ''', (7,)),
+  '/api/study-activities/2/sessions': ('''
+    SELECT ss.id, ss.group_id, g.name as group_name, sa.name as activity_name, ss.created_at,
+      ss.study_activity_id as activity_id, COUNT(wri.id) as review_items_count
+    FROM study_sessions ss
+    JOIN groups g ON g.id = ss.group_id
+    JOIN study_activities sa ON sa.id = ss.study_activity_id
+    LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
+    WHERE ss.study_activity_id = ?
+    GROUP BY ss.id, ss.group_id, g.name, sa.name, ss.created_at, ss.study_activity_id
+    ORDER BY ss.created_at DESC
+    LIMIT 10 OFFSET 0
+  ''', (2,)),
+  '/dashboard/recent-session': ('''
+    SELECT ss.id, ss.group_id, sa.name as activity_name, ss.created_at,
+      COUNT(CASE WHEN wri.correct = 1 THEN 1 END) as correct_count,
+      COUNT(CASE WHEN wri.correct = 0 THEN 1 END) as wrong_count
+    FROM study_sessions ss
+    JOIN study_activities sa ON ss.study_activity_id = sa.id
+    LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
+    GROUP BY ss.id
+    ORDER BY ss.created_at DESC
+    LIMIT 1
+  ''', ()),
+}
+
+def populate(path, sessions):
+  conn = sqlite3.connect(path)
+  rng = random.Random(0)
+  conn.executemany('INSERT INTO groups (name) VALUES (?)', [(f'Group {i}',) for i in range(GROUPS)])
+  conn.executemany('INSERT INTO study_activities (name, url) VALUES (?, ?)',
+                   [(f'Activity {i}', f'http://localhost:{8080 + i}') for i in range(ACTIVITIES)])
+  conn.executemany('''
+    INSERT INTO study_sessions (group_id, study_activity_id, created_at, review_count, last_activity_at)
+    VALUES (?, ?, datetime('2024-01-01', ? || ' minutes'), ?, datetime('2024-01-01', ? || ' minutes'))
+  ''', ((rng.randint(1, GROUPS), rng.randint(1, ACTIVITIES), i, REVIEWS_PER_SESSION, i + 5)
+        for i in range(sessions)))
+  conn.executemany('''
+    INSERT INTO word_review_items (word_id, study_session_id, correct, created_at)
+    VALUES (?, ?, ?, datetime('2024-01-01', ? || ' minutes'))
+  ''', ((rng.randint(1, 1000), session_id, rng.random() < 0.7, session_id + 4)
+        for session_id in range(1, sessions + 1) for _ in range(REVIEWS_PER_SESSION)))
+  conn.commit()
+  conn.execute('ANALYZE')
+  conn.close()
+
+def timed(fn, repeat=5):
+  best = float('inf')
+  for _ in range(repeat):
+    start = time.perf_counter()
+    fn()
+    best = min(best, time.perf_counter() - start)
+  return best * 1000
+
+def timed_with_timeout(conn, sql, params):
+  """Milliseconds for one run of sql, or None if it takes longer than BEFORE_TIMEOUT"""
+  deadline = time.perf_counter() + BEFORE_TIMEOUT
+  conn.set_progress_handler(lambda: time.perf_counter() > deadline, 100_000)
+  try:
+    return timed(lambda: conn.execute(sql, params).fetchall(), repeat=1)
+  except sqlite3.OperationalError:
+    return None
+  finally:
+    conn.set_progress_handler(None, 0)
+
+def main():
+  sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+  path = os.path.join(tempfile.mkdtemp(dir=os.path.dirname(__file__)), 'bench.db')
+  try:
+    app = create_app({'DATABASE': path})
+    with app.app_context():
+      app.db.setup_tables(app.db.cursor())
+    start = time.perf_counter()
+    populate(path, sessions)
+    print(f"Populated {sessions:,} sessions / {sessions * REVIEWS_PER_SESSION:,} reviews "
+          f"in {time.perf_counter() - start:.0f}s")
+
+    client = app.test_client()
+    conn = sqlite3.connect(path)
+
+    # The old queries run against the old schema, which had no indexes
+    indexes = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")]
+    for index in indexes:
+      conn.execute(f'DROP INDEX {index}')
+    before = {url: timed_with_timeout(conn, sql, params) for url, (sql, params) in OLD_QUERIES.items()}
+    with open('sql/setup/create_indexes_study_sessions.sql') as f:
+      conn.executescript(f.read())
+    conn.execute('ANALYZE')
+    conn.commit()
+
+    for url in OLD_QUERIES:
+      response = client.get(url)
+      assert response.status_code == 200, response.get_json()
+      after = timed(lambda: client.get(url))
+      before_ms = f"{before[url]:9.1f}ms" if before[url] is not None else f">{BEFORE_TIMEOUT:.0f}s".rjust(11)
+      print(f"{url:36s} before {before_ms} (query only)   after {after:7.2f}ms (full request)")
+    conn.close()
+  finally:
+    for suffix in ('', '-journal', '-wal', '-shm'):
+      if os.path.exists(path + suffix):
+        os.remove(path + suffix)
+    os.rmdir(os.path.dirname(path))
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,72 @@
+"""Cost of SQL_PROFILE: requests with profiling off and on, on 100k words and 100k sessions.
+
+  python -m bench.sql_profiling [rows]
+
+With profiling off the only change from before is the explicit
+sqlite3.Connection factory in Db.connect, timed on its own as well.
+Builds a throwaway database next to this file, so words.db is not touched.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from app import create_app
+from bench.list_counts import populate
+
+URLS = [
+  '/words?page=2',
+  '/groups',
+  '/groups/1/words?page=2',
+  '/groups/1/words/sample?n=20',
+  '/groups/1/study_sessions',
+  '/api/study-sessions',
+  '/dashboard/stats',
+  '/words/search?q=word 12',
+]
+
+def timed(*fns, repeat=100):
+  """Median ms of each fn; calls are interleaved so drift affects them all alike"""
+  samples = [[] for _ in fns]
+  for _ in range(repeat):
+    for fn, fn_samples in zip(fns, samples):
+      start = time.perf_counter()
+      fn()
+      fn_samples.append(time.perf_counter() - start)
+  return [sorted(fn_samples)[len(fn_samples) // 2] * 1000 for fn_samples in samples]
+
+def main():
+  rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+  path = os.path.join(tempfile.mkdtemp(dir=os.path.dirname(__file__)), 'bench.db')
+  try:
+    app = create_app({'DATABASE': path})
+    with app.app_context():
+      app.db.setup_tables(app.db.cursor())
+    populate(path, rows)
+    print(f"Populated {rows:,} words and {rows:,} sessions")
+
+    def connect_and_query(**kwargs):
+      conn = sqlite3.connect(path, **kwargs)
+      conn.execute("SELECT value FROM counters WHERE name = 'words'").fetchone()
+      conn.close()
+    before, after = timed(lambda: connect_and_query(), lambda: connect_and_query(factory=sqlite3.Connection),
+                          repeat=2000)
+    print(f"{'connect + query':28s} before {before * 1000:7.1f}us   profiling off {after * 1000:7.1f}us")
+
+    plain = create_app({'DATABASE': path}).test_client()
+    profiled = create_app({'DATABASE': path, 'SQL_PROFILE': True, 'SLOW_QUERY_MS': float('inf')}).test_client()
+    for url in URLS:
+      response = profiled.get(url)
+      assert response.status_code == 200, response.get_json()
+      off, on = timed(lambda: plain.get(url), lambda: profiled.get(url))
+      print(f"{url:28s} off {off:6.3f}ms   on {on:6.3f}ms ({(on - off) * 1000:+5.0f}us)   "
+            f"X-SQL: {response.headers['X-SQL']}")
+  finally:
+    for suffix in ('', '-journal', '-wal', '-shm'):
+      if os.path.exists(path + suffix):
+        os.remove(path + suffix)
+    os.rmdir(os.path.dirname(path))
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,233 @@
+"""Every API route on synthetic data, through the Flask test client and a real WSGI server.
+
+  python -m bench.suite [--scale small|medium|large] [--samples N]
+                        [--save bench/baselines/medium.json] [--compare bench/baselines/medium.json]
+
+Reports p50/p95/p99 latency in each mode and the SQL statements each
+request ran, read from the X-SQL header of SQL_PROFILE (which adds tens of
+microseconds per request; see bench.sql_profiling). --save writes the
+results as a JSON baseline; --compare prints the change against one and
+exits with status 1 if any route got slower or runs more statements.
+Builds a throwaway database next to this file with lib.synthetic, so
+words.db is not touched.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from werkzeug.serving import make_server
+
+from app import create_app
+from lib.synthetic import generate
+
+# Arguments to lib.synthetic.generate
+SCALES = {
+  'small': dict(words=10_000, groups=20, sessions=2_000, reviews=20),
+  'medium': dict(words=100_000, groups=100, sessions=20_000, reviews=20),
+  'large': dict(words=1_000_000, groups=300, sessions=200_000, reviews=20),
+}
+
+# A p50 this much slower than the baseline, and by at least REGRESSION_MIN_MS, is a regression
+REGRESSION_RATIO = 1.25
+REGRESSION_MIN_MS = 1.0
+
+def requests(conn):
+  """'METHOD rule' -> make(), which returns (method, url, json body) for one request.
+
+  Every route in routes/*.py has an entry; main() checks that against the
+  app's url_map so new routes can't be left out.
+  """
+  group_id = conn.execute('SELECT id FROM groups ORDER BY words_count DESC LIMIT 1').fetchone()[0]
+  session_id = conn.execute('SELECT id FROM study_sessions WHERE group_id = ? LIMIT 1', (group_id,)).fetchone()[0]
+  activity_id = conn.execute('SELECT id FROM study_activities LIMIT 1').fetchone()[0]
+  word_ids = [row[0] for row in conn.execute('SELECT word_id FROM word_groups WHERE group_id = ? LIMIT 20', (group_id,))]
+  answers = [row[0] for row in conn.execute('SELECT romaji FROM words ORDER BY id LIMIT 100')]
+  english = conn.execute('SELECT english FROM words LIMIT 1').fetchone()[0].split(' (')[0]
+
+  def created_session():
+    # DELETE and reset get fresh sessions to remove; these inserts aren't timed
+    cursor = conn.execute('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (?, ?)', (group_id, activity_id))
+    conn.executemany('INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (?, ?, 1)',
+                     [(word_id, cursor.lastrowid) for word_id in word_ids])
+    conn.commit()
+    return cursor.lastrowid
+
+  def request(method, url, body=None):
+    return lambda: (method, url, body)
+
+  return {
+    'GET /words': request('GET', '/words?page=2'),
+    'GET /words/search': request('GET', f'/words/search?q={urllib.request.quote(english)}'),
+    'POST /words/match': request('POST', '/words/match', {"answers": answers}),
+    'GET /words/<int:word_id>': request('GET', f'/words/{word_ids[0]}'),
+    'GET /groups': request('GET', '/groups'),
+    'GET /groups/<int:id>': request('GET', f'/groups/{group_id}'),
+    'GET /groups/<int:id>/words': request('GET', f'/groups/{group_id}/words?page=2'),
+    'GET /groups/<int:id>/words/raw': request('GET', f'/groups/{group_id}/words/raw'),
+    'GET /groups/<int:id>/words/sample': request('GET', f'/groups/{group_id}/words/sample?n=20'),
+    'GET /groups/<int:id>/due': request('GET', f'/groups/{group_id}/due'),
+    'GET /groups/<int:id>/study_sessions': request('GET', f'/groups/{group_id}/study_sessions'),
+    'GET /api/study-sessions': request('GET', '/api/study-sessions?page=2'),
+    'POST /api/study-sessions': request('POST', '/api/study-sessions', {"group_id": group_id, "study_activity_id": activity_id}),
+    'GET /api/study-sessions/<int:id>': request('GET', f'/api/study-sessions/{session_id}'),
+    'PUT /api/study-sessions/<int:id>': request('PUT', f'/api/study-sessions/{session_id}', {"end_time": "2024-01-01 10:00:00"}),
+    'DELETE /api/study-sessions/<int:id>': lambda: ('DELETE', f'/api/study-sessions/{created_session()}', None),
+    'POST /api/study-sessions/<int:id>/reviews': request('POST', f'/api/study-sessions/{session_id}/reviews',
+                                                         [{"word_id": word_id, "correct": True} for word_id in word_ids]),
+    'GET /api/study-sessions/review-queue': request('GET', '/api/study-sessions/review-queue'),
+    'GET /dashboard/recent-session': request('GET', '/dashboard/recent-session'),
+    'GET /dashboard/stats': request('GET', '/dashboard/stats'),
+    'GET /api/study-activities': request('GET', '/api/study-activities'),
+    'GET /api/study-activities/<int:id>': request('GET', f'/api/study-activities/{activity_id}'),
+    'GET /api/study-activities/<int:id>/sessions': request('GET', f'/api/study-activities/{activity_id}/sessions'),
+    'GET /api/study-activities/<int:id>/launch': request('GET', f'/api/study-activities/{activity_id}/launch'),
+    'GET /debug/metrics': request('GET', '/debug/metrics'),
+    # Clears every session, so it runs last, after one is added to clear
+    'POST /api/study-sessions/reset': lambda: (created_session(), ('POST', '/api/study-sessions/reset', None))[1],
+  }
+
+def percentiles(samples):
+  samples = sorted(samples)
+  return {f"p{p}": round(samples[min(len(samples) - 1, len(samples) * p // 100)] * 1000, 3) for p in (50, 95, 99)}
+
+def via_client(client):
+  def send(method, url, body):
+    response = client.open(url, method=method, json=body)
+    response.get_data()  # Drain streamed bodies
+    return response.status_code, response.headers.get('X-SQL')
+  return send
+
+def via_server(base):
+  def send(method, url, body):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(base + url, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'} if data else {})
+    try:
+      with urllib.request.urlopen(request) as response:
+        response.read()
+        return response.status, response.headers.get('X-SQL')
+    except urllib.error.HTTPError as e:
+      return e.code, e.headers.get('X-SQL')
+  return send
+
+def measure(send, make, samples):
+  """Latency percentiles of samples requests, and the statements the last one ran"""
+  times, x_sql = [], None
+  for _ in range(samples):
+    method, url, body = make()
+    start = time.perf_counter()
+    status, x_sql = send(method, url, body)
+    times.append(time.perf_counter() - start)
+    assert status < 400, (method, url, status)
+  return percentiles(times), int(x_sql.split()[0])
+
+def serve(path):
+  # Runs in its own process, so the client doesn't compete with it for the GIL
+  app = create_app({'DATABASE': path, 'SQL_PROFILE': True, 'SLOW_QUERY_MS': float('inf')})
+  logging.getLogger('werkzeug').setLevel(logging.ERROR)  # No line per request
+  server = make_server('127.0.0.1', 0, app, threaded=True)
+  print(server.server_port, flush=True)
+  server.serve_forever()
+
+def compare(results, baseline_path):
+  """Print each route's change against a baseline; True if any route regressed"""
+  with open(baseline_path) as f:
+    baseline = json.load(f)
+  if baseline["scale"] != results["scale"]:
+    print(f"Baseline {baseline_path} is for {baseline['scale']}, not {results['scale']}")
+  regressed = False
+  print(f"\nAgainst {baseline_path} ({baseline['machine']}):")
+  for route, result in results["routes"].items():
+    before = baseline["routes"].get(route)
+    if before is None:
+      print(f"  {route:46s} new")
+      continue
+    notes = []
+    for mode in ('client', 'server'):
+      old, new = before[mode]["p50"], result[mode]["p50"]
+      change = f"{mode} p50 {old:.2f} -> {new:.2f}ms"
+      if new > old * REGRESSION_RATIO and new - old >= REGRESSION_MIN_MS:
+        change += ' SLOWER'
+        regressed = True
+      notes.append(change)
+    if result["queries"] > before["queries"]:
+      notes.append(f"queries {before['queries']} -> {result['queries']} MORE")
+      regressed = True
+    print(f"  {route:46s} " + '   '.join(notes))
+  return regressed
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--scale', choices=SCALES, default='medium')
+  parser.add_argument('--samples', type=int, default=50, help='requests per route and mode')
+  parser.add_argument('--save', help='write the results to this JSON baseline')
+  parser.add_argument('--compare', help='compare the results with this JSON baseline')
+  args = parser.parse_args()
+
+  directory = tempfile.mkdtemp(dir=os.path.dirname(__file__))
+  path = os.path.join(directory, 'bench.db')
+  server = None
+  try:
+    start = time.perf_counter()
+    counts = generate(path, **SCALES[args.scale])
+    print(f"{args.scale}: " + ', '.join(f"{count:,} {table}" for table, count in counts.items()) +
+          f", generated in {time.perf_counter() - start:.0f}s")
+
+    app = create_app({'DATABASE': path, 'SQL_PROFILE': True, 'SLOW_QUERY_MS': float('inf')})
+    conn = sqlite3.connect(path)
+    routes = requests(conn)
+    rules = {f'{method} {rule.rule}' for rule in app.url_map.iter_rules() if rule.endpoint != 'static'
+             for method in rule.methods - {'HEAD', 'OPTIONS'}}
+    assert rules == set(routes), f"Routes without a request: {rules - set(routes)}, stale: {set(routes) - rules}"
+
+    server = subprocess.Popen([sys.executable, '-m', 'bench.suite', '--serve', path], stdout=subprocess.PIPE, text=True)
+    base = f'http://127.0.0.1:{server.stdout.readline().strip()}'
+
+    results = {
+      "scale": args.scale,
+      "counts": counts,
+      "samples": args.samples,
+      "machine": f"{platform.python_implementation()} {platform.python_version()}, SQLite {sqlite3.sqlite_version}, "
+                 f"{os.cpu_count()} CPU",
+      "routes": {}
+    }
+    print(f"{'':46s} {'test client p50/p95/p99 ms':>28s}   {'WSGI server p50/p95/p99 ms':>28s}   queries")
+    client_send, server_send = via_client(app.test_client()), via_server(base)
+    for route, make in routes.items():
+      client, queries = measure(client_send, make, args.samples)
+      served, _ = measure(server_send, make, args.samples)
+      results["routes"][route] = {"client": client, "server": served, "queries": queries}
+      print(f"{route:46s} {client['p50']:8.2f} {client['p95']:8.2f} {client['p99']:8.2f}   "
+            f"{served['p50']:8.2f} {served['p95']:8.2f} {served['p99']:8.2f}   {queries:7d}")
+    conn.close()
+
+    if args.save:
+      os.makedirs(os.path.dirname(args.save) or '.', exist_ok=True)
+      with open(args.save, 'w') as f:
+        json.dump(results, f, indent=2)
+        f.write('\n')
+      print(f"\nSaved {args.save}")
+    if args.compare and compare(results, args.compare):
+      sys.exit(1)
+  finally:
+    if server:
+      server.terminate()
+      server.wait()
+    for name in os.listdir(directory):
+      os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+if __name__ == '__main__':
+  if sys.argv[1:2] == ['--serve']:
+    serve(sys.argv[2])
+  else:
+    main()
@@ -0,0 +1,88 @@
+"""Typed-answer matching on 1M words: one POST /words/match of 10k answers.
+
+  python -m bench.word_match [words] [answers]
+
+Builds a throwaway database next to this file, so words.db is not touched.
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from app import create_app
+from lib.kana import KANA_ROMAJI, readings
+
+SINGLE_REQUESTS = 1000
+
+def populate(path, words, rng):
+  syllables = [kunrei for kana, _, kunrei in KANA_ROMAJI if len(kana) == 1 and kana not in 'をゔー']
+  romaji = [''.join(rng.choice(syllables) for _ in range(rng.randint(2, 5))) for _ in range(words)]
+  conn = sqlite3.connect(path)
+  conn.executemany('''
+    INSERT INTO words (kanji, romaji, english, parts, reading_kana, reading_hepburn, reading_kunrei)
+    VALUES ('語', ?, 'word', '[]', ?, ?, ?)
+  ''', ((r, *readings(r)) for r in romaji))
+  conn.commit()
+  conn.execute('ANALYZE')
+  conn.close()
+  return romaji
+
+def answers_for(romaji, count, rng):
+  # Typed the way the tutor sees them: Hepburn, Kunrei, kana, katakana, and some misses
+  answers = []
+  for r in rng.sample(romaji, count):
+    kana, hepburn, kunrei = readings(r)
+    katakana = ''.join(chr(ord(c) + 0x60) if 'ぁ' <= c <= 'ゖ' else c for c in kana)
+    answers.append(rng.choice([hepburn, kunrei, kana, katakana, hepburn.upper(), hepburn + 'x']))
+  return answers
+
+def main():
+  words = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+  count = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+  path = os.path.join(tempfile.mkdtemp(dir=os.path.dirname(__file__)), 'bench.db')
+  rng = random.Random(0)
+  try:
+    app = create_app({'DATABASE': path})
+    with app.app_context():
+      app.db.setup_tables(app.db.cursor())
+    start = time.perf_counter()
+    romaji = populate(path, words, rng)
+    print(f"Populated {words:,} words with readings in {time.perf_counter() - start:.0f}s")
+
+    client = app.test_client()
+    answers = answers_for(romaji, count, rng)
+
+    best = float('inf')
+    for _ in range(5):
+      start = time.perf_counter()
+      response = client.post('/words/match', json={'answers': answers})
+      best = min(best, time.perf_counter() - start)
+    matches = response.get_json()['matches']
+    matched = sum(1 for match in matches if match['word_ids'])
+    print(f"One request, {count:,} answers:    {best * 1000:8.1f}ms "
+          f"({best / count * 1e6:.1f}us per answer, {matched:,} matched)")
+
+    start = time.perf_counter()
+    for answer in answers[:SINGLE_REQUESTS]:
+      client.post('/words/match', json={'answers': [answer]})
+    single = (time.perf_counter() - start) / SINGLE_REQUESTS
+    print(f"One request per answer, {count:,}: {single * count * 1000:8.1f}ms "
+          f"(extrapolated from {SINGLE_REQUESTS:,})")
+
+    conn = sqlite3.connect(path)
+    conn.execute('DROP INDEX idx_words_reading_kana')
+    conn.commit()
+    start = time.perf_counter()
+    client.post('/words/match', json={'answers': answers})
+    print(f"One request without the index:   {(time.perf_counter() - start) * 1000:8.1f}ms")
+    conn.close()
+  finally:
+    for suffix in ('', '-journal', '-wal', '-shm'):
+      if os.path.exists(path + suffix):
+        os.remove(path + suffix)
+    os.rmdir(os.path.dirname(path))
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,98 @@
+"""Word search on 1M words: /words/search against a LIKE '%q%' scan.
+
+  python -m bench.word_search [words]
+
+Builds a throwaway database next to this file, so words.db is not touched.
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from app import create_app
+
+SYLLABLES = ['ka', 'ki', 'ku', 'ke', 'ko', 'sa', 'shi', 'su', 'se', 'so', 'ta', 'chi', 'tsu', 'te', 'to',
+             'na', 'ni', 'nu', 'ne', 'no', 'ha', 'hi', 'fu', 'he', 'ho', 'ma', 'mi', 'mu', 'me', 'mo',
+             'ya', 'yu', 'yo', 'ra', 'ri', 'ru', 're', 'ro', 'wa', 'n']
+KANA = 'あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわん'
+ENGLISH = ['eat', 'drink', 'walk', 'read', 'write', 'see', 'hear', 'buy', 'sell', 'make', 'open', 'close',
+           'big', 'small', 'new', 'old', 'hot', 'cold', 'fast', 'slow', 'red', 'blue', 'water', 'fire',
+           'tree', 'river', 'mountain', 'book', 'house', 'school', 'teacher', 'student', 'friend']
+
+QUERIES = ['mountain', 'river', 'tsuka', '食べる', '木川', 'ta', '水']
+
+def word(rng):
+  kanji = ''.join(chr(rng.randint(0x4E00, 0x4FFF)) for _ in range(rng.randint(1, 3)))
+  kanji += ''.join(rng.choice(KANA) for _ in range(rng.randint(0, 2)))
+  romaji = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5)))
+  english = ' '.join(rng.choice(ENGLISH) for _ in range(rng.randint(1, 3)))
+  return kanji, romaji, english
+
+def populate(path, words):
+  conn = sqlite3.connect(path)
+  rng = random.Random(0)
+  rows = [word(rng) for _ in range(words)]
+  # A few known words so the Japanese queries have something to find
+  known = [('食べる', 'taberu', 'to eat'), ('木川', 'kigawa', 'Kigawa'), ('水', 'mizu', 'water')]
+  for i in range(0, words, 100_000):
+    rows[i] = known[i // 100_000 % len(known)]
+  conn.executemany("INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, '{}')", rows)
+  conn.commit()
+  conn.close()
+
+def timed(fn, repeat=5):
+  best = float('inf')
+  for _ in range(repeat):
+    start = time.perf_counter()
+    fn()
+    best = min(best, time.perf_counter() - start)
+  return best * 1000
+
+def main():
+  words = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+  path = os.path.join(tempfile.mkdtemp(dir=os.path.dirname(__file__)), 'bench.db')
+  try:
+    app = create_app({'DATABASE': path})
+    with app.app_context():
+      app.db.setup_tables(app.db.cursor())
+    start = time.perf_counter()
+    populate(path, words)
+    print(f"Populated {words:,} words (indexed by the FTS triggers) in {time.perf_counter() - start:.0f}s, "
+          f"{os.path.getsize(path) / 1e6:.0f}MB")
+
+    client = app.test_client()
+    conn = sqlite3.connect(path)
+    for q in QUERIES:
+      like = '%' + q + '%'
+      # Ranking needs every match, so the baseline reads them all
+      baseline = timed(lambda: conn.execute('''
+        SELECT id, kanji, romaji, english FROM words
+        WHERE kanji LIKE ? OR romaji LIKE ? OR english LIKE ?
+      ''', (like, like, like)).fetchall(), repeat=3)
+      url = '/words/search?q=' + q
+      response = client.get(url)
+      assert response.status_code == 200, response.get_json()
+      first_page = timed(lambda: client.get(url))
+      matches = conn.execute('SELECT COUNT(*) FROM words_fts WHERE words_fts MATCH ?', ('"' + q + '"',)).fetchone()[0] \
+        if len(q) >= 3 else None
+      print(f"q={q:10s} LIKE scan (query only) {baseline:8.1f}ms   /words/search {first_page:8.1f}ms"
+            + (f"   ({matches:,} FTS matches)" if matches is not None else "   (short query, prefixes from the indexes)"))
+
+    # Deep pages cost the same as the first one with keyset paging
+    url = '/words/search?q=mountain&limit=100'
+    cursor = None
+    for _ in range(50):
+      cursor = client.get(url + (f'&after={cursor}' if cursor else '')).get_json()['next_cursor']
+    print(f"q=mountain page 51 via after={cursor}: "
+          f"{timed(lambda: client.get(f'{url}&after={cursor}')):.1f}ms")
+    conn.close()
+  finally:
+    for suffix in ('', '-journal', '-wal', '-shm'):
+      if os.path.exists(path + suffix):
+        os.remove(path + suffix)
+    os.rmdir(os.path.dirname(path))
+
+if __name__ == '__main__':
+  main()
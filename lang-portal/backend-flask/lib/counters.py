@@ -0,0 +1,56 @@
+# Tables whose row counts the counters table caches
+COUNTED_TABLES = ['words', 'groups', 'study_sessions']
+
+def counter(cursor, name):
+  """The cached row count of a table in COUNTED_TABLES"""
+  cursor.execute('SELECT value FROM counters WHERE name = ?', (name,))
+  row = cursor.fetchone()
+  return row[0] if row else 0
+
+def check_counters(conn, fix=False):
+  """Compare every cached counter, and the word_groups positions, with a fresh count.
+
+  Returns (counter, cached, actual) for each one that is off; with fix,
+  also overwrites those with the actual counts.
+  """
+  mismatches = []
+  for table in COUNTED_TABLES:
+    cached = conn.execute('SELECT value FROM counters WHERE name = ?', (table,)).fetchone()
+    actual = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    if cached is None or cached[0] != actual:
+      mismatches.append((f'counters.{table}', cached[0] if cached else None, actual))
+
+  for group_id, cached, actual in conn.execute('''
+    SELECT g.id, g.words_count, COUNT(wg.word_id)
+    FROM groups g
+    LEFT JOIN word_groups wg ON wg.group_id = g.id
+    GROUP BY g.id
+    HAVING g.words_count IS NOT COUNT(wg.word_id)
+  '''):
+    mismatches.append((f'groups.words_count[{group_id}]', cached, actual))
+
+  # Positions must be exactly 0..words_count-1 for sampling to be uniform
+  for group_id, words, lowest, highest, distinct in conn.execute('''
+    SELECT group_id, COUNT(*), MIN(position), MAX(position), COUNT(DISTINCT position)
+    FROM word_groups
+    GROUP BY group_id
+    HAVING MIN(position) IS NOT 0 OR MAX(position) IS NOT COUNT(*) - 1 OR COUNT(DISTINCT position) != COUNT(*)
+  '''):
+    mismatches.append((f'word_groups.position[{group_id}]', f'{distinct} distinct in {lowest}..{highest}', f'0..{words - 1}'))
+
+  if fix and mismatches:
+    for table in COUNTED_TABLES:
+      conn.execute('INSERT OR REPLACE INTO counters (name, value) SELECT ?, COUNT(*) FROM ' + table, (table,))
+    conn.execute('UPDATE groups SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id)')
+    # Cleared first, as renumbering in place can collide in idx_word_groups_position
+    conn.execute('UPDATE word_groups SET position = NULL')
+    conn.execute('''
+      UPDATE word_groups SET position = numbered.position
+      FROM (
+        SELECT rowid AS row_id, ROW_NUMBER() OVER (PARTITION BY group_id ORDER BY rowid) - 1 AS position
+        FROM word_groups
+      ) numbered
+      WHERE word_groups.rowid = numbered.row_id
+    ''')
+    conn.commit()
+  return mismatches
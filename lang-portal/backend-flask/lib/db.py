@@ -1,21 +1,51 @@
 import sqlite3
 import json
 from flask import g
+from migrate import mark_all_applied
+from lib.kana import readings
+from lib.profiling import ProfilingConnection
 
 class Db:
-  def __init__(self, database='words.db'):
+  def __init__(self, database='words.db', profile=False):
     self.database = database
     self.connection = None
+    # Profiling connections time every statement; plain ones cost nothing extra
+    self.factory = ProfilingConnection if profile else sqlite3.Connection
+    self.wal_enabled = False
+
+  def connect(self):
+    if not self.wal_enabled:
+      self.enable_wal()
+    connection = sqlite3.connect(self.database, factory=self.factory)
+    connection.row_factory = sqlite3.Row  # Return rows as dictionaries
+    return connection
+
+  def enable_wal(self):
+    """Switch the database to WAL journaling, which it keeps from then on.
+
+    Readers then work from a snapshot and never block writers, so a
+    group export streaming to a slow client doesn't lock out submissions.
+    Done on the first connect rather than when the app is built, so
+    importing the app doesn't create or convert words.db.
+    """
+    connection = sqlite3.connect(self.database)
+    try:
+      connection.execute('PRAGMA journal_mode=WAL')
+    finally:
+      connection.close()
+    self.wal_enabled = True
 
   def get(self):
     if 'db' not in g:
-      g.db = sqlite3.connect(self.database)
-      g.db.row_factory = sqlite3.Row  # Return rows as dictionaries
+      g.db = self.connect()
     return g.db
 
   def commit(self):
     self.get().commit()
 
+  def rollback(self):
+    self.get().rollback()
+
   def cursor(self):
     # Ensure the connection is valid before getting a cursor
     connection = self.get()
@@ -41,7 +71,7 @@ class Db:
     cursor.execute(self.sql('setup/create_table_words.sql'))
     self.get().commit()
 
-    cursor.execute(self.sql('setup/create_table_word_reviews.sql'))
+    cursor.executescript(self.sql('setup/create_table_word_reviews.sql'))
     self.get().commit()
 
     cursor.execute(self.sql('setup/create_table_word_review_items.sql'))
@@ -59,6 +89,28 @@ class Db:
     cursor.execute(self.sql('setup/create_table_study_sessions.sql'))
     self.get().commit()
 
+    # Index files hold several statements
+    cursor.executescript(self.sql('setup/create_indexes_study_sessions.sql'))
+    self.get().commit()
+
+    cursor.executescript(self.sql('setup/create_table_word_schedules.sql'))
+    self.get().commit()
+
+    cursor.executescript(self.sql('setup/create_words_search.sql'))
+    self.get().commit()
+
+    cursor.executescript(self.sql('setup/create_triggers_word_groups.sql'))
+    self.get().commit()
+
+    cursor.executescript(self.sql('setup/create_table_counters.sql'))
+    self.get().commit()
+
+    cursor.execute(self.sql('setup/create_table_review_queue_state.sql'))
+    self.get().commit()
+
+    # The setup files already include every migration's changes
+    mark_all_applied(self.get())
+
   def import_study_activities_json(self,cursor,data_json_path):
     study_actvities = self.load_json(data_json_path)
     for activity in study_actvities:
@@ -84,8 +136,9 @@ class Db:
       for word in words:
         # Insert the word into the words table
         cursor.execute('''
-          INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)
-        ''', (word['kanji'], word['romaji'], word['english'], json.dumps(word['parts'])))
+          INSERT INTO words (kanji, romaji, english, parts, reading_kana, reading_hepburn, reading_kunrei)
+          VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (word['kanji'], word['romaji'], word['english'], json.dumps(word['parts']), *readings(word['romaji'])))
         
         # Get the last inserted word's ID
         word_id = cursor.lastrowid
@@ -94,17 +147,7 @@ class Db:
         cursor.execute('''
           INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)
         ''', (word_id, core_verbs_group_id))
-      self.get().commit()
-
-      # Update the words_count in the groups table by counting all words in the group
-      cursor.execute('''
-        UPDATE groups
-        SET words_count = (
-          SELECT COUNT(*) FROM word_groups WHERE group_id = ?
-        )
-        WHERE id = ?
-      ''', (core_verbs_group_id, core_verbs_group_id))
-
+      # words_count is kept up to date by the word_groups triggers
       self.get().commit()
 
       print(f"Successfully added {len(words)} verbs to the '{group_name}' group.")
@@ -0,0 +1,145 @@
+import unicodedata
+from functools import lru_cache
+
+# Hiragana and their Hepburn and Kunrei-shiki spellings. Digraphs come before
+# their first kana so the longest match wins when converting kana to romaji
+KANA_ROMAJI = [
+  ('きゃ', 'kya', 'kya'), ('きゅ', 'kyu', 'kyu'), ('きょ', 'kyo', 'kyo'),
+  ('しゃ', 'sha', 'sya'), ('しゅ', 'shu', 'syu'), ('しぇ', 'she', 'sye'), ('しょ', 'sho', 'syo'),
+  ('ちゃ', 'cha', 'tya'), ('ちゅ', 'chu', 'tyu'), ('ちぇ', 'che', 'tye'), ('ちょ', 'cho', 'tyo'),
+  ('にゃ', 'nya', 'nya'), ('にゅ', 'nyu', 'nyu'), ('にょ', 'nyo', 'nyo'),
+  ('ひゃ', 'hya', 'hya'), ('ひゅ', 'hyu', 'hyu'), ('ひょ', 'hyo', 'hyo'),
+  ('みゃ', 'mya', 'mya'), ('みゅ', 'myu', 'myu'), ('みょ', 'myo', 'myo'),
+  ('りゃ', 'rya', 'rya'), ('りゅ', 'ryu', 'ryu'), ('りょ', 'ryo', 'ryo'),
+  ('ぎゃ', 'gya', 'gya'), ('ぎゅ', 'gyu', 'gyu'), ('ぎょ', 'gyo', 'gyo'),
+  ('じゃ', 'ja', 'zya'), ('じゅ', 'ju', 'zyu'), ('じぇ', 'je', 'zye'), ('じょ', 'jo', 'zyo'),
+  ('びゃ', 'bya', 'bya'), ('びゅ', 'byu', 'byu'), ('びょ', 'byo', 'byo'),
+  ('ぴゃ', 'pya', 'pya'), ('ぴゅ', 'pyu', 'pyu'), ('ぴょ', 'pyo', 'pyo'),
+  ('ふぁ', 'fa', 'fa'), ('ふぃ', 'fi', 'fi'), ('ふぇ', 'fe', 'fe'), ('ふぉ', 'fo', 'fo'),
+  ('てぃ', 'ti', 'ti'), ('でぃ', 'di', 'di'), ('とぅ', 'tu', 'tu'), ('どぅ', 'du', 'du'),
+  ('うぃ', 'wi', 'wi'), ('うぇ', 'we', 'we'), ('うぉ', 'wo', 'wo'),
+  ('ゔぁ', 'va', 'va'), ('ゔぃ', 'vi', 'vi'), ('ゔぇ', 've', 've'), ('ゔぉ', 'vo', 'vo'),
+  ('あ', 'a', 'a'), ('い', 'i', 'i'), ('う', 'u', 'u'), ('え', 'e', 'e'), ('お', 'o', 'o'),
+  ('か', 'ka', 'ka'), ('き', 'ki', 'ki'), ('く', 'ku', 'ku'), ('け', 'ke', 'ke'), ('こ', 'ko', 'ko'),
+  ('さ', 'sa', 'sa'), ('し', 'shi', 'si'), ('す', 'su', 'su'), ('せ', 'se', 'se'), ('そ', 'so', 'so'),
+  ('た', 'ta', 'ta'), ('ち', 'chi', 'ti'), ('つ', 'tsu', 'tu'), ('て', 'te', 'te'), ('と', 'to', 'to'),
+  ('な', 'na', 'na'), ('に', 'ni', 'ni'), ('ぬ', 'nu', 'nu'), ('ね', 'ne', 'ne'), ('の', 'no', 'no'),
+  ('は', 'ha', 'ha'), ('ひ', 'hi', 'hi'), ('ふ', 'fu', 'hu'), ('へ', 'he', 'he'), ('ほ', 'ho', 'ho'),
+  ('ま', 'ma', 'ma'), ('み', 'mi', 'mi'), ('む', 'mu', 'mu'), ('め', 'me', 'me'), ('も', 'mo', 'mo'),
+  ('や', 'ya', 'ya'), ('ゆ', 'yu', 'yu'), ('よ', 'yo', 'yo'),
+  ('ら', 'ra', 'ra'), ('り', 'ri', 'ri'), ('る', 'ru', 'ru'), ('れ', 're', 're'), ('ろ', 'ro', 'ro'),
+  ('わ', 'wa', 'wa'), ('を', 'o', 'o'),
+  ('が', 'ga', 'ga'), ('ぎ', 'gi', 'gi'), ('ぐ', 'gu', 'gu'), ('げ', 'ge', 'ge'), ('ご', 'go', 'go'),
+  ('ざ', 'za', 'za'), ('じ', 'ji', 'zi'), ('ず', 'zu', 'zu'), ('ぜ', 'ze', 'ze'), ('ぞ', 'zo', 'zo'),
+  ('だ', 'da', 'da'), ('で', 'de', 'de'), ('ど', 'do', 'do'),
+  ('ば', 'ba', 'ba'), ('び', 'bi', 'bi'), ('ぶ', 'bu', 'bu'), ('べ', 'be', 'be'), ('ぼ', 'bo', 'bo'),
+  ('ぱ', 'pa', 'pa'), ('ぴ', 'pi', 'pi'), ('ぷ', 'pu', 'pu'), ('ぺ', 'pe', 'pe'), ('ぽ', 'po', 'po'),
+  ('ゔ', 'vu', 'vu'), ('ー', '-', '-'),
+]
+
+# Spellings typed that aren't in KANA_ROMAJI: Nihon-shiki, wapuro and small kana
+EXTRA_ROMAJI = {
+  'wo': 'を', 'dya': 'ぢゃ', 'dyu': 'ぢゅ', 'dyo': 'ぢょ', 'jya': 'じゃ', 'jyu': 'じゅ', 'jyo': 'じょ',
+  'cya': 'ちゃ', 'cyu': 'ちゅ', 'cyo': 'ちょ', 'tsa': 'つぁ', 'ye': 'いぇ', 'xtu': 'っ', 'ltu': 'っ',
+  'xa': 'ぁ', 'xi': 'ぃ', 'xu': 'ぅ', 'xe': 'ぇ', 'xo': 'ぉ', 'xya': 'ゃ', 'xyu': 'ゅ', 'xyo': 'ょ',
+  'la': 'ぁ', 'li': 'ぃ', 'lu': 'ぅ', 'le': 'ぇ', 'lo': 'ぉ', 'lya': 'ゃ', 'lyu': 'ゅ', 'lyo': 'ょ',
+}
+
+# を is spelled o but typed wo, so o stays お
+ROMAJI_KANA = {**{kunrei: kana for kana, _, kunrei in KANA_ROMAJI if kana != 'を'},
+               **{hepburn: kana for kana, hepburn, _ in KANA_ROMAJI if kana != 'を'}, **EXTRA_ROMAJI}
+# ti, di, tu and du are ち, ぢ, つ and づ in Kunrei-shiki, which typed answers use far more
+ROMAJI_KANA.update({'ti': 'ち', 'di': 'ぢ', 'tu': 'つ', 'du': 'づ'})
+LONGEST_ROMAJI = max(map(len, ROMAJI_KANA))
+
+KANA_HEPBURN = {kana: hepburn for kana, hepburn, _ in KANA_ROMAJI}
+KANA_KUNREI = {kana: kunrei for kana, _, kunrei in KANA_ROMAJI}
+# ぢ and づ are read like じ and ず, and reading keys fold them together
+KANA_HEPBURN.update({'ぢ': 'ji', 'づ': 'zu'})
+KANA_KUNREI.update({'ぢ': 'zi', 'づ': 'zu'})
+
+# Hepburn (macron) and Kunrei (circumflex) long vowels
+LONG_VOWELS = str.maketrans({'ā': 'aa', 'ī': 'ii', 'ū': 'uu', 'ē': 'ee', 'ō': 'ou',
+                             'â': 'aa', 'î': 'ii', 'û': 'uu', 'ê': 'ee', 'ô': 'ou'})
+# Spellings that differ only in kana that sound the same
+READING_FOLDS = str.maketrans({'ぢ': 'じ', 'づ': 'ず', 'ゐ': 'い', 'ゑ': 'え'})
+VOWELS = 'aeiou'
+
+def katakana_to_hiragana(text):
+  return ''.join(chr(ord(char) - 0x60) if 'ァ' <= char <= 'ヶ' else char for char in text)
+
+def romaji_to_hiragana(text):
+  """Hiragana for Hepburn, Kunrei-shiki or wapuro romaji; other characters are kept"""
+  text = text.lower().translate(LONG_VOWELS)
+  kana = []
+  i = 0
+  while i < len(text):
+    char = text[i]
+    following = text[i + 1:i + 2]
+    if char == 'n' and following not in VOWELS + 'y' or char == 'n' and following == '':
+      # ん, written n, n' or nn; a doubled n before a vowel is ん followed by na-ni-nu-ne-no
+      kana.append('ん')
+      i += 1
+      after = text[i + 1:i + 2]
+      if following == "'" or following == 'n' and (after == '' or after not in VOWELS + 'y'):
+        i += 1
+      continue
+    if char == 'm' and following and following in 'bpm':
+      # Traditional Hepburn writes ん as m before b, p and m
+      kana.append('ん')
+      i += 1
+      continue
+    if char == following and char not in VOWELS or char == 't' and following == 'c':
+      # Doubled consonants, and Hepburn's tch, are っ
+      kana.append('っ')
+      i += 1
+      continue
+    for length in range(LONGEST_ROMAJI, 0, -1):
+      syllable = text[i:i + length]
+      if syllable in ROMAJI_KANA:
+        kana.append(ROMAJI_KANA[syllable])
+        i += length
+        break
+    else:
+      kana.append(char)
+      i += 1
+  return ''.join(kana)
+
+# Answers repeat a lot across sessions, so their keys are cached
+@lru_cache(maxsize=65536)
+def reading_key(text):
+  """The hiragana an answer typed in romaji, hiragana or katakana is compared by.
+
+  Full-width letters, case and spaces are ignored, katakana is
+  folded to hiragana and kana that are pronounced the same are folded together,
+  so 'shinbun', 'shimbun', 'SINBUN', 'しんぶん' and 'シンブン' all give the
+  same key.
+  """
+  text = unicodedata.normalize('NFKC', text).strip().lower()
+  text = ''.join(char for char in text if not char.isspace())
+  return romaji_to_hiragana(katakana_to_hiragana(text)).translate(READING_FOLDS)
+
+def hiragana_to_romaji(text, table):
+  romaji = []
+  i = 0
+  while i < len(text):
+    if text[i] == 'っ' and i + 1 < len(text):
+      # Double the next consonant; Hepburn writes っち as tchi
+      following = hiragana_to_romaji(text[i + 1:i + 3], table)
+      romaji.append('t' if following.startswith('ch') else following[:1])
+      i += 1
+      continue
+    kana = text[i:i + 2] if text[i:i + 2] in table else text[i]
+    spelling = table.get(kana, kana)
+    if kana == 'ん' and text[i + 1:i + 2] and table.get(text[i + 1], 'x')[0] in VOWELS + 'y':
+      spelling = "n'"
+    elif kana == 'ん':
+      spelling = 'n'
+    romaji.append(spelling)
+    i += len(kana)
+  return ''.join(romaji)
+
+def readings(romaji):
+  """(reading_kana, reading_hepburn, reading_kunrei) stored for a word's romaji"""
+  kana = reading_key(romaji)
+  return kana, hiragana_to_romaji(kana, KANA_HEPBURN), hiragana_to_romaji(kana, KANA_KUNREI)
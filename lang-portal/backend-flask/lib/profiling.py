@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_app_context, request
+
+# Statements at least this slow are logged with their query plan
+SLOW_QUERY_MS = 50
+# Upper bounds, in ms, of the request latency histogram buckets; the last one is open
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+slow_query_log = logging.getLogger('lang_portal.slow_queries')
+
+class ProfilingCursor(sqlite3.Cursor):
+  """A cursor that times its statements into g.sql_queries.
+
+  Time spent in fetchone/fetchmany/fetchall is added to the statement
+  that produced the rows; rows read by iterating the cursor are not timed.
+  """
+  entry = None
+
+  def record(self, sql, parameters, start):
+    self.entry = {"sql": sql, "parameters": parameters, "ms": (time.perf_counter() - start) * 1000}
+    # Connections used outside a request, like the review flusher's, aren't recorded
+    if has_app_context():
+      g.setdefault('sql_queries', []).append(self.entry)
+
+  def fetched(self, start):
+    if self.entry is not None:
+      self.entry["ms"] += (time.perf_counter() - start) * 1000
+
+  def execute(self, sql, parameters=()):
+    start = time.perf_counter()
+    try:
+      return super().execute(sql, parameters)
+    finally:
+      self.record(sql, parameters, start)
+
+  def executemany(self, sql, seq_of_parameters):
+    # Materialized so the first row's parameters can be explained later
+    seq_of_parameters = list(seq_of_parameters)
+    start = time.perf_counter()
+    try:
+      return super().executemany(sql, seq_of_parameters)
+    finally:
+      self.record(sql, seq_of_parameters[0] if seq_of_parameters else (), start)
+
+  def executescript(self, sql_script):
+    start = time.perf_counter()
+    try:
+      return super().executescript(sql_script)
+    finally:
+      self.record(sql_script, None, start)
+
+  def fetchone(self):
+    start = time.perf_counter()
+    try:
+      return super().fetchone()
+    finally:
+      self.fetched(start)
+
+  def fetchmany(self, *args):
+    start = time.perf_counter()
+    try:
+      return super().fetchmany(*args)
+    finally:
+      self.fetched(start)
+
+  def fetchall(self):
+    start = time.perf_counter()
+    try:
+      return super().fetchall()
+    finally:
+      self.fetched(start)
+
+class ProfilingConnection(sqlite3.Connection):
+  """A connection whose cursors, including those behind its execute shortcuts, are ProfilingCursors"""
+  def cursor(self, factory=ProfilingCursor):
+    return super().cursor(factory)
+
+  def execute(self, sql, parameters=()):
+    return self.cursor().execute(sql, parameters)
+
+  def executemany(self, sql, seq_of_parameters):
+    return self.cursor().executemany(sql, seq_of_parameters)
+
+  def executescript(self, sql_script):
+    return self.cursor().executescript(sql_script)
+
+def explain(database, sql, parameters):
+  """EXPLAIN QUERY PLAN of a statement as a list of plan lines, or None if it can't be explained"""
+  if parameters is None:
+    return None  # A script
+  # A connection of its own: routes may have closed theirs, and this one isn't profiled
+  conn = sqlite3.connect(database)
+  try:
+    return [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, parameters)]
+  except sqlite3.Error:
+    return None
+  finally:
+    conn.close()
+
+class RouteMetrics:
+  """Request latency histograms and SQL totals per route, shared by all request threads"""
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.routes = {}
+
+  def observe(self, route, ms, queries, sql_ms):
+    with self.lock:
+      metrics = self.routes.get(route)
+      if metrics is None:
+        metrics = self.routes[route] = {
+          "count": 0, "total_ms": 0.0, "max_ms": 0.0, "queries": 0, "sql_ms": 0.0,
+          "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        }
+      metrics["count"] += 1
+      metrics["total_ms"] += ms
+      metrics["max_ms"] = max(metrics["max_ms"], ms)
+      metrics["queries"] += queries
+      metrics["sql_ms"] += sql_ms
+      metrics["buckets"][bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+
+  def snapshot(self):
+    with self.lock:
+      return {route: {
+        "count": metrics["count"],
+        "mean_ms": round(metrics["total_ms"] / metrics["count"], 3),
+        "max_ms": round(metrics["max_ms"], 3),
+        "queries_per_request": round(metrics["queries"] / metrics["count"], 2),
+        "sql_ms_per_request": round(metrics["sql_ms"] / metrics["count"], 3),
+        # [bound, requests that took at most bound ms], cumulative; "+Inf" counts them all
+        "histogram_ms": [
+          [bound, sum(metrics["buckets"][:i + 1])]
+          for i, bound in enumerate(LATENCY_BUCKETS_MS + ['+Inf'])
+        ]
+      } for route, metrics in sorted(self.routes.items())}
+
+def install(app):
+  """Time every request and its statements; app.db must hand out ProfilingConnections.
+
+  Each response gets an X-SQL summary and a Server-Timing entry, and
+  app.metrics collects the per-route numbers /debug/metrics reports.
+  Statements slower than SLOW_QUERY_MS are logged as one JSON object per
+  line with their query plan, to SLOW_QUERY_LOG if set and stderr if not.
+  """
+  app.metrics = RouteMetrics()
+  slow_query_ms = app.config.get('SLOW_QUERY_MS', SLOW_QUERY_MS)
+  log_path = app.config.get('SLOW_QUERY_LOG')
+  # The logger is shared by every app in the process, so each file is attached once
+  if log_path and not any(getattr(handler, 'baseFilename', None) == os.path.abspath(log_path)
+                          for handler in slow_query_log.handlers):
+    handler = logging.FileHandler(log_path, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    slow_query_log.addHandler(handler)
+
+  @app.before_request
+  def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.sql_queries = []
+
+  @app.after_request
+  def summarize_request(response):
+    if 'request_started' not in g:
+      return response  # An earlier before_request handler answered
+    ms = (time.perf_counter() - g.request_started) * 1000
+    queries = g.get('sql_queries', [])
+    sql_ms = sum(query["ms"] for query in queries)
+    response.headers['X-SQL'] = f'{len(queries)} queries; {sql_ms:.2f}ms'
+    response.headers['Server-Timing'] = f'sql;dur={sql_ms:.2f};desc="{len(queries)} queries", app;dur={ms:.2f}'
+
+    route = f'{request.method} {request.url_rule.rule}' if request.url_rule else f'{request.method} <unmatched>'
+    app.metrics.observe(route, ms, len(queries), sql_ms)
+
+    for query in queries:
+      if query["ms"] >= slow_query_ms:
+        slow_query_log.warning(json.dumps({
+          "route": route,
+          "path": request.full_path.rstrip('?'),
+          "ms": round(query["ms"], 3),
+          "sql": ' '.join(query["sql"].split()),
+          "parameters": query["parameters"],
+          "plan": explain(app.db.database, query["sql"], query["parameters"])
+        }, default=str, ensure_ascii=False))
+    return response
@@ -0,0 +1,215 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime
+
+from lib import reviews
+
+# Submissions applied per flush transaction, at most
+FLUSH_BATCH = 1000
+# Seconds the flusher waits for new submissions when the queue is empty
+FLUSH_INTERVAL = 0.05
+
+QUEUE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS queue_identity (
+  name TEXT NOT NULL  -- Random, so review_queue_state in words.db can tell queue files apart
+);
+
+CREATE TABLE IF NOT EXISTS review_queue (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  study_session_id INTEGER NOT NULL,
+  group_id INTEGER,
+  reviews TEXT NOT NULL,  -- JSON [[word_id, correct, response], ...]
+  queued_at REAL NOT NULL  -- Unix time the submission was acknowledged
+);
+'''
+
+def queue_path(database):
+  """The queue file kept next to a database: words.db queues to words-review-queue.db"""
+  return os.path.splitext(database)[0] + '-review-queue.db'
+
+class ReviewQueue:
+  """Write-behind buffer for review submissions.
+
+  enqueue() appends a submission to a SQLite file of its own, in WAL mode,
+  so a submit is acknowledged after a small durable insert that never
+  waits on words.db. Submissions that arrive while another is committing
+  are committed together, so concurrent submits share one fsync. A
+  flusher thread applies queued submissions to words.db in large
+  transactions with lib.reviews.apply_reviews.
+
+  Each flush also records the last queue id it applied in
+  review_queue_state, in the same transaction, and only then deletes the
+  applied rows from the queue. After a crash, whatever is left above that
+  id is applied on the next flush and nothing is applied twice.
+  """
+  def __init__(self, path, connect):
+    self.path = path
+    self.connect = connect  # Opens a connection to words.db
+    self.stopping = threading.Event()
+    self.wakeup = threading.Event()
+    self.thread = None
+    self.lock = threading.Lock()  # One flush at a time per process
+    self.pending = []  # [row, error] of submissions waiting for a queue commit
+    self.pending_lock = threading.Lock()
+    self.commit_lock = threading.Lock()
+    self.flushed_batches = 0
+    self.flushed_submissions = 0
+    self.last_flush_ms = None
+    self.max_lag_seconds = 0.0
+
+    # Kept open for enqueues: closing the last connection to a WAL file checkpoints it
+    self.queue = self.open(check_same_thread=False)
+    self.queue.execute('PRAGMA journal_mode=WAL')
+    self.queue.executescript(QUEUE_SCHEMA)
+    if not self.queue.execute('SELECT name FROM queue_identity').fetchone():
+      self.queue.execute('INSERT INTO queue_identity (name) VALUES (?)', (uuid.uuid4().hex,))
+      self.queue.commit()
+    self.name = self.queue.execute('SELECT name FROM queue_identity').fetchone()[0]
+
+  def open(self, **kwargs):
+    return sqlite3.connect(self.path, timeout=30, **kwargs)
+
+  def enqueue(self, session_id, group_id, review_items):
+    """Durably queue one submission of (word_id, correct, response) reviews"""
+    entry = [(session_id, group_id, json.dumps(review_items), time.time()), None]
+    with self.pending_lock:
+      self.pending.append(entry)
+    with self.commit_lock:
+      # Whoever gets here first commits everything pending, this entry included
+      # unless an earlier committer already took it
+      with self.pending_lock:
+        batch, self.pending = self.pending, []
+      if batch:
+        try:
+          with self.queue:
+            self.queue.executemany('''
+              INSERT INTO review_queue (study_session_id, group_id, reviews, queued_at)
+              VALUES (?, ?, ?, ?)
+            ''', [row for row, _ in batch])
+        except Exception as e:
+          for pending in batch:
+            pending[1] = e
+    if entry[1] is not None:
+      raise entry[1]
+    self.wakeup.set()
+
+  def applied_id(self, conn):
+    row = conn.execute('SELECT applied_id FROM review_queue_state WHERE queue = ?', (self.name,)).fetchone()
+    return row[0] if row else 0
+
+  def flush(self, limit=FLUSH_BATCH):
+    """Apply up to limit queued submissions in one words.db transaction; returns how many"""
+    with self.lock:
+      conn = self.connect()
+      queue = self.open()
+      try:
+        # An idle flusher shouldn't take the words.db write lock
+        if not queue.execute('SELECT EXISTS (SELECT 1 FROM review_queue)').fetchone()[0]:
+          return 0
+        start = time.perf_counter()
+        # Taking the write lock first means no other flusher can apply the same rows
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+          applied_id = self.applied_id(conn)
+          rows = queue.execute('''
+            SELECT id, study_session_id, group_id, reviews, queued_at
+            FROM review_queue
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+          ''', (applied_id, limit)).fetchall()
+          if rows:
+            # Sessions deleted while their reviews were queued are dropped
+            live_sessions = {row[0] for row in conn.execute(
+              'SELECT id FROM study_sessions WHERE id IN (SELECT value FROM json_each(?))',
+              (json.dumps(list({row[1] for row in rows})),)
+            )}
+            reviews.apply_reviews(conn.cursor(), [
+              (session_id, group_id, json.loads(review_items), datetime.utcfromtimestamp(queued_at))
+              for _, session_id, group_id, review_items, queued_at in rows
+              if session_id in live_sessions
+            ])
+            applied_id = rows[-1][0]
+            conn.execute('''
+              INSERT INTO review_queue_state (queue, applied_id) VALUES (?, ?)
+              ON CONFLICT (queue) DO UPDATE SET applied_id = excluded.applied_id
+            ''', (self.name, applied_id))
+          conn.commit()
+        except BaseException:
+          conn.rollback()
+          raise
+
+        # A crash before this delete leaves rows that the next flush skips
+        with queue:
+          queue.execute('DELETE FROM review_queue WHERE id <= ?', (applied_id,))
+
+        if rows:
+          self.flushed_batches += 1
+          self.flushed_submissions += len(rows)
+          self.last_flush_ms = (time.perf_counter() - start) * 1000
+          self.max_lag_seconds = max(self.max_lag_seconds, time.time() - rows[0][4])
+        return len(rows)
+      finally:
+        queue.close()
+        conn.close()
+
+  def drain(self):
+    """Flush until the queue is empty; returns how many submissions were applied"""
+    total = 0
+    while True:
+      flushed = self.flush()
+      total += flushed
+      if not flushed:
+        return total
+
+  def stats(self):
+    """Queue depth and flush lag, the age of the oldest submission not yet applied"""
+    conn = self.connect()
+    queue = self.open()
+    try:
+      pending, oldest = queue.execute(
+        'SELECT COUNT(*), MIN(queued_at) FROM review_queue WHERE id > ?', (self.applied_id(conn),)
+      ).fetchone()
+    finally:
+      queue.close()
+      conn.close()
+    return {
+      "pending": pending,
+      "lag_seconds": round(time.time() - oldest, 3) if oldest else 0,
+      "max_lag_seconds": round(self.max_lag_seconds, 3),
+      "flushed_batches": self.flushed_batches,
+      "flushed_submissions": self.flushed_submissions,
+      "last_flush_ms": round(self.last_flush_ms, 2) if self.last_flush_ms is not None else None
+    }
+
+  def start(self):
+    """Start the background flusher, which first replays anything left by an earlier process"""
+    if self.thread is None:
+      self.thread = threading.Thread(target=self.run, name='review-queue-flusher', daemon=True)
+      self.thread.start()
+
+  def stop(self):
+    self.stopping.set()
+    self.wakeup.set()
+    if self.thread is not None:
+      self.thread.join()
+      self.thread = None
+    self.queue.close()
+
+  def run(self):
+    while not self.stopping.is_set():
+      # Cleared before flushing, so a submission queued meanwhile flushes straight after
+      self.wakeup.clear()
+      try:
+        flushed = self.flush()
+      except Exception:
+        # words.db busy for longer than the timeout, or similar; the rows stay queued
+        traceback.print_exc()
+        flushed = 0
+      if flushed < FLUSH_BATCH:
+        self.wakeup.wait(FLUSH_INTERVAL)
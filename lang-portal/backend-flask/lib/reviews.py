@@ -0,0 +1,63 @@
+import json
+from collections import defaultdict
+
+from lib import scheduler
+
+def missing_words(cursor, word_ids):
+  """The ids in word_ids that aren't in words, looked up in one query"""
+  cursor.execute('''
+    SELECT value FROM json_each(?)
+    WHERE NOT EXISTS (SELECT 1 FROM words WHERE id = value)
+  ''', (json.dumps(list(dict.fromkeys(word_ids))),))
+  return [row[0] for row in cursor.fetchall()]
+
+def apply_reviews(cursor, submissions):
+  """Record submitted reviews and everything derived from them, without committing.
+
+  submissions is a list of (session_id, group_id, reviews, reviewed_at),
+  reviews a list of (word_id, correct, response) in answer order. A batch
+  of submissions costs a handful of statements: the review items, the
+  session rollups, the word_reviews counts and the schedules of each group.
+  """
+  items = []
+  sessions = defaultdict(lambda: [0, None])  # session_id -> [review count, latest reviewed_at]
+  groups = defaultdict(lambda: [[], None])  # group_id -> [[(word_id, correct)], latest reviewed_at]
+  counts = defaultdict(lambda: [0, 0, None])  # word_id -> [correct, wrong, latest reviewed_at]
+  for session_id, group_id, reviews, reviewed_at in submissions:
+    reviewed = reviewed_at.strftime(scheduler.SQLITE_DATETIME)
+    sessions[session_id][0] += len(reviews)
+    sessions[session_id][1] = max(sessions[session_id][1] or reviewed, reviewed)
+    if group_id is not None:
+      groups[group_id][0].extend((word_id, correct) for word_id, correct, _ in reviews)
+      groups[group_id][1] = max(groups[group_id][1] or reviewed_at, reviewed_at)
+    for word_id, correct, response in reviews:
+      items.append((session_id, word_id, 1 if correct else 0, response, reviewed))
+      counts[word_id][0 if correct else 1] += 1
+      counts[word_id][2] = max(counts[word_id][2] or reviewed, reviewed)
+
+  cursor.executemany('''
+    INSERT INTO word_review_items (study_session_id, word_id, correct, response, created_at)
+    VALUES (?, ?, ?, ?, ?)
+  ''', items)
+
+  # Keep the session rollups in step with its review items
+  cursor.executemany('''
+    UPDATE study_sessions
+    SET review_count = review_count + ?,
+        last_activity_at = ?
+    WHERE id = ?
+  ''', [(count, reviewed, session_id) for session_id, (count, reviewed) in sessions.items()])
+
+  # Reschedule the reviewed words within each group; a batch is timed by its
+  # latest review, which only moves due dates by the time the batch spans
+  for group_id, (group_reviews, reviewed_at) in groups.items():
+    scheduler.apply_reviews(cursor, group_id, group_reviews, reviewed_at)
+
+  cursor.executemany('''
+    INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (word_id) DO UPDATE SET
+      correct_count = correct_count + excluded.correct_count,
+      wrong_count = wrong_count + excluded.wrong_count,
+      last_reviewed = excluded.last_reviewed
+  ''', [(word_id, correct, wrong, reviewed) for word_id, (correct, wrong, reviewed) in counts.items()])
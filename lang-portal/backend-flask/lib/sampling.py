@@ -0,0 +1,66 @@
+import heapq
+import random
+
+# Rounds of candidate draws before weighted sampling fills the rest of the sample directly
+MAX_ROUNDS = 20
+# Candidates fetched per round, at most
+MAX_BATCH = 10000
+
+def make_rng(seed=None):
+  """A seeded generator and its seed; a missing seed is picked so the sample can be repeated"""
+  if seed is None:
+    seed = random.SystemRandom().randrange(2 ** 32)
+  return random.Random(seed), seed
+
+def uniform_positions(rng, count, n):
+  """n distinct positions out of range(count), in sample order"""
+  return rng.sample(range(count), min(n, count))
+
+def error_weight(correct_count, wrong_count):
+  """Share of wrong answers, smoothed so unreviewed words weigh 0.5 and no word weighs 0"""
+  return (wrong_count + 1) / (correct_count + wrong_count + 2)
+
+def weighted_positions(rng, count, n, fetch, weight):
+  """n distinct positions drawn in proportion to weight, by rejection.
+
+  Candidates are drawn uniformly in batches; fetch(positions) returns
+  {position: row} for a batch in one query, and a candidate is kept with
+  probability weight(row), which must be in (0, 1]. Skipping candidates
+  already kept makes this successive sampling without replacement.
+  When the rounds run out first (n close to count, or low weights), the
+  rest is drawn from all positions not yet chosen, by exponential keys,
+  which is the same sampling done in one pass.
+  Returns [(position, row)] in sample order.
+  """
+  chosen = {}
+  drawn, accepted = 0, 0
+  for _ in range(MAX_ROUNDS):
+    remaining = n - len(chosen)
+    if remaining <= 0:
+      break
+    # Draw enough candidates for the acceptance rate seen so far
+    rate = accepted / drawn if accepted else 0.5
+    batch = [rng.randrange(count) for _ in range(min(int(remaining / rate * 1.2) + 1, MAX_BATCH))]
+    rows = fetch(sorted(set(batch) - chosen.keys()))
+    for position in batch:
+      if position in chosen or position not in rows:
+        continue
+      drawn += 1
+      if rng.random() < weight(rows[position]):
+        accepted += 1
+        chosen[position] = rows[position]
+        if len(chosen) == n:
+          break
+  if len(chosen) < n:
+    chosen.update(_weighted_fill(rng, count, n - len(chosen), fetch, weight, chosen))
+  return list(chosen.items())
+
+def _weighted_fill(rng, count, n, fetch, weight, chosen):
+  """n more positions out of those not in chosen, weighted, as [(position, row)] in sample order"""
+  keyed = []
+  rest = [position for position in range(count) if position not in chosen]
+  for start in range(0, len(rest), MAX_BATCH):
+    rows = fetch(rest[start:start + MAX_BATCH])
+    # Largest u ** (1 / w) first is sampling without replacement in proportion to w
+    keyed += [(rng.random() ** (1 / weight(row)), position, row) for position, row in sorted(rows.items())]
+  return [(position, row) for _, position, row in heapq.nlargest(n, keyed, key=lambda item: item[0])]
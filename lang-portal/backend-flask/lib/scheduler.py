@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+# SM-2 parameters; new words start at the ease in create_table_word_schedules.sql
+MIN_EASE = 1.3
+# Intervals stop growing here, well before a due date would overflow
+MAX_INTERVAL_DAYS = 36500
+# Answer quality (0-5) recorded for right and wrong answers, which is all the activities report
+CORRECT_QUALITY = 4
+WRONG_QUALITY = 1
+
+SQLITE_DATETIME = '%Y-%m-%d %H:%M:%S'
+
+def sm2(repetitions, interval_days, ease, quality):
+  """One SM-2 step: the (repetitions, interval_days, ease) after an answer of the given quality"""
+  if quality < 3:
+    # A lapse restarts the word's repetitions but keeps what was learnt about its ease
+    repetitions = 0
+    interval_days = 1
+  else:
+    repetitions += 1
+    if repetitions == 1:
+      interval_days = 1
+    elif repetitions == 2:
+      interval_days = 6
+    else:
+      interval_days = min(round(interval_days * ease), MAX_INTERVAL_DAYS)
+  ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+  return repetitions, interval_days, ease
+
+def apply_reviews(cursor, group_id, reviews, reviewed_at=None):
+  """Advance the schedules of the reviewed words in a group.
+
+  reviews is a list of (word_id, correct) in answer order. Each word takes
+  one SM-2 step, graded by its worst answer, so answering it again in the
+  same session doesn't push it further out. A right answer to a word that
+  isn't due yet leaves its schedule alone; a wrong one is a lapse whenever
+  it happens. Only the rows of the reviewed words are read and written, so
+  the cost doesn't grow with the review history.
+  """
+  if not reviews:
+    return
+  reviewed_at = reviewed_at or datetime.utcnow()
+  reviewed = reviewed_at.strftime(SQLITE_DATETIME)
+  qualities = {}
+  for word_id, correct in reviews:
+    quality = CORRECT_QUALITY if correct else WRONG_QUALITY
+    qualities[word_id] = min(qualities.get(word_id, quality), quality)
+  word_ids = sorted(qualities)
+
+  placeholders = ','.join('?' * len(word_ids))
+  cursor.execute(f'''
+    SELECT word_id, repetitions, interval_days, ease, due_at
+    FROM word_schedules
+    WHERE group_id = ? AND word_id IN ({placeholders})
+  ''', (group_id, *word_ids))
+
+  # Words that aren't in the group have no schedule there
+  states = {}
+  for word_id, repetitions, interval_days, ease, due_at in cursor.fetchall():
+    quality = qualities[word_id]
+    if quality >= 3 and due_at > reviewed:
+      continue
+    states[word_id] = sm2(repetitions, interval_days, ease, quality)
+
+  cursor.executemany('''
+    UPDATE word_schedules
+    SET repetitions = ?, interval_days = ?, ease = ?, due_at = ?, last_reviewed_at = ?
+    WHERE group_id = ? AND word_id = ?
+  ''', [
+    (repetitions, interval_days, ease,
+     (reviewed_at + timedelta(days=interval_days)).strftime(SQLITE_DATETIME), reviewed,
+     group_id, word_id)
+    for word_id, (repetitions, interval_days, ease) in states.items()
+  ])
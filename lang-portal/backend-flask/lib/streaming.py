@@ -0,0 +1,53 @@
+import zlib
+
+try:
+  import brotli  # Optional; without it responses fall back to gzip
+except ImportError:
+  brotli = None
+
+# Rows fetched from the cursor, and encoded, at a time
+CHUNK_ROWS = 1000
+
+def negotiate_encoding(accept_encodings):
+  """The Content-Encoding to use for a request's werkzeug Accept-Encoding header, or None"""
+  for encoding in ('br', 'gzip'):
+    if encoding == 'br' and brotli is None:
+      continue
+    if accept_encodings[encoding]:
+      return encoding
+  return None
+
+def compress(chunks, encoding):
+  """Compress an iterable of bytes as it is produced"""
+  if encoding == 'br':
+    compressor = brotli.Compressor(quality=5)
+    for chunk in chunks:
+      # Brotli holds back output until its window fills; flush so the client gets each chunk
+      data = compressor.process(chunk) + compressor.flush()
+      if data:
+        yield data
+    yield compressor.finish()
+  elif encoding == 'gzip':
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+      data = compressor.compress(chunk)
+      if data:
+        yield data
+    yield compressor.flush()
+  else:
+    yield from chunks
+
+def row_chunks(cursor, encode, chunk_rows=CHUNK_ROWS):
+  """The cursor's remaining rows, fetchmany() at a time, each batch passed through encode"""
+  while True:
+    rows = cursor.fetchmany(chunk_rows)
+    if not rows:
+      return
+    yield encode(rows)
+
+def json_array(chunks):
+  """Join chunks of comma separated JSON values into one JSON array"""
+  yield b'['
+  for idx, chunk in enumerate(chunks):
+    yield b',' + chunk if idx else chunk
+  yield b']'
@@ -0,0 +1,141 @@
+import json
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+from lib.db import Db
+from lib.kana import KANA_ROMAJI, readings
+
+# Kana syllables words are spelled with; digraphs, を and ー are left out
+SYLLABLES = [(kana, hepburn) for kana, hepburn, _ in KANA_ROMAJI if len(kana) == 1 and kana not in 'をー']
+VERBS = ['eat', 'drink', 'go', 'come', 'see', 'hear', 'read', 'write', 'buy', 'sell', 'wait', 'open',
+         'close', 'sleep', 'swim', 'walk', 'run', 'speak', 'teach', 'learn', 'wear', 'carry', 'pay', 'meet']
+ADJECTIVES = ['big', 'small', 'new', 'old', 'hot', 'cold', 'long', 'short', 'quiet', 'busy', 'cheap',
+              'famous', 'kind', 'strong', 'bright', 'early', 'late', 'heavy', 'light', 'sweet']
+NOUNS = ['house', 'river', 'train', 'book', 'letter', 'school', 'friend', 'mountain', 'station', 'shop',
+         'flower', 'door', 'window', 'street', 'teacher', 'child', 'morning', 'evening', 'island', 'bridge']
+THEMES = ['JLPT N5', 'JLPT N4', 'JLPT N3', 'Travel', 'Food', 'Work', 'School', 'Family', 'Nature', 'City']
+
+def create_schema(path):
+  """A new database at path with every table, and the study activities from seed/"""
+  from flask import Flask
+  app = Flask(__name__)
+  database = Db(database=path)
+  with app.app_context():
+    database.setup_tables(database.cursor())
+    database.import_study_activities_json(database.cursor(), 'seed/study_activities.json')
+    database.close()
+
+def make_word(rng, i):
+  """(kanji, romaji, english, parts) of a made-up word; i keeps the words distinct"""
+  syllables = [rng.choice(SYLLABLES) for _ in range(rng.choices((2, 3, 4), (3, 4, 2))[0])]
+  # Kanji stems with the last syllable as okurigana half the time, like 食べる
+  stem_length = len(syllables) - 1 if rng.random() < 0.5 else len(syllables)
+  stem = ''.join(chr(rng.randint(0x4E00, 0x9FFF)) for _ in range(max(1, stem_length // 2)))
+  okurigana = ''.join(kana for kana, _ in syllables[stem_length:])
+  romaji = ''.join(hepburn for _, hepburn in syllables)
+  kind = rng.random()
+  if kind < 0.4:
+    english = f'to {rng.choice(VERBS)} ({i})'
+  elif kind < 0.7:
+    english = f'{rng.choice(ADJECTIVES)} ({i})'
+  else:
+    english = f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} ({i})'
+  parts = [{"kanji": stem, "romaji": [hepburn for _, hepburn in syllables[:stem_length]]}]
+  parts += [{"kanji": kana, "romaji": [hepburn]} for kana, hepburn in syllables[stem_length:]]
+  return stem + okurigana, romaji, english, json.dumps(parts, ensure_ascii=False)
+
+def generate(path, words=100_000, groups=100, sessions=20_000, reviews=20, days=365, seed=0):
+  """Fill a new database at path with synthetic study data.
+
+  Group sizes and how often each group is studied follow a Zipf-like
+  curve, a few words belong to more than one group, review counts per
+  session are exponential around reviews, and each word has its own
+  chance of being answered right, 80% on average. The same arguments
+  always give the same database. Returns the number of rows written to
+  each table.
+  """
+  rng = random.Random(seed)
+  create_schema(path)
+  conn = sqlite3.connect(path)
+  # Nothing here needs to survive a crash until the final commit
+  conn.execute('PRAGMA journal_mode = MEMORY')
+  conn.execute('PRAGMA synchronous = OFF')
+  conn.execute('PRAGMA cache_size = -262144')
+
+  activity_ids = [row[0] for row in conn.execute('SELECT id FROM study_activities')]
+  conn.executemany('INSERT INTO groups (name) VALUES (?)',
+                   ((f'{THEMES[i % len(THEMES)]} {i // len(THEMES) + 1}',) for i in range(groups)))
+  group_weights = [1 / (i + 1) ** 1.1 for i in range(groups)]
+
+  conn.executemany('''
+    INSERT INTO words (kanji, romaji, english, parts, reading_kana, reading_hepburn, reading_kunrei)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+  ''', ((*word, *readings(word[1])) for word in (make_word(rng, i) for i in range(words))))
+
+  # Every word joins one group, and three in ten join a second
+  members = [[] for _ in range(groups)]
+  for word_id in range(1, words + 1):
+    for group in set(rng.choices(range(groups), group_weights, k=2 if rng.random() < 0.3 else 1)):
+      members[group].append(word_id)
+  conn.executemany('INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)',
+                   ((word_id, group + 1) for group in range(groups) for word_id in members[group]))
+
+  # Studied groups are picked in proportion to their weight, among those with words
+  studied = [group for group in range(groups) if members[group]]
+  studied_weights = [group_weights[group] for group in studied]
+  ease = [rng.betavariate(8, 2) for _ in range(words + 1)]
+  start = datetime.utcnow() - timedelta(days=days)
+  review_items = 0
+
+  def session_rows():
+    nonlocal review_items
+    for session_id in range(1, sessions + 1):
+      group = rng.choices(studied, studied_weights)[0]
+      created_at = start + timedelta(seconds=rng.randrange(days * 86400))
+      count = max(1, int(rng.expovariate(1 / reviews))) if reviews else 0
+      items = []
+      for k in range(count):
+        word_id = rng.choice(members[group])
+        items.append((word_id, session_id, 1 if rng.random() < ease[word_id] else 0,
+                      (created_at + timedelta(seconds=10 * (k + 1))).strftime('%Y-%m-%d %H:%M:%S')))
+      review_items += count
+      yield (group + 1, rng.choice(activity_ids), created_at.strftime('%Y-%m-%d %H:%M:%S'),
+             count, items[-1][3] if items else None), items
+
+  for batch in chunked(session_rows(), 10_000):
+    conn.executemany('''
+      INSERT INTO study_sessions (group_id, study_activity_id, created_at, review_count, last_activity_at)
+      VALUES (?, ?, ?, ?, ?)
+    ''', (session for session, _ in batch))
+    conn.executemany('''
+      INSERT INTO word_review_items (word_id, study_session_id, correct, created_at)
+      VALUES (?, ?, ?, ?)
+    ''', (item for _, items in batch for item in items))
+
+  conn.execute('''
+    INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+    SELECT word_id, SUM(correct = 1), SUM(correct = 0), MAX(created_at)
+    FROM word_review_items
+    GROUP BY word_id
+  ''')
+  conn.commit()
+  conn.execute('ANALYZE')
+  conn.close()
+  return {
+    "words": words,
+    "groups": groups,
+    "word_groups": sum(map(len, members)),
+    "study_sessions": sessions,
+    "word_review_items": review_items
+  }
+
+def chunked(iterable, size):
+  batch = []
+  for item in iterable:
+    batch.append(item)
+    if len(batch) == size:
+      yield batch
+      batch = []
+  if batch:
+    yield batch
@@ -1,25 +1,62 @@
 import sqlite3
 import os
+import importlib.util
 
-def run_migrations():
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'sql', 'migrations')
+
+def migration_files():
+    return sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith(('.sql', '.py')))
+
+def ensure_migrations_table(conn):
+    # Migrations already applied to this database, so reruns only apply new ones
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name TEXT PRIMARY KEY,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def mark_all_applied(conn):
+    """Record every migration as applied; used after creating a fresh database from sql/setup"""
+    ensure_migrations_table(conn)
+    conn.executemany('INSERT OR IGNORE INTO schema_migrations (name) VALUES (?)',
+                     [(name,) for name in migration_files()])
+    conn.commit()
+
+def run_migrations(db_path=None):
     # Connect to the database
-    db_path = os.path.join(os.path.dirname(__file__), 'word_bank.db')
+    db_path = db_path or os.path.join(os.path.dirname(__file__), 'words.db')
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
-    
+
     try:
-        # Get list of migration files
-        migrations_dir = os.path.join(os.path.dirname(__file__), 'sql', 'migrations')
-        migration_files = sorted([f for f in os.listdir(migrations_dir) if f.endswith('.sql')])
-        
-        # Run each migration
-        for migration_file in migration_files:
+        ensure_migrations_table(conn)
+        applied = {row['name'] for row in conn.execute('SELECT name FROM schema_migrations')}
+
+        # Run each migration that hasn't been applied yet
+        for migration_file in migration_files():
+            if migration_file in applied:
+                continue
             print(f"Running migration: {migration_file}")
-            with open(os.path.join(migrations_dir, migration_file)) as f:
-                migration_sql = f.read()
-                conn.executescript(migration_sql)
+            path = os.path.join(MIGRATIONS_DIR, migration_file)
+            if migration_file.endswith('.py'):
+                # Python migrations backfill data SQL can't compute; they define migrate(conn)
+                spec = importlib.util.spec_from_file_location(migration_file[:-3], path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                conn.execute('BEGIN')
+                module.migrate(conn)
+                conn.execute('INSERT INTO schema_migrations (name) VALUES (?)', (migration_file,))
                 conn.commit()
-        
+                continue
+            with open(path) as f:
+                migration_sql = f.read()
+            # executescript commits on its own, so wrap the migration and its record in one transaction
+            conn.executescript(
+                'BEGIN;\n' + migration_sql +
+                f"\nINSERT INTO schema_migrations (name) VALUES ('{migration_file}');\nCOMMIT;"
+            )
+
         print("Migrations completed successfully")
     except Exception as e:
         print(f"Error running migrations: {str(e)}")
@@ -2,6 +2,8 @@ from flask import jsonify
 from flask_cors import cross_origin
 from datetime import datetime, timedelta
 
+from lib.counters import counter
+
 def load(app):
     @app.route('/dashboard/recent-session', methods=['GET'])
     @cross_origin()
@@ -9,7 +11,8 @@ def load(app):
         try:
             cursor = app.db.cursor()
             
-            # Get the most recent study session with activity name and results
+            # Get the most recent study session with activity name and results;
+            # the session is picked from the created_at index before its reviews are counted
             cursor.execute('''
                 SELECT 
                     ss.id,
@@ -18,12 +21,14 @@ def load(app):
                     ss.created_at,
                     COUNT(CASE WHEN wri.correct = 1 THEN 1 END) as correct_count,
                     COUNT(CASE WHEN wri.correct = 0 THEN 1 END) as wrong_count
-                FROM study_sessions ss
+                FROM (
+                    SELECT * FROM study_sessions
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT 1
+                ) ss
                 JOIN study_activities sa ON ss.study_activity_id = sa.id
                 LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
                 GROUP BY ss.id
-                ORDER BY ss.created_at DESC
-                LIMIT 1
             ''')
             
             session = cursor.fetchone()
@@ -49,9 +54,8 @@ def load(app):
         try:
             cursor = app.db.cursor()
             
-            # Get total vocabulary count
-            cursor.execute('SELECT COUNT(*) as total_vocabulary FROM words')
-            total_vocabulary = cursor.fetchone()["total_vocabulary"]
+            # Get total vocabulary count from the trigger-maintained counter
+            total_vocabulary = counter(cursor, 'words')
 
             # Get total unique words studied
             cursor.execute('''
@@ -88,9 +92,8 @@ def load(app):
             ''')
             success_rate = cursor.fetchone()["success_rate"] or 0
             
-            # Get total number of study sessions
-            cursor.execute('SELECT COUNT(*) as total_sessions FROM study_sessions')
-            total_sessions = cursor.fetchone()["total_sessions"]
+            # Get total number of study sessions from the trigger-maintained counter
+            total_sessions = counter(cursor, 'study_sessions')
             
             # Get number of groups with activity in the last 30 days
             cursor.execute('''
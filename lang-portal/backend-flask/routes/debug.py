@@ -0,0 +1,12 @@
+from flask import jsonify
+from flask_cors import cross_origin
+
+def load(app):
+  # Only loaded with SQL_PROFILE on, after lib.profiling.install has set up app.metrics
+  @app.route('/debug/metrics', methods=['GET'])
+  @cross_origin()
+  def get_debug_metrics():
+    metrics = {"routes": app.metrics.snapshot()}
+    if app.review_queue is not None:
+      metrics["review_queue"] = app.review_queue.stats()
+    return jsonify(metrics)
@@ -2,6 +2,15 @@ from flask import request, jsonify, g
 from flask_cors import cross_origin
 import json
 
+from lib import sampling, streaming
+from lib.counters import counter
+
+# Words returned by one /groups/<id>/words/sample
+MAX_SAMPLE = 1000
+
+# Same keys and separators as jsonify, so exports are unchanged for existing clients
+EXPORT_JSON = json.JSONEncoder(sort_keys=True, separators=(',', ':'))
+
 def load(app):
   @app.route('/groups', methods=['GET'])
   @cross_origin()
@@ -35,9 +44,8 @@ def load(app):
 
       groups = cursor.fetchall()
 
-      # Query the total number of groups
-      cursor.execute('SELECT COUNT(*) FROM groups')
-      total_groups = cursor.fetchone()[0]
+      # The total number of groups, from the trigger-maintained counter
+      total_groups = counter(cursor, 'groups')
       total_pages = (total_groups + groups_per_page - 1) // groups_per_page
 
       # Format the response
@@ -106,7 +114,7 @@ def load(app):
         order = 'asc'
 
       # First, check if the group exists
-      cursor.execute('SELECT name FROM groups WHERE id = ?', (id,))
+      cursor.execute('SELECT name, words_count FROM groups WHERE id = ?', (id,))
       group = cursor.fetchone()
       if not group:
         return jsonify({"error": "Group not found"}), 404
@@ -126,13 +134,8 @@ def load(app):
       
       words = cursor.fetchall()
 
-      # Get total words count for pagination
-      cursor.execute('''
-        SELECT COUNT(*) 
-        FROM word_groups 
-        WHERE group_id = ?
-      ''', (id,))
-      total_words = cursor.fetchone()[0]
+      # Total words for pagination, from the counter the word_groups triggers keep
+      total_words = group["words_count"]
       total_pages = (total_words + words_per_page - 1) // words_per_page
 
       # Format the response
@@ -158,36 +161,168 @@ def load(app):
   @app.route('/groups/<int:id>/words/raw', methods=['GET'])
   @cross_origin()
   def get_group_words_raw(id):
+    # The words are streamed from a connection of their own, which has to stay
+    # open after the request's connection is closed, until the last chunk is sent
+    connection = app.db.connect()
+    try:
+      # ?format=ndjson sends one word per line instead of a JSON array
+      ndjson = request.args.get('format') == 'ndjson'
+
+      # Read the version and the words in one transaction, so the ETag matches the body.
+      # The database is in WAL mode (see Db.enable_wal), so this snapshot doesn't
+      # block writers however long the client takes to read it
+      connection.execute('BEGIN')
+      group = connection.execute('SELECT version FROM groups WHERE id = ?', (id,)).fetchone()
+      if not group:
+        connection.close()
+        return jsonify({"error": "Group not found"}), 404
+
+      encoding = streaming.negotiate_encoding(request.accept_encodings)
+      etag = f"{id}-{group['version']}-{'ndjson' if ndjson else 'json'}" + (f"-{encoding}" if encoding else '')
+
+      if request.if_none_match.contains(etag):
+        connection.close()
+        response = app.response_class(status=304)
+      else:
+        cursor = connection.execute('''
+          SELECT w.id, w.kanji, w.romaji, w.english
+          FROM words w
+          JOIN word_groups wg ON w.id = wg.word_id
+          WHERE wg.group_id = ?
+          ORDER BY w.kanji
+        ''', (id,))
+
+        def encode(rows):
+          if ndjson:
+            return ''.join(EXPORT_JSON.encode(dict(row)) + '\n' for row in rows).encode()
+          return EXPORT_JSON.encode([dict(row) for row in rows])[1:-1].encode()
+
+        # Close the connection, ending the read transaction, as soon as the last
+        # row is read; call_on_close covers clients that disconnect before that
+        def generate():
+          try:
+            chunks = streaming.row_chunks(cursor, encode)
+            if not ndjson:
+              chunks = streaming.json_array(chunks)
+            yield from streaming.compress(chunks, encoding)
+          finally:
+            connection.close()
+
+        response = app.response_class(generate(), mimetype='application/x-ndjson' if ndjson else 'application/json')
+        response.call_on_close(connection.close)
+        if encoding:
+          response.headers['Content-Encoding'] = encoding
+
+      response.set_etag(etag)
+      # Clients may keep the words but must revalidate them on every launch
+      response.headers['Cache-Control'] = 'no-cache'
+      response.vary.add('Accept-Encoding')
+      return response
+
+    except Exception as e:
+      connection.close()
+      return jsonify({"error": str(e)}), 500
+
+  @app.route('/groups/<int:id>/words/sample', methods=['GET'])
+  @cross_origin()
+  def get_group_words_sample(id):
     try:
       cursor = app.db.cursor()
-      
+
+      n = min(max(request.args.get('n', 10, type=int), 1), MAX_SAMPLE)
+      # The same seed gives the same words as long as the group doesn't change
+      rng, seed = sampling.make_rng(request.args.get('seed', type=int))
+      # weight=errors favours words answered wrongly, by their word_reviews
+      weighted = request.args.get('weight') == 'errors'
+      if request.args.get('weight') not in (None, 'errors'):
+        return jsonify({"error": "weight must be 'errors'"}), 400
+
+      cursor.execute('SELECT words_count FROM groups WHERE id = ?', (id,))
+      group = cursor.fetchone()
+      if not group:
+        return jsonify({"error": "Group not found"}), 404
+      count = group["words_count"] or 0
+
+      # Words at the given dense positions, with their review counts
+      def fetch(positions):
+        cursor.execute('''
+          SELECT wg.position, w.id, w.kanji, w.romaji, w.english,
+                 COALESCE(wr.correct_count, 0) AS correct_count,
+                 COALESCE(wr.wrong_count, 0) AS wrong_count
+          FROM word_groups wg
+          JOIN words w ON w.id = wg.word_id
+          LEFT JOIN word_reviews wr ON wr.word_id = w.id
+          WHERE wg.group_id = ? AND wg.position IN (SELECT value FROM json_each(?))
+        ''', (id, json.dumps(positions)))
+        return {row["position"]: row for row in cursor.fetchall()}
+
+      if weighted and n < count:
+        sample = sampling.weighted_positions(
+          rng, count, n, fetch,
+          lambda word: sampling.error_weight(word["correct_count"], word["wrong_count"])
+        )
+      else:
+        # Uniform, or the whole group in a random order when it has no more than n words
+        positions = sampling.uniform_positions(rng, count, n)
+        rows = fetch(positions)
+        sample = [(position, rows[position]) for position in positions if position in rows]
+
+      return jsonify({
+        "words": [{
+          "id": word["id"],
+          "kanji": word["kanji"],
+          "romaji": word["romaji"],
+          "english": word["english"],
+          "correct_count": word["correct_count"],
+          "wrong_count": word["wrong_count"]
+        } for _, word in sample],
+        "seed": seed
+      })
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  @app.route('/groups/<int:id>/due', methods=['GET'])
+  @cross_origin()
+  def get_group_due_words(id):
+    try:
+      cursor = app.db.cursor()
+
+      # Number of words to return, capped so a client can't ask for the whole group
+      limit = request.args.get('limit', 20, type=int)
+      limit = min(max(limit, 1), 100)
+
       # First, check if the group exists
       cursor.execute('SELECT name FROM groups WHERE id = ?', (id,))
       group = cursor.fetchone()
       if not group:
         return jsonify({"error": "Group not found"}), 404
 
-      # Query to fetch all words in the group
+      # Words whose review is due, most overdue first; a range scan of
+      # idx_word_schedules_group_due that stops after `limit` rows
       cursor.execute('''
-        SELECT w.id, w.kanji, w.romaji, w.english
-        FROM words w
-        JOIN word_groups wg ON w.id = wg.word_id
-        WHERE wg.group_id = ?
-        ORDER BY w.kanji
-      ''', (id,))
-      
-      words = cursor.fetchall()
+        SELECT w.id, w.kanji, w.romaji, w.english,
+               ws.due_at, ws.interval_days, ws.ease, ws.repetitions
+        FROM word_schedules ws
+        JOIN words w ON w.id = ws.word_id
+        WHERE ws.group_id = ? AND ws.due_at <= datetime('now')
+        ORDER BY ws.due_at
+        LIMIT ?
+      ''', (id, limit))
 
-      # Format the response - simpler format without review stats
-      words_data = [{
-        "id": word["id"],
-        "kanji": word["kanji"],
-        "romaji": word["romaji"],
-        "english": word["english"]
-      } for word in words]
+      words = cursor.fetchall()
 
-      return jsonify(words_data)
-      
+      return jsonify({
+        "words": [{
+          "id": word["id"],
+          "kanji": word["kanji"],
+          "romaji": word["romaji"],
+          "english": word["english"],
+          "due_at": word["due_at"],
+          "interval_days": word["interval_days"],
+          "ease": word["ease"],
+          "repetitions": word["repetitions"]
+        } for word in words]
+      })
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
@@ -208,15 +343,17 @@ def load(app):
 
       # Map frontend sort keys to database columns
       sort_mapping = {
-        'startTime': 'created_at',
-        'endTime': 'last_activity_time',
+        'startTime': 's.created_at',
+        'endTime': 'end_time',
         'activityName': 'a.name',
         'groupName': 'g.name',
-        'reviewItemsCount': 'review_count'
+        'reviewItemsCount': 's.review_count'
       }
 
       # Use mapped sort column or default to created_at
-      sort_column = sort_mapping.get(sort_by, 'created_at')
+      sort_column = sort_mapping.get(sort_by, 's.created_at')
+      if order not in ['asc', 'desc']:
+        order = 'desc'
 
       # Get total count for pagination
       cursor.execute('''
@@ -227,30 +364,24 @@ def load(app):
       total_sessions = cursor.fetchone()[0]
       total_pages = (total_sessions + sessions_per_page - 1) // sessions_per_page
 
-      # Get study sessions for this group with dynamic calculations
+      # Get study sessions for this group from their rollup columns; the default
+      # sort is a range scan of idx_study_sessions_group_created_at
       cursor.execute(f'''
         SELECT 
           s.id,
           s.group_id,
           s.study_activity_id,
           s.created_at as start_time,
-          (
-            SELECT MAX(created_at)
-            FROM word_review_items
-            WHERE study_session_id = s.id
-          ) as last_activity_time,
+          -- Sessions without reviews or an explicit end are shown as lasting 30 minutes
+          COALESCE(s.ended_at, s.last_activity_at, datetime(s.created_at, '+30 minutes')) as end_time,
           a.name as activity_name,
           g.name as group_name,
-          (
-            SELECT COUNT(*)
-            FROM word_review_items
-            WHERE study_session_id = s.id
-          ) as review_count
+          s.review_count
         FROM study_sessions s
         JOIN study_activities a ON s.study_activity_id = a.id
         JOIN groups g ON s.group_id = g.id
         WHERE s.group_id = ?
-        ORDER BY {sort_column} {order}
+        ORDER BY {sort_column} {order}, s.id {order}
         LIMIT ? OFFSET ?
       ''', (id, sessions_per_page, offset))
       
@@ -258,11 +389,6 @@ def load(app):
       sessions_data = []
       
       for session in sessions:
-        # If there's no last_activity_time, use start_time + 30 minutes
-        end_time = session["last_activity_time"]
-        if not end_time:
-            end_time = cursor.execute('SELECT datetime(?, "+30 minutes")', (session["start_time"],)).fetchone()[0]
-        
         sessions_data.append({
           "id": session["id"],
           "group_id": session["group_id"],
@@ -270,7 +396,7 @@ def load(app):
           "study_activity_id": session["study_activity_id"],
           "activity_name": session["activity_name"],
           "start_time": session["start_time"],
-          "end_time": end_time,
+          "end_time": session["end_time"],
           "review_items_count": session["review_count"]
         })
 
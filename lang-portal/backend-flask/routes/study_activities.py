@@ -52,9 +52,8 @@ def load(app):
         # Get total count
         cursor.execute('''
             SELECT COUNT(*) as count 
-            FROM study_sessions ss
-            JOIN groups g ON g.id = ss.group_id
-            WHERE ss.study_activity_id = ?
+            FROM study_sessions
+            WHERE study_activity_id = ?
         ''', (id,))
         total_count = cursor.fetchone()['count']
 
@@ -66,15 +65,14 @@ def load(app):
                 g.name as group_name,
                 sa.name as activity_name,
                 ss.created_at,
+                COALESCE(ss.ended_at, ss.last_activity_at, ss.created_at) as end_time,
                 ss.study_activity_id as activity_id,
-                COUNT(wri.id) as review_items_count
+                ss.review_count as review_items_count
             FROM study_sessions ss
             JOIN groups g ON g.id = ss.group_id
             JOIN study_activities sa ON sa.id = ss.study_activity_id
-            LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
             WHERE ss.study_activity_id = ?
-            GROUP BY ss.id, ss.group_id, g.name, sa.name, ss.created_at, ss.study_activity_id
-            ORDER BY ss.created_at DESC
+            ORDER BY ss.created_at DESC, ss.id DESC
             LIMIT ? OFFSET ?
         ''', (id, per_page, offset))
         sessions = cursor.fetchall()
@@ -87,7 +85,7 @@ def load(app):
                 'activity_id': session['activity_id'],
                 'activity_name': session['activity_name'],
                 'start_time': session['created_at'],
-                'end_time': session['created_at'],  # For now, just use the same time since we don't track end time
+                'end_time': session['end_time'],
                 'review_items_count': session['review_items_count']
             } for session in sessions],
             'total': total_count,
@@ -3,6 +3,9 @@ from flask_cors import cross_origin
 from datetime import datetime
 import math
 
+from lib import reviews
+from lib.counters import counter
+
 def load(app):
   # todo /study_sessions POST
 
@@ -17,16 +20,11 @@ def load(app):
       per_page = request.args.get('per_page', 10, type=int)
       offset = (page - 1) * per_page
 
-      # Get total count
-      cursor.execute('''
-        SELECT COUNT(*) as count 
-        FROM study_sessions ss
-        JOIN groups g ON g.id = ss.group_id
-        JOIN study_activities sa ON sa.id = ss.study_activity_id
-      ''')
-      total_count = cursor.fetchone()['count']
+      # Get total count from the trigger-maintained counter
+      total_count = counter(cursor, 'study_sessions')
 
-      # Get paginated sessions
+      # Get paginated sessions; review counts are rolled up on the session,
+      # so this walks idx_study_sessions_created_at backwards
       cursor.execute('''
         SELECT 
           ss.id,
@@ -35,13 +33,12 @@ def load(app):
           sa.id as activity_id,
           sa.name as activity_name,
           ss.created_at,
-          COUNT(wri.id) as review_items_count
+          COALESCE(ss.ended_at, ss.last_activity_at, ss.created_at) as end_time,
+          ss.review_count as review_items_count
         FROM study_sessions ss
         JOIN groups g ON g.id = ss.group_id
         JOIN study_activities sa ON sa.id = ss.study_activity_id
-        LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
-        GROUP BY ss.id
-        ORDER BY ss.created_at DESC
+        ORDER BY ss.created_at DESC, ss.id DESC
         LIMIT ? OFFSET ?
       ''', (per_page, offset))
       sessions = cursor.fetchall()
@@ -54,7 +51,7 @@ def load(app):
           'activity_id': session['activity_id'],
           'activity_name': session['activity_name'],
           'start_time': session['created_at'],
-          'end_time': session['created_at'],  # For now, just use the same time since we don't track end time
+          'end_time': session['end_time'],
           'review_items_count': session['review_items_count']
         } for session in sessions],
         'total': total_count,
@@ -148,13 +145,12 @@ def load(app):
           sa.id as activity_id,
           sa.name as activity_name,
           ss.created_at,
-          COUNT(wri.id) as review_items_count
+          COALESCE(ss.ended_at, ss.last_activity_at, ss.created_at) as end_time,
+          ss.review_count as review_items_count
         FROM study_sessions ss
         JOIN groups g ON g.id = ss.group_id
         JOIN study_activities sa ON sa.id = ss.study_activity_id
-        LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
         WHERE ss.id = ?
-        GROUP BY ss.id
       ''', (id,))
       
       session = cursor.fetchone()
@@ -200,7 +196,7 @@ def load(app):
           'activity_id': session['activity_id'],
           'activity_name': session['activity_name'],
           'start_time': session['created_at'],
-          'end_time': session['created_at'],  # For now, just use the same time
+          'end_time': session['end_time'],
           'review_items_count': session['review_items_count']
         },
         'words': [{
@@ -252,7 +248,7 @@ def load(app):
         params.append(data['study_activity_id'])
       
       if 'end_time' in data:
-        update_fields.append('end_time = ?')
+        update_fields.append('ended_at = ?')
         params.append(data['end_time'])
       
       if not update_fields:
@@ -277,14 +273,12 @@ def load(app):
           sa.id as activity_id,
           sa.name as activity_name,
           ss.created_at,
-          ss.end_time,
-          COUNT(wri.id) as review_items_count
+          COALESCE(ss.ended_at, ss.last_activity_at, ss.created_at) as end_time,
+          ss.review_count as review_items_count
         FROM study_sessions ss
         JOIN groups g ON g.id = ss.group_id
         JOIN study_activities sa ON sa.id = ss.study_activity_id
-        LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
         WHERE ss.id = ?
-        GROUP BY ss.id
       ''', (id,))
       
       session = cursor.fetchone()
@@ -296,7 +290,7 @@ def load(app):
         'activity_id': session['activity_id'],
         'activity_name': session['activity_name'],
         'start_time': session['created_at'],
-        'end_time': session['end_time'] or session['created_at'],
+        'end_time': session['end_time'],
         'review_items_count': session['review_items_count']
       })
       
@@ -341,12 +335,13 @@ def load(app):
         return jsonify({"error": "Request body must be an array of reviews"}), 400
       
       # Verify session exists
-      cursor.execute('SELECT id FROM study_sessions WHERE id = ?', (id,))
-      if not cursor.fetchone():
+      cursor.execute('SELECT id, group_id FROM study_sessions WHERE id = ?', (id,))
+      session = cursor.fetchone()
+      if not session:
         return jsonify({"error": "Study session not found"}), 404
       
       # Validate each review item and prepare for insertion
-      reviews_to_insert = []
+      review_items = []
       for review in data:
         if not isinstance(review, dict):
           return jsonify({"error": "Each review must be an object"}), 400
@@ -356,49 +351,51 @@ def load(app):
           if field not in review:
             return jsonify({"error": f"Missing required field in review: {field}"}), 400
         
-        # Verify word exists
-        cursor.execute('SELECT id FROM words WHERE id = ?', (review['word_id'],))
-        if not cursor.fetchone():
-          return jsonify({"error": f"Word not found: {review['word_id']}"}), 404
-        
-        # Prepare review for insertion
-        reviews_to_insert.append((
-          id,  # study_session_id
+        review_items.append((
           review['word_id'],
-          1 if review['correct'] else 0,
-          review.get('response', None),  # Optional field
-          'now'  # created_at
+          bool(review['correct']),
+          review.get('response', None)  # Optional field
         ))
       
-      # Insert all reviews
-      cursor.executemany('''
-        INSERT INTO word_review_items 
-          (study_session_id, word_id, correct, response, created_at)
-        VALUES (?, ?, ?, ?, datetime(?))
-      ''', reviews_to_insert)
-      
-      # Update word_reviews materialized view
-      cursor.execute('''
-        INSERT OR REPLACE INTO word_reviews (word_id, correct_count, wrong_count)
-        SELECT 
-          word_id,
-          SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) as correct_count,
-          SUM(CASE WHEN correct = 0 THEN 1 ELSE 0 END) as wrong_count
-        FROM word_review_items
-        GROUP BY word_id
-      ''')
+      # Verify the words exist, all in one query
+      missing = reviews.missing_words(cursor, [word_id for word_id, _, _ in review_items])
+      if missing:
+        return jsonify({"error": f"Word not found: {missing[0]}"}), 404
+
+      if app.review_queue is not None:
+        # Write-behind: acknowledged once queued, applied by the flusher
+        app.review_queue.enqueue(id, session['group_id'], review_items)
+        return jsonify({
+          "message": f"Queued {len(review_items)} reviews",
+          "reviews_count": len(review_items),
+          "queued": True
+        }), 202
+
+      # Review items, session rollups, schedules and word_reviews counts
+      reviews.apply_reviews(cursor, [(id, session['group_id'], review_items, datetime.utcnow())])
       
       app.db.commit()
       
       return jsonify({
-        "message": f"Successfully added {len(reviews_to_insert)} reviews",
-        "reviews_count": len(reviews_to_insert)
+        "message": f"Successfully added {len(review_items)} reviews",
+        "reviews_count": len(review_items)
       }), 201
       
     except Exception as e:
       app.db.rollback()
       return jsonify({"error": str(e)}), 500
 
+  @app.route('/api/study-sessions/review-queue', methods=['GET'])
+  @cross_origin()
+  def get_review_queue():
+    # Depth and flush lag of the write-behind review queue, when it is on
+    if app.review_queue is None:
+      return jsonify({"enabled": False})
+    try:
+      return jsonify({"enabled": True, **app.review_queue.stats()})
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
   @app.route('/api/study-sessions/reset', methods=['POST'])
   @cross_origin()
   def reset_study_sessions():
@@ -2,6 +2,32 @@ from flask import request, jsonify, g
 from flask_cors import cross_origin
 import json
 
+from lib.kana import reading_key
+from lib.counters import counter
+
+# FTS5 trigram queries need at least this many characters; shorter ones match prefixes
+TRIGRAM_MIN_CHARS = 3
+
+def match_score(column):
+  # Exact matches first, then prefixes, then substrings; shorter text first within each.
+  # LIKE and NOCASE fold ASCII case only, so rows FTS matched on other case sort last
+  return f'''
+    (CASE
+      WHEN w.{column} = :q COLLATE NOCASE THEN 0
+      WHEN w.{column} LIKE :prefix ESCAPE '\\' THEN 1
+      WHEN w.{column} LIKE :substring ESCAPE '\\' THEN 2
+      ELSE 3
+    END) * 1000 + min(length(w.{column}), 999)
+  '''
+
+SEARCH_SCORE = f"min({match_score('kanji')}, {match_score('romaji')}, {match_score('english')})"
+
+# Answers accepted by one POST /words/match
+MAX_MATCH_ANSWERS = 10000
+
+def like_escape(text):
+  return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
 def load(app):
   # Endpoint: GET /words with pagination (50 words per page)
   @app.route('/words', methods=['GET'])
@@ -41,9 +67,8 @@ def load(app):
 
       words = cursor.fetchall()
 
-      # Query the total number of words
-      cursor.execute('SELECT COUNT(*) FROM words')
-      total_words = cursor.fetchone()[0]
+      # The total number of words, from the trigger-maintained counter
+      total_words = counter(cursor, 'words')
       total_pages = (total_words + words_per_page - 1) // words_per_page
 
       # Format the response
@@ -70,6 +95,112 @@ def load(app):
     finally:
       app.db.close()
 
+  # Endpoint: GET /words/search?q= for words whose kanji, romaji or English contain q
+  @app.route('/words/search', methods=['GET'])
+  @cross_origin()
+  def search_words():
+    try:
+      cursor = app.db.cursor()
+
+      q = request.args.get('q', '').strip()
+      if not q:
+        return jsonify({"error": "q is required"}), 400
+      limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+
+      # Keyset paging: `after` is the next_cursor of the previous page, "score:id"
+      after = request.args.get('after')
+      try:
+        after_score, after_id = (int(part) for part in after.split(':')) if after else (-1, 0)
+      except ValueError:
+        return jsonify({"error": "Invalid after cursor"}), 400
+
+      if len(q) >= TRIGRAM_MIN_CHARS:
+        candidates = "w.id IN (SELECT rowid FROM words_fts WHERE words_fts MATCH :match)"
+      else:
+        # One or two characters would match a large share of all words as a
+        # substring, so only prefixes are searched, from the NOCASE indexes
+        candidates = '''(w.kanji LIKE :prefix ESCAPE '\\' OR w.romaji LIKE :prefix ESCAPE '\\'
+          OR w.english LIKE :prefix ESCAPE '\\')'''
+
+      cursor.execute(f'''
+        SELECT id, kanji, romaji, english, score FROM (
+          SELECT w.id, w.kanji, w.romaji, w.english, {SEARCH_SCORE} AS score
+          FROM words w
+          WHERE {candidates}
+        )
+        WHERE (score, id) > (:after_score, :after_id)
+        ORDER BY score, id
+        LIMIT :limit
+      ''', {
+        "q": q,
+        # Quoted as an FTS5 string so its characters are matched literally
+        "match": '"' + q.replace('"', '""') + '"',
+        "prefix": like_escape(q) + '%',
+        "substring": '%' + like_escape(q) + '%',
+        "after_score": after_score,
+        "after_id": after_id,
+        "limit": limit + 1
+      })
+
+      words = cursor.fetchall()
+      next_cursor = None
+      if len(words) > limit:
+        words = words[:limit]
+        next_cursor = f"{words[-1]['score']}:{words[-1]['id']}"
+
+      return jsonify({
+        "words": [{
+          "id": word["id"],
+          "kanji": word["kanji"],
+          "romaji": word["romaji"],
+          "english": word["english"]
+        } for word in words],
+        "next_cursor": next_cursor
+      })
+
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  # Endpoint: POST /words/match to resolve typed answers to the words they read as
+  @app.route('/words/match', methods=['POST'])
+  @cross_origin()
+  def match_words():
+    try:
+      data = request.get_json(silent=True)
+      if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object with an answers list"}), 400
+      answers = data.get('answers')
+      if not isinstance(answers, list) or not all(isinstance(answer, str) for answer in answers):
+        return jsonify({"error": "answers must be a list of strings"}), 400
+      if len(answers) > MAX_MATCH_ANSWERS:
+        return jsonify({"error": f"At most {MAX_MATCH_ANSWERS} answers per request"}), 400
+
+      # Romaji in either system, hiragana and katakana answers all reduce to one key
+      keys = [reading_key(answer) for answer in answers]
+
+      # One indexed lookup per distinct key, passed as a single JSON parameter.
+      # The index keeps words with the same reading in id order, so no sort is needed
+      cursor = app.db.cursor()
+      cursor.execute('''
+        SELECT id, reading_kana FROM words
+        WHERE reading_kana IN (SELECT value FROM json_each(?))
+      ''', (json.dumps(list(set(keys)), ensure_ascii=False),))
+
+      word_ids = {}
+      for word in cursor.fetchall():
+        word_ids.setdefault(word["reading_kana"], []).append(word["id"])
+
+      return jsonify({
+        "matches": [{
+          "answer": answer,
+          "reading": key,
+          "word_ids": word_ids.get(key, [])
+        } for answer, key in zip(answers, keys)]
+      })
+
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
   # Endpoint: GET /words/:id to get a single word with its details
   @app.route('/words/<int:word_id>', methods=['GET'])
   @cross_origin()
@@ -0,0 +1,17 @@
+-- Rollup columns on study_sessions, replacing per-row subqueries over word_review_items
+ALTER TABLE study_sessions ADD COLUMN review_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE study_sessions ADD COLUMN last_activity_at DATETIME;
+ALTER TABLE study_sessions ADD COLUMN ended_at DATETIME;
+
+-- submit_session_reviews has always sent a response column
+ALTER TABLE word_review_items ADD COLUMN response TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_word_review_items_session ON word_review_items (study_session_id);
+
+UPDATE study_sessions SET
+  review_count = (SELECT COUNT(*) FROM word_review_items WHERE study_session_id = study_sessions.id),
+  last_activity_at = (SELECT MAX(created_at) FROM word_review_items WHERE study_session_id = study_sessions.id);
+
+CREATE INDEX IF NOT EXISTS idx_study_sessions_created_at ON study_sessions (created_at);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group_created_at ON study_sessions (group_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_activity_created_at ON study_sessions (study_activity_id, created_at);
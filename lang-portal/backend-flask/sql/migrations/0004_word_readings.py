@@ -0,0 +1,13 @@
+# Normalized reading columns on words, filled in from each word's romaji
+from lib.kana import readings
+
+def migrate(conn):
+    conn.execute('ALTER TABLE words ADD COLUMN reading_kana TEXT')
+    conn.execute('ALTER TABLE words ADD COLUMN reading_hepburn TEXT')
+    conn.execute('ALTER TABLE words ADD COLUMN reading_kunrei TEXT')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_words_reading_kana ON words (reading_kana)')
+
+    words = conn.execute('SELECT id, romaji FROM words').fetchall()
+    conn.executemany('''
+        UPDATE words SET reading_kana = ?, reading_hepburn = ?, reading_kunrei = ? WHERE id = ?
+    ''', [(*readings(romaji), word_id) for word_id, romaji in words])
@@ -0,0 +1,23 @@
+-- Per-group version counter for the export ETag
+ALTER TABLE groups ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
+
+-- Group membership lookups from either side
+CREATE INDEX IF NOT EXISTS idx_word_groups_group ON word_groups (group_id, word_id);
+CREATE INDEX IF NOT EXISTS idx_word_groups_word ON word_groups (word_id);
+
+-- groups.version changes whenever the words listed by /groups/<id>/words/raw do
+CREATE TRIGGER IF NOT EXISTS word_groups_version_insert AFTER INSERT ON word_groups
+BEGIN
+  UPDATE groups SET version = version + 1 WHERE id = NEW.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_version_delete AFTER DELETE ON word_groups
+BEGIN
+  UPDATE groups SET version = version + 1 WHERE id = OLD.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_version_update AFTER UPDATE OF kanji, romaji, english ON words
+BEGIN
+  UPDATE groups SET version = version + 1
+  WHERE id IN (SELECT group_id FROM word_groups WHERE word_id = NEW.id);
+END;
@@ -0,0 +1,55 @@
+-- groups.words_count is kept by the word_groups triggers, which now also bump the version
+DROP TRIGGER IF EXISTS word_groups_version_insert;
+DROP TRIGGER IF EXISTS word_groups_version_delete;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_insert AFTER INSERT ON word_groups
+BEGIN
+  UPDATE groups SET words_count = words_count + 1, version = version + 1 WHERE id = NEW.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_delete AFTER DELETE ON word_groups
+BEGIN
+  UPDATE groups SET words_count = words_count - 1, version = version + 1 WHERE id = OLD.group_id;
+END;
+
+UPDATE groups SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id);
+
+-- Row counts of whole tables, kept by triggers so listings don't COUNT(*) on every page
+CREATE TABLE IF NOT EXISTS counters (
+  name TEXT PRIMARY KEY,  -- The table counted
+  value INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO counters (name, value) SELECT 'words', COUNT(*) FROM words;
+INSERT OR IGNORE INTO counters (name, value) SELECT 'groups', COUNT(*) FROM groups;
+INSERT OR IGNORE INTO counters (name, value) SELECT 'study_sessions', COUNT(*) FROM study_sessions;
+
+CREATE TRIGGER IF NOT EXISTS words_counter_insert AFTER INSERT ON words
+BEGIN
+  UPDATE counters SET value = value + 1 WHERE name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_counter_delete AFTER DELETE ON words
+BEGIN
+  UPDATE counters SET value = value - 1 WHERE name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS groups_counter_insert AFTER INSERT ON groups
+BEGIN
+  UPDATE counters SET value = value + 1 WHERE name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS groups_counter_delete AFTER DELETE ON groups
+BEGIN
+  UPDATE counters SET value = value - 1 WHERE name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_sessions_counter_insert AFTER INSERT ON study_sessions
+BEGIN
+  UPDATE counters SET value = value + 1 WHERE name = 'study_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_sessions_counter_delete AFTER DELETE ON study_sessions
+BEGIN
+  UPDATE counters SET value = value - 1 WHERE name = 'study_sessions';
+END;
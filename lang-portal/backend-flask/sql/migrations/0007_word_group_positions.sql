@@ -0,0 +1,32 @@
+-- Dense per-group positions on word_groups for random sampling
+ALTER TABLE word_groups ADD COLUMN position INTEGER;
+
+UPDATE word_groups SET position = numbered.position
+FROM (
+  SELECT rowid AS row_id, ROW_NUMBER() OVER (PARTITION BY group_id ORDER BY rowid) - 1 AS position
+  FROM word_groups
+) numbered
+WHERE word_groups.rowid = numbered.row_id;
+
+UPDATE groups SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_word_groups_position ON word_groups (group_id, position);
+CREATE INDEX IF NOT EXISTS idx_word_reviews_word ON word_reviews (word_id);
+
+-- The word_groups triggers now also keep the positions dense
+DROP TRIGGER IF EXISTS word_groups_insert;
+DROP TRIGGER IF EXISTS word_groups_delete;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_insert AFTER INSERT ON word_groups
+BEGIN
+  UPDATE word_groups SET position = (SELECT words_count FROM groups WHERE id = NEW.group_id)
+  WHERE rowid = NEW.rowid;
+  UPDATE groups SET words_count = words_count + 1, version = version + 1 WHERE id = NEW.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_delete AFTER DELETE ON word_groups
+BEGIN
+  UPDATE word_groups SET position = OLD.position
+  WHERE group_id = OLD.group_id AND position = (SELECT words_count - 1 FROM groups WHERE id = OLD.group_id);
+  UPDATE groups SET words_count = words_count - 1, version = version + 1 WHERE id = OLD.group_id;
+END;
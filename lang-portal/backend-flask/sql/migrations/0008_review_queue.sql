@@ -0,0 +1,16 @@
+-- word_reviews was rebuilt with INSERT OR REPLACE on every submit, which only
+-- appended rows; rebuild it with one row per word and keep it that way
+DELETE FROM word_reviews;
+
+INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+SELECT word_id, SUM(correct = 1), SUM(correct = 0), MAX(created_at)
+FROM word_review_items
+GROUP BY word_id;
+
+DROP INDEX IF EXISTS idx_word_reviews_word;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_word_reviews_word ON word_reviews (word_id);
+
+CREATE TABLE IF NOT EXISTS review_queue_state (
+  queue TEXT PRIMARY KEY,
+  applied_id INTEGER NOT NULL DEFAULT 0
+);
@@ -0,0 +1,6 @@
+-- Listings page through sessions newest first, overall, per group and per activity
+CREATE INDEX IF NOT EXISTS idx_study_sessions_created_at ON study_sessions (created_at);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group_created_at ON study_sessions (group_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_activity_created_at ON study_sessions (study_activity_id, created_at);
+-- Per-session review lookups (session detail, delete)
+CREATE INDEX IF NOT EXISTS idx_word_review_items_session ON word_review_items (study_session_id);
@@ -1,5 +1,6 @@
 CREATE TABLE IF NOT EXISTS groups (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   name TEXT NOT NULL,
-  words_count INTEGER DEFAULT 0  -- Counter cache for the number of words in the group
+  words_count INTEGER DEFAULT 0,  -- Counter cache for the number of words in the group
+  version INTEGER NOT NULL DEFAULT 0  -- Bumped by triggers whenever the group's words change; the export ETag
 );
\ No newline at end of file
@@ -0,0 +1,6 @@
+-- How far each write-behind review queue has been applied, updated in the same
+-- transaction as the reviews so a replay after a crash skips what already landed
+CREATE TABLE IF NOT EXISTS review_queue_state (
+  queue TEXT PRIMARY KEY,  -- The queue file's name, from its queue_identity table
+  applied_id INTEGER NOT NULL DEFAULT 0  -- Highest review_queue.id applied
+);
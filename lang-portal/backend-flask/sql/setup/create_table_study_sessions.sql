@@ -3,6 +3,9 @@ CREATE TABLE IF NOT EXISTS study_sessions (
   group_id INTEGER NOT NULL,  -- The group of words being studied
   study_activity_id INTEGER NOT NULL,  -- The activity performed
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP,  -- Timestamp of the session
+  review_count INTEGER NOT NULL DEFAULT 0,  -- Rollup of word_review_items, updated when reviews are written
+  last_activity_at DATETIME,  -- Timestamp of the latest review, NULL until the first one
+  ended_at DATETIME,  -- Set when the session is ended explicitly
   FOREIGN KEY (group_id) REFERENCES groups(id),
   FOREIGN KEY (study_activity_id) REFERENCES study_activities(id)
 );
\ No newline at end of file
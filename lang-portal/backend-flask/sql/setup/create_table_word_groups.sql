@@ -1,6 +1,7 @@
 CREATE TABLE IF NOT EXISTS word_groups (
   word_id INTEGER NOT NULL,
   group_id INTEGER NOT NULL,
+  position INTEGER,  -- Dense 0..words_count-1 within the group, kept by triggers for random sampling
   FOREIGN KEY (word_id) REFERENCES words(id),
   FOREIGN KEY (group_id) REFERENCES groups(id)
 );
\ No newline at end of file
@@ -5,4 +5,7 @@ CREATE TABLE IF NOT EXISTS word_reviews (
   wrong_count INTEGER DEFAULT 0,
   last_reviewed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   FOREIGN KEY (word_id) REFERENCES words(id)
-);
\ No newline at end of file
+);
+
+-- One row per word, whose counts grow as reviews are submitted
+CREATE UNIQUE INDEX IF NOT EXISTS idx_word_reviews_word ON word_reviews (word_id);
\ No newline at end of file
@@ -0,0 +1,27 @@
+-- Spaced repetition (SM-2) state of each word within a group
+CREATE TABLE IF NOT EXISTS word_schedules (
+  group_id INTEGER NOT NULL,
+  word_id INTEGER NOT NULL,
+  repetitions INTEGER NOT NULL DEFAULT 0,  -- Correct answers in a row
+  interval_days INTEGER NOT NULL DEFAULT 0,  -- Days between the last review and due_at
+  ease REAL NOT NULL DEFAULT 2.5,  -- SM-2 easiness factor, never below 1.3
+  due_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- When the word should next be studied
+  last_reviewed_at DATETIME,
+  PRIMARY KEY (group_id, word_id),
+  FOREIGN KEY (group_id) REFERENCES groups(id),
+  FOREIGN KEY (word_id) REFERENCES words(id)
+);
+
+-- Answers GET /groups/<id>/due with a range scan
+CREATE INDEX IF NOT EXISTS idx_word_schedules_group_due ON word_schedules (group_id, due_at);
+
+-- Words become due as soon as they join a group
+CREATE TRIGGER IF NOT EXISTS word_groups_schedule_insert AFTER INSERT ON word_groups
+BEGIN
+  INSERT OR IGNORE INTO word_schedules (group_id, word_id) VALUES (NEW.group_id, NEW.word_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_schedule_delete AFTER DELETE ON word_groups
+BEGIN
+  DELETE FROM word_schedules WHERE group_id = OLD.group_id AND word_id = OLD.word_id;
+END;
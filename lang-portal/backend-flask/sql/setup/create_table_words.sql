@@ -3,5 +3,8 @@ CREATE TABLE IF NOT EXISTS words (
   kanji TEXT NOT NULL,
   romaji TEXT NOT NULL,
   english TEXT NOT NULL,
-  parts TEXT NOT NULL  -- Store parts as JSON string
+  parts TEXT NOT NULL,  -- Store parts as JSON string
+  reading_kana TEXT,  -- Hiragana reading from lib/kana.reading_key, what typed answers are matched by
+  reading_hepburn TEXT,  -- The reading in Hepburn romaji
+  reading_kunrei TEXT  -- The reading in Kunrei-shiki romaji
 );
\ No newline at end of file
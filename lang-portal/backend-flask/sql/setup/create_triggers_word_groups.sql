@@ -0,0 +1,28 @@
+-- Group membership lookups from either side
+CREATE INDEX IF NOT EXISTS idx_word_groups_group ON word_groups (group_id, word_id);
+CREATE INDEX IF NOT EXISTS idx_word_groups_word ON word_groups (word_id);
+-- Sampling picks words by position
+CREATE UNIQUE INDEX IF NOT EXISTS idx_word_groups_position ON word_groups (group_id, position);
+
+-- Keep groups.words_count, groups.version, which changes whenever the words
+-- listed by /groups/<id>/words/raw do, and dense positions: a new word goes
+-- at the end and a removed word's position is taken by the last word
+CREATE TRIGGER IF NOT EXISTS word_groups_insert AFTER INSERT ON word_groups
+BEGIN
+  UPDATE word_groups SET position = (SELECT words_count FROM groups WHERE id = NEW.group_id)
+  WHERE rowid = NEW.rowid;
+  UPDATE groups SET words_count = words_count + 1, version = version + 1 WHERE id = NEW.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_delete AFTER DELETE ON word_groups
+BEGIN
+  UPDATE word_groups SET position = OLD.position
+  WHERE group_id = OLD.group_id AND position = (SELECT words_count - 1 FROM groups WHERE id = OLD.group_id);
+  UPDATE groups SET words_count = words_count - 1, version = version + 1 WHERE id = OLD.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_version_update AFTER UPDATE OF kanji, romaji, english ON words
+BEGIN
+  UPDATE groups SET version = version + 1
+  WHERE id IN (SELECT group_id FROM word_groups WHERE word_id = NEW.id);
+END;
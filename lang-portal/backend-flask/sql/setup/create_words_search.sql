@@ -0,0 +1,33 @@
+-- Full-text index of words for GET /words/search. The trigram tokenizer
+-- indexes every 3-character substring, so Japanese text without spaces and
+-- partial romaji or English both match; the text itself stays in words
+CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5(
+  kanji, romaji, english,
+  content='words', content_rowid='id',
+  tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS words_fts_insert AFTER INSERT ON words
+BEGIN
+  INSERT INTO words_fts (rowid, kanji, romaji, english) VALUES (NEW.id, NEW.kanji, NEW.romaji, NEW.english);
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_fts_delete AFTER DELETE ON words
+BEGIN
+  INSERT INTO words_fts (words_fts, rowid, kanji, romaji, english) VALUES ('delete', OLD.id, OLD.kanji, OLD.romaji, OLD.english);
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_fts_update AFTER UPDATE OF kanji, romaji, english ON words
+BEGIN
+  INSERT INTO words_fts (words_fts, rowid, kanji, romaji, english) VALUES ('delete', OLD.id, OLD.kanji, OLD.romaji, OLD.english);
+  INSERT INTO words_fts (rowid, kanji, romaji, english) VALUES (NEW.id, NEW.kanji, NEW.romaji, NEW.english);
+END;
+
+-- Queries shorter than a trigram match prefixes instead, through these
+-- (LIKE is case-insensitive, so the indexes must be NOCASE for it to use them)
+CREATE INDEX IF NOT EXISTS idx_words_kanji ON words (kanji COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_words_romaji ON words (romaji COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_words_english ON words (english COLLATE NOCASE);
+
+-- Typed answers are matched by reading in POST /words/match
+CREATE INDEX IF NOT EXISTS idx_words_reading_kana ON words (reading_kana);
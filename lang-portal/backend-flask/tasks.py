@@ -6,4 +6,51 @@ def init_db(c):
   from flask import Flask
   app = Flask(__name__)
   db.init(app)
-  print("Database initialized successfully.")
\ No newline at end of file
+  print("Database initialized successfully.")
+
+@task
+def migrate(c):
+  from migrate import run_migrations
+  run_migrations()
+
+@task
+def check_counters(c, fix=False):
+  """Compare the cached counters and word positions in words.db with fresh counts; --fix rewrites any that are off"""
+  import sqlite3
+  from lib.counters import check_counters as check
+  conn = sqlite3.connect('words.db')
+  try:
+    mismatches = check(conn, fix=fix)
+  finally:
+    conn.close()
+  for name, cached, actual in mismatches:
+    print(f"{name}: cached {cached}, actual {actual}" + (" (fixed)" if fix else ""))
+  if not mismatches:
+    print("All counters match.")
+  elif not fix:
+    raise SystemExit(1)
+
+@task
+def flush_reviews(c):
+  """Apply review submissions left in words-review-queue.db, e.g. by a server that stopped mid-flush"""
+  import os
+  import sqlite3
+  from lib.review_queue import ReviewQueue, queue_path
+  if not os.path.exists(queue_path('words.db')):
+    print("No review queue.")
+    return
+  applied = ReviewQueue(queue_path('words.db'), lambda: sqlite3.connect('words.db')).drain()
+  print(f"Applied {applied} queued review submissions.")
+
+@task
+def gen_data(c, db='words.db', words=100_000, groups=100, sessions=20_000, reviews=20, days=365, seed=0):
+  """Create a database of synthetic words, groups, sessions and reviews for benchmarking; --db must not exist yet"""
+  import os
+  import time
+  from lib.synthetic import generate
+  if os.path.exists(db):
+    raise SystemExit(f"{db} already exists; delete it or pass --db to write somewhere else.")
+  start = time.perf_counter()
+  counts = generate(db, words=words, groups=groups, sessions=sessions, reviews=reviews, days=days, seed=seed)
+  print(', '.join(f"{count:,} {table}" for table, count in counts.items()) +
+        f" written to {db} in {time.perf_counter() - start:.0f}s.")
@@ -0,0 +1,26 @@
+import pytest
+
+from lib.kana import reading_key
+
+@pytest.mark.parametrize('answer, key', [
+  # ん at the end of a word, written n, nn or n'
+  ('n', 'ん'),
+  ('nn', 'ん'),
+  ("n'", 'ん'),
+  ('hon', 'ほん'),
+  ('honn', 'ほん'),
+  ("hon'", 'ほん'),
+  # nn before a vowel at the end of a word is ん and a na-row kana
+  ('honna', 'ほんな'),
+  ('nna', 'んな'),
+  # ん in the middle of a word
+  ('shinbun', 'しんぶん'),
+  ('shinnbunn', 'しんぶん'),
+  ("kin'en", 'きんえん'),
+  ('kinen', 'きねん'),
+  ('konnichiha', 'こんにちは'),
+  ('sannin', 'さんにん'),
+  ('sanninn', 'さんにん'),
+])
+def test_n_spellings(answer, key):
+  assert reading_key(answer) == key
@@ -0,0 +1,46 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+from lib import scheduler
+
+SETUP_SQL = os.path.join(os.path.dirname(__file__), '..', 'sql', 'setup')
+GROUP_ID = 1
+WORD_ID = 1
+
+def schedules():
+  conn = sqlite3.connect(':memory:')
+  # word_schedules' triggers are on word_groups
+  for name in ('create_table_word_groups.sql', 'create_table_word_schedules.sql'):
+    with open(os.path.join(SETUP_SQL, name)) as file:
+      conn.executescript(file.read())
+  conn.execute("INSERT INTO word_schedules (group_id, word_id, due_at) VALUES (?, ?, '2000-01-01 00:00:00')",
+               (GROUP_ID, WORD_ID))
+  return conn
+
+def schedule(conn):
+  return conn.execute('SELECT repetitions, interval_days, due_at FROM word_schedules').fetchone()
+
+def test_right_answers_in_one_submission_take_one_step():
+  conn = schedules()
+  reviewed_at = datetime(2026, 1, 1)
+  scheduler.apply_reviews(conn.cursor(), GROUP_ID, [(WORD_ID, True)] * 20, reviewed_at)
+  assert schedule(conn) == (1, 1, '2026-01-02 00:00:00')
+
+def test_a_wrong_answer_in_a_submission_is_a_lapse():
+  conn = schedules()
+  conn.execute('UPDATE word_schedules SET repetitions = 3, interval_days = 15')
+  scheduler.apply_reviews(conn.cursor(), GROUP_ID, [(WORD_ID, True), (WORD_ID, False), (WORD_ID, True)],
+                          datetime(2026, 1, 1))
+  assert schedule(conn) == (0, 1, '2026-01-02 00:00:00')
+
+def test_right_answers_before_the_word_is_due_wait_for_it():
+  conn = schedules()
+  reviewed_at = datetime(2026, 1, 1)
+  for minutes in range(20):
+    scheduler.apply_reviews(conn.cursor(), GROUP_ID, [(WORD_ID, True)], reviewed_at + timedelta(minutes=minutes))
+  assert schedule(conn) == (1, 1, '2026-01-02 00:00:00')
+
+  # Once due, the next right answer moves it on
+  scheduler.apply_reviews(conn.cursor(), GROUP_ID, [(WORD_ID, True)], reviewed_at + timedelta(days=1))
+  assert schedule(conn) == (2, 6, '2026-01-08 00:00:00')
@@ -2,7 +2,7 @@
 # bedrock_chat.py
 import boto3
 import streamlit as st
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator
 
 
 # Model ID
@@ -38,6 +38,29 @@ class BedrockChat:
             st.error(f"Error generating response: {str(e)}")
             return None
 
+    def generate_response_stream(self, message: str, inference_config: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Stream a response from Amazon Bedrock, yielding text as it arrives"""
+        if inference_config is None:
+            inference_config = {"temperature": 0.7}
+
+        messages = [{
+            "role": "user",
+            "content": [{"text": message}]
+        }]
+
+        try:
+            response = self.bedrock_client.converse_stream(
+                modelId=self.model_id,
+                messages=messages,
+                inferenceConfig=inference_config
+            )
+            for event in response['stream']:
+                if 'contentBlockDelta' in event:
+                    yield event['contentBlockDelta']['delta'].get('text', '')
+
+        except Exception as e:
+            st.error(f"Error generating response: {str(e)}")
+
 
 if __name__ == "__main__":
     chat = BedrockChat()
@@ -9,6 +9,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.chat import BedrockChat
+from backend.text_stats import text_stats
 
 
 # Page config
@@ -158,27 +159,17 @@ def process_message(message: str):
 
     # Generate and display assistant's response
     with st.chat_message("assistant", avatar="🤖"):
-        response = st.session_state.bedrock_chat.generate_response(message)
+        # Render tokens as they arrive instead of waiting for the full response
+        response = st.write_stream(st.session_state.bedrock_chat.generate_response_stream(message))
         if response:
-            st.markdown(response)
             st.session_state.messages.append({"role": "assistant", "content": response})
 
 
 
 def count_characters(text):
     """Count Japanese and total characters in text"""
-    if not text:
-        return 0, 0
-        
-    def is_japanese(char):
-        return any([
-            '\u4e00' <= char <= '\u9fff',  # Kanji
-            '\u3040' <= char <= '\u309f',  # Hiragana
-            '\u30a0' <= char <= '\u30ff',  # Katakana
-        ])
-    
-    jp_chars = sum(1 for char in text if is_japanese(char))
-    return jp_chars, len(text)
+    stats = text_stats(text)
+    return stats["japanese"], stats["total"]
 
 def render_transcript_stage():
     """Render the raw transcript stage"""
@@ -226,7 +217,8 @@ def render_transcript_stage():
         if st.session_state.transcript:
             # Calculate stats
             jp_chars, total_chars = count_characters(st.session_state.transcript)
-            total_lines = len(st.session_state.transcript.split('\n'))
+            # Cached by content hash, so reruns don't rescan the transcript
+            total_lines = text_stats(st.session_state.transcript)["lines"]
             
             # Display stats
             st.metric("Total Characters", total_chars)
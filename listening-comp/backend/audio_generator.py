@@ -0,0 +1,321 @@
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+# Speaker labels at the start of a conversation line, e.g. 男：, 女の人:, 店員：
+SPEAKER_LABEL = re.compile(r"([^\s:：「」。、]{1,6})[:：]")
+
+# Silence between lines, in seconds
+PAUSE_SECONDS = 0.4
+
+DEFAULT_VOICES = {"narrator": "narrator", "male": "male", "female": "female", "other": "other"}
+
+# "pyttsx3" for speech, or "stub" for placeholder tones without a TTS install
+TTS_ENGINE = os.getenv("TTS_ENGINE", "pyttsx3")
+
+# "ja" as a whole word in a voice id, e.g. espeak's jpx/ja or SAPI's TTS_MS_JA-JP_HARUKA_11.0
+JAPANESE_VOICE_ID = re.compile(r"(?<![a-z])(ja|japanese)(?![a-z])")
+
+
+def is_japanese_voice(voice) -> bool:
+    """True for a pyttsx3 voice that reads Japanese, by its languages or its id"""
+    for language in getattr(voice, "languages", None) or []:
+        if isinstance(language, bytes):
+            # espeak prefixes its language codes with a priority byte
+            language = language[1:].decode("ascii", "ignore")
+        if language.lower().replace("-", "_").split("_")[0] == "ja":
+            return True
+    return bool(JAPANESE_VOICE_ID.search(str(voice.id).lower()))
+
+
+def _extended_float(data: bytes) -> float:
+    # The 80-bit IEEE 754 extended float AIFF stores sample rates in
+    exponent, mantissa = struct.unpack(">HQ", data)
+    sign = -1 if exponent & 0x8000 else 1
+    return sign * mantissa * 2.0 ** ((exponent & 0x7FFF) - 16383 - 63)
+
+
+def to_wav(audio: bytes) -> bytes:
+    """audio as PCM WAV, converting the AIFF that some pyttsx3 drivers (NSSpeech) write"""
+    if audio[:4] == b"RIFF" and audio[8:12] == b"WAVE":
+        return audio
+    if audio[:4] != b"FORM" or audio[8:12] not in (b"AIFF", b"AIFC"):
+        raise ValueError(f"TTS output is neither WAV nor AIFF (starts with {audio[:12]!r})")
+
+    comm, frames, offset = None, None, 12
+    while offset + 8 <= len(audio):
+        chunk_id, size = struct.unpack(">4sI", audio[offset:offset + 8])
+        body = audio[offset + 8:offset + 8 + size]
+        if chunk_id == b"COMM":
+            comm = body
+        elif chunk_id == b"SSND":
+            data_offset = struct.unpack(">I", body[:4])[0]
+            frames = body[8 + data_offset:]
+        offset += 8 + size + (size & 1)
+    if comm is None or frames is None:
+        raise ValueError("AIFF TTS output has no COMM or SSND chunk")
+
+    channels, _, bits = struct.unpack(">hIh", comm[:8])
+    rate = int(_extended_float(comm[8:18]))
+    compression = comm[18:22] if audio[8:12] == b"AIFC" else b"NONE"
+    width = (bits + 7) // 8
+    frames = frames[:len(frames) - len(frames) % (width * channels)]
+    if compression == b"NONE":
+        # AIFF samples are big-endian, and 8-bit ones signed where WAV's are unsigned
+        if width == 1:
+            frames = bytes((sample + 128) & 0xFF for sample in frames)
+        else:
+            swapped = bytearray(len(frames))
+            for byte in range(width):
+                swapped[byte::width] = frames[width - 1 - byte::width]
+            frames = bytes(swapped)
+    elif compression != b"sowt":  # sowt is already little-endian
+        raise ValueError(f"AIFF TTS output is compressed ({compression!r}); only PCM can be joined")
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(channels)
+        out.setsampwidth(width)
+        out.setframerate(rate)
+        out.writeframes(frames)
+    return buffer.getvalue()
+
+
+class StubTTSEngine:
+    def __init__(self, sample_rate: int = 16000, seconds_per_char: float = 0.15, latency: float = 0.0):
+        """Offline stand-in that renders a tone per character, pitched by voice.
+
+        latency simulates the per-call delay of a real TTS backend.
+        """
+        self.name = "stub"
+        self.sample_rate = sample_rate
+        self.seconds_per_char = seconds_per_char
+        self.latency = latency
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        if self.latency:
+            time.sleep(self.latency)
+        frequency = 180 + int(hashlib.sha256(voice.encode("utf-8")).hexdigest()[:4], 16) % 240
+        frames = int(self.sample_rate * self.seconds_per_char * max(len(text), 1))
+        samples = (int(8000 * math.sin(2 * math.pi * frequency * i / self.sample_rate)) for i in range(frames))
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(self.sample_rate)
+            out.writeframes(struct.pack(f"<{frames}h", *samples))
+        return buffer.getvalue()
+
+
+class Pyttsx3Engine:
+    def __init__(self):
+        """Local offline TTS through pyttsx3 (espeak, SAPI5 or NSSpeech).
+
+        pyttsx3 drivers aren't thread safe, so calls are serialized. Voices may
+        be ids of installed Japanese voices; other names (like the DEFAULT_VOICES ones) are
+        given the installed Japanese voices in turn, so each speaker still
+        sounds distinct where there are several.
+        """
+        import pyttsx3
+        self.name = "pyttsx3"
+        self.engine = pyttsx3.init()
+        voices = self.engine.getProperty("voices")
+        self.voice_ids = [voice.id for voice in voices if is_japanese_voice(voice)]
+        if not self.voice_ids:
+            raise RuntimeError(f"none of the {len(voices)} installed voices reads Japanese; install one "
+                               f"(espeak-ng's ja, or the Japanese voice pack on Windows and macOS)")
+        self.assigned: Dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        with self.lock:
+            fd, tmp_path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            try:
+                if voice not in self.voice_ids:
+                    voice = self.assigned.setdefault(voice, self.voice_ids[len(self.assigned) % len(self.voice_ids)])
+                self.engine.setProperty("voice", voice)
+                self.engine.save_to_file(text, tmp_path)
+                self.engine.runAndWait()
+                with open(tmp_path, "rb") as f:
+                    return f.read()
+            finally:
+                os.remove(tmp_path)
+
+
+def default_engine():
+    """The TTS_ENGINE engine. A missing or broken pyttsx3 is an error, not a silent switch to tones."""
+    if TTS_ENGINE == "stub":
+        return StubTTSEngine()
+    try:
+        return Pyttsx3Engine()
+    except Exception as e:
+        raise RuntimeError(f"Offline TTS unavailable: {str(e)}. Install pyttsx3 and a speech driver "
+                           f"(espeak on Linux), or set TTS_ENGINE=stub for placeholder tones.") from e
+
+
+class AudioGenerator:
+    def __init__(self, engine=None, cache_dir: str = "backend/audio/cache", output_dir: str = "backend/audio",
+                 voices: Optional[Dict[str, str]] = None, max_workers: int = 4):
+        """Render questions to WAV with a voice per speaker.
+
+        Each (text, voice) line is synthesized once and cached on disk, so
+        phrases shared between questions are reused; lines are synthesized in
+        parallel and joined by copying their PCM frames.
+        """
+        self.engine = engine or default_engine()
+        self.cache_dir = cache_dir
+        self.output_dir = output_dir
+        self.voices = {**DEFAULT_VOICES, **(voices or {})}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+        self.stats = {"synthesized": 0, "cache_hits": 0}
+        self.stats_lock = threading.Lock()
+
+    def voice_for(self, speaker: Optional[str], speakers: List[str]) -> str:
+        if speaker is None:
+            return self.voices["narrator"]
+        if "男" in speaker:
+            return self.voices["male"]
+        if "女" in speaker:
+            return self.voices["female"]
+        # Other speakers take turns with the remaining voices in order of appearance
+        return (self.voices["male"], self.voices["female"], self.voices["other"])[speakers.index(speaker) % 3]
+
+    def split_lines(self, question: Dict) -> List[Tuple[str, str]]:
+        """The (text, voice) lines of a question in reading order"""
+        lines = []
+        intro = question.get("Introduction") or question.get("Situation")
+        if intro:
+            lines.append((intro, self.voices["narrator"]))
+
+        conversation = question.get("Conversation", "")
+        labels = list(SPEAKER_LABEL.finditer(conversation))
+        speakers = list(dict.fromkeys(label.group(1) for label in labels))
+        if labels and labels[0].start() > 0:
+            lines.append((conversation[:labels[0].start()], self.voices["narrator"]))
+        for label, following in zip(labels, labels[1:] + [None]):
+            text = conversation[label.end():following.start() if following else len(conversation)]
+            lines.append((text, self.voice_for(label.group(1), speakers)))
+        if conversation and not labels:
+            lines.append((conversation, self.voices["narrator"]))
+
+        if question.get("Question"):
+            lines.append((question["Question"], self.voices["narrator"]))
+        return [(text.strip(), voice) for text, voice in lines if text.strip()]
+
+    def cache_path(self, text: str, voice: str) -> str:
+        key = hashlib.sha256(f"{self.engine.name}\0{voice}\0{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    @staticmethod
+    def _is_wav(path: str) -> bool:
+        # Segments cached before outputs were converted may be AIFF
+        with open(path, "rb") as f:
+            header = f.read(12)
+        return header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+
+    def _segment(self, text: str, voice: str) -> str:
+        """Path of the cached WAV for a line, synthesizing it on a miss"""
+        path = self.cache_path(text, voice)
+        if os.path.exists(path) and self._is_wav(path):
+            with self.stats_lock:
+                self.stats["cache_hits"] += 1
+            return path
+        # Checked before caching, so only WAV segments reach concatenate
+        audio = to_wav(self.engine.synthesize(text, voice))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+        with self.stats_lock:
+            self.stats["synthesized"] += 1
+        return path
+
+    def _output_path(self, lines: List[Tuple[str, str]]) -> str:
+        question_hash = hashlib.sha256(
+            json.dumps([self.engine.name, lines], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:32]
+        return os.path.join(self.output_dir, f"{question_hash}.wav")
+
+    def generate_audio(self, question: Dict) -> Optional[str]:
+        """Render a question to a WAV file and return its path"""
+        return self.generate_many([question])[0]
+
+    def generate_many(self, questions: List[Dict]) -> List[Optional[str]]:
+        """Render several questions, synthesizing all their distinct lines in one parallel batch"""
+        rendered = [(lines, self._output_path(lines)) for lines in map(self.split_lines, questions)]
+        pending = [(lines, path) for lines, path in rendered if lines and not os.path.exists(path)]
+
+        # Lines repeated within or across questions are synthesized once
+        unique = list(dict.fromkeys(line for lines, _ in pending for line in lines))
+        segments = dict(zip(unique, self.executor.map(lambda line: self._segment(*line), unique)))
+        for lines, path in pending:
+            self.concatenate([segments[line] for line in lines], path)
+        return [path if lines else None for lines, path in rendered]
+
+    def concatenate(self, segment_paths: List[str], output_path: str, pause: float = PAUSE_SECONDS):
+        """Join WAV segments with pauses by copying frames; all segments must share one format"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_path) or ".", suffix=".tmp")
+        os.close(fd)
+        params = None
+        with wave.open(tmp_path, "wb") as out:
+            for idx, path in enumerate(segment_paths):
+                with wave.open(path, "rb") as segment:
+                    segment_params = segment.getparams()[:3]
+                    if params is None:
+                        params = segment_params
+                        out.setnchannels(params[0])
+                        out.setsampwidth(params[1])
+                        out.setframerate(params[2])
+                    elif segment_params != params:
+                        raise ValueError(f"Segment {path} has format {segment_params}, expected {params}")
+                    if idx:
+                        out.writeframes(b"\0" * int(pause * params[2]) * params[0] * params[1])
+                    out.writeframes(segment.readframes(segment.getnframes()))
+        os.replace(tmp_path, output_path)
+
+    def duration(self, path: str) -> float:
+        with wave.open(path, "rb") as audio:
+            return audio.getnframes() / audio.getframerate()
+
+
+if __name__ == "__main__":
+    # Seconds of audio produced per wall-clock second, with a stub engine taking 300ms per line
+    import shutil
+
+    openers = ["すみません、ちょっといいですか。", "あのう、田中さん。", "ねえ、聞いて。"]
+    questions = [
+        {"Introduction": "会社で男の人と女の人が話しています。",
+         "Conversation": f"男：{openers[i % 3]}明日の会議は{i % 5 + 1}時からですか。"
+                         f"女：{openers[(i + 1) % 3]}いいえ、{i % 4 + 2}時からに変わりました。"
+                         f"男：そうですか。わかりました。",
+         "Question": "会議は何時からですか。"}
+        for i in range(20)
+    ]
+
+    for label, workers, batch in [("sequential", 1, False), ("parallel, per question", 8, False),
+                                  ("parallel, batched", 8, True)]:
+        directory = tempfile.mkdtemp()
+        try:
+            generator = AudioGenerator(StubTTSEngine(latency=0.3), cache_dir=os.path.join(directory, "cache"),
+                                       output_dir=directory, max_workers=workers)
+            start = time.perf_counter()
+            paths = generator.generate_many(questions) if batch else [generator.generate_audio(q) for q in questions]
+            elapsed = time.perf_counter() - start
+            audio_seconds = sum(generator.duration(path) for path in paths)
+            print(f"{label:24s} {audio_seconds / elapsed:6.1f} s of audio/s  "
+                  f"({audio_seconds:.0f}s in {elapsed:.1f}s, {generator.stats})")
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,68 @@
+"""Time-to-first-token of the streaming chat methods against the full-response wait.
+
+Both chat classes are driven by local stub clients that emit 40 chunks, the
+first after 300ms and the rest every 50ms, so no API keys are needed:
+
+    python -m backend.bench_streaming
+"""
+import time
+from types import SimpleNamespace
+
+from .chat import BedrockChat, GeminiChat
+
+FIRST_CHUNK_DELAY = 0.3
+CHUNK_DELAY = 0.05
+CHUNKS = 40
+
+
+def stub_chunks():
+    time.sleep(FIRST_CHUNK_DELAY)
+    for i in range(CHUNKS):
+        if i:
+            time.sleep(CHUNK_DELAY)
+        yield f"token{i} "
+
+
+class StubGeminiModels:
+    def generate_content(self, model, contents, config=None):
+        return SimpleNamespace(text="".join(stub_chunks()))
+
+    def generate_content_stream(self, model, contents, config=None):
+        for text in stub_chunks():
+            yield SimpleNamespace(text=text)
+
+
+class StubBedrockClient:
+    def converse(self, modelId, messages, inferenceConfig):
+        text = "".join(stub_chunks())
+        return {'output': {'message': {'content': [{'text': text}]}}}
+
+    def converse_stream(self, modelId, messages, inferenceConfig):
+        events = ({'contentBlockDelta': {'delta': {'text': text}}} for text in stub_chunks())
+        return {'stream': events}
+
+
+def measure(name: str, full_response, stream):
+    start = time.perf_counter()
+    full_response()
+    full = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first = None
+    for _ in stream():
+        if first is None:
+            first = time.perf_counter() - start
+    total = time.perf_counter() - start
+    print(f"{name:8s} full response wait={full * 1000:6.0f}ms  "
+          f"streaming first token={first * 1000:6.0f}ms (complete {total * 1000:.0f}ms)")
+
+
+if __name__ == "__main__":
+    gemini = GeminiChat.__new__(GeminiChat)
+    gemini.client = SimpleNamespace(models=StubGeminiModels())
+    measure("Gemini", lambda: gemini.generate_response("hi"), lambda: gemini.generate_response_stream("hi"))
+
+    bedrock = BedrockChat.__new__(BedrockChat)
+    bedrock.bedrock_client = StubBedrockClient()
+    bedrock.model_id = "stub"
+    measure("Bedrock", lambda: bedrock.generate_response("hi"), lambda: bedrock.generate_response_stream("hi"))
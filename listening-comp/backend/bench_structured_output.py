@@ -0,0 +1,92 @@
+"""Wasted LLM calls with and without schema-constrained generation, on a corpus of malformed outputs.
+
+A stub Gemini client replays each malformed output followed by a valid
+one, in the JSON form for structured_output and in the free-text form for
+the line parser, so no API keys are needed:
+
+    python -m backend.bench_structured_output
+
+A call is wasted when it doesn't produce a usable question: a rejected
+output in JSON mode, which is retried, a broken question delivered in
+free-text mode, or the LLM feedback call needed to answer a question that
+has no answer key. How often the live model produces each defect in
+either mode isn't measured here.
+"""
+from types import SimpleNamespace
+
+from .question_generator import QuestionGenerator
+from .question_pool import is_valid_question
+
+SECTION = 3
+VALID_JSON = ('{"Situation": "雨", "Question": "何と言いますか", "Options": ["a", "b", "c", "d"], '
+              '"Answer": 2, "Explanation": "b fits"}')
+VALID_TEXT = "Situation: 雨\nQuestion: 何と言いますか\nOptions:\n1. a\n2. b\n3. c\n4. d\nAnswer: 2\nExplanation: b fits"
+
+# Defects seen from free-text generation: (JSON mode output, free-text mode output)
+MALFORMED = {
+    "markdown fence": ('```json\n{"Situation": "雨"}\n```', "```\nSituation: 雨\nQuestion: 何と言いますか\n```"),
+    "three options": ('{"Situation": "雨", "Question": "q", "Options": ["a", "b", "c"], "Answer": 1, "Explanation": "e"}',
+                      "Situation: 雨\nQuestion: q\nOptions:\n1. a\n2. b\n3. c\nAnswer: 1\nExplanation: e"),
+    "answer out of range": ('{"Situation": "雨", "Question": "q", "Options": ["a", "b", "c", "d"], '
+                            '"Answer": 5, "Explanation": "e"}',
+                            "Situation: 雨\nQuestion: q\nOptions:\n1. a\n2. b\n3. c\n4. d\nAnswer: 5\nExplanation: e"),
+    "missing answer": ('{"Situation": "雨", "Question": "q", "Options": ["a", "b", "c", "d"]}',
+                       "Situation: 雨\nQuestion: q\nOptions:\n1. a\n2. b\n3. c\n4. d"),
+    "prose": ('Situation: 雨\nQuestion: 何と言いますか\nOptions:\n1. a\n2. b',
+              "Here is a new question about the weather. The speaker is caught in the rain."),
+    "truncated": ('{"Situation": "雨", "Question": "何と言', "Situation: 雨\nQuestion: 何と言"),
+}
+
+
+class StubModels:
+    """Stands in for client.models: returns the queued outputs in order and counts calls.
+
+    An exception in the queue is raised instead, like a failed request.
+    """
+    def __init__(self, outputs):
+        self.outputs = list(outputs)
+        self.calls = 0
+
+    def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        output = self.outputs.pop(0)
+        if isinstance(output, Exception):
+            raise output
+        return SimpleNamespace(text=output)
+
+
+def generator(models, structured_output: bool = True) -> QuestionGenerator:
+    client = SimpleNamespace(client=SimpleNamespace(models=models))
+    return QuestionGenerator(gemini_client=client, vector_store=SimpleNamespace(), structured_output=structured_output)
+
+
+def run(structured_output: bool) -> dict:
+    """Generate one question per malformed output, then answer it once"""
+    totals = {"calls": 0, "wasted": 0, "usable": 0, "broken": 0, "feedback_calls": 0}
+    for json_output, text_output in MALFORMED.values():
+        # Only JSON mode retries, so only it gets to the valid output
+        outputs = [json_output, VALID_JSON] if structured_output else [text_output]
+        models = StubModels(outputs + ['{"correct": true, "explanation": "e", "correct_answer": 2}'])
+        question_generator = generator(models, structured_output)
+        question = question_generator._generate_from_context(SECTION, "weather", "")
+        valid = is_valid_question(SECTION, question)
+        generation_calls = models.calls
+        totals["usable"] += valid
+        totals["broken"] += bool(question) and not valid
+        # Without a situation there is nothing to show, let alone answer
+        if question and question.get('Situation'):
+            # Checked locally when the question has an answer key, by the LLM when not
+            question_generator.get_feedback(question, 1)
+        totals["feedback_calls"] += models.calls - generation_calls
+        totals["calls"] += models.calls
+        # Every call but the one that produced a usable question
+        totals["wasted"] += models.calls - valid
+    return totals
+
+
+if __name__ == "__main__":
+    print(f"{len(MALFORMED)} malformed outputs, each followed by a valid one in JSON mode")
+    for label, structured_output in (("free text", False), ("JSON schema", True)):
+        totals = run(structured_output)
+        print(f"{label:12s} {totals['calls']:3d} calls   {totals['wasted']:3d} wasted   {totals['usable']} usable questions   "
+              f"{totals['broken']} broken questions delivered   {totals['feedback_calls']} feedback calls")
@@ -0,0 +1,46 @@
+"""Throughput of YouTubeTranscriptDownloader.download_many against sequential fetches.
+
+Transcripts come from a local fake provider that takes 100ms per video, and a
+fake playlist of 200 videos, so no network access is needed:
+
+    python -m backend.bench_transcripts
+"""
+import shutil
+import tempfile
+import time
+
+from .get_transcript import YouTubeTranscriptDownloader
+
+FETCH_DELAY = 0.1
+VIDEOS = 200
+
+
+def fake_transcript(video_id, languages):
+    time.sleep(FETCH_DELAY)
+    return [{"text": f"{video_id} の文 {i}", "start": i * 2.5, "duration": 2.5} for i in range(300)]
+
+
+def fake_playlist(playlist_id):
+    return [f"{playlist_id[:5]}{i:06d}" for i in range(VIDEOS)]
+
+
+def run(name: str, max_workers: int, passes: int = 1):
+    directory = tempfile.mkdtemp()
+    try:
+        downloader = YouTubeTranscriptDownloader(transcript_dir=directory, transcript_provider=fake_transcript,
+                                                 playlist_provider=fake_playlist, max_workers=max_workers)
+        for attempt in range(passes):
+            start = time.perf_counter()
+            status = downloader.download_many(["https://www.youtube.com/playlist?list=PLbench"])
+            elapsed = time.perf_counter() - start
+            label = name if attempt == 0 else f"{name}, cached rerun"
+            counts = {s: list(status.values()).count(s) for s in set(status.values())}
+            print(f"{label:40s} {len(status) / elapsed:8.1f} videos/s  {counts}")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    run("sequential (1 worker)", 1)
+    run("download_many (8 workers)", 8)
+    run("download_many (32 workers)", 32, passes=2)
@@ -0,0 +1,236 @@
+"""Generate questions offline in bulk and index them into the vector store.
+
+    python -m backend.bulk_generate --topics "Shopping,Travel" --count 20 --sections 2 3
+    python -m backend.bulk_generate --topics-file topics.txt --count 50 --concurrency 8 --rate 60
+
+Progress is checkpointed after every indexed batch, so rerunning the same
+command after an interruption only generates what is still missing.
+Use --stub to exercise the pipeline without Gemini or Chroma.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List
+
+from .question_pool import is_indexed_duplicate, is_valid_question, question_text
+
+
+class RateLimiter:
+    def __init__(self, per_minute: float):
+        """Spaces calls evenly so no more than per_minute start in any minute; 0 disables the limit"""
+        self.interval = 60.0 / per_minute if per_minute else 0
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(self.next_time, now)
+            self.next_time = start + self.interval
+        time.sleep(max(0.0, start - now))
+
+
+class Checkpoint:
+    def __init__(self, path: str):
+        """Number of indexed questions per (section, topic), persisted atomically"""
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.indexed: Dict[str, int] = json.load(f)["indexed"]
+        except FileNotFoundError:
+            self.indexed = {}
+
+    def save(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"indexed": self.indexed}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class BulkGenerator:
+    def __init__(self, generator, checkpoint: Checkpoint, concurrency: int = 4,
+                 rate_per_minute: float = 0, batch_size: int = 20):
+        self.generator = generator
+        self.vector_store = generator.vector_store
+        self.checkpoint = checkpoint
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate_per_minute)
+        self.batch_size = batch_size
+        self.batches: Dict[int, List[Dict]] = {}
+        self.batch_keys: Dict[int, List[str]] = {}
+        self.seen = set()
+        self.stats = {"generated": 0, "accepted": 0, "invalid": 0, "duplicates": 0}
+
+    def _generate(self, section_num: int, topic: str):
+        self.limiter.wait()
+        return self.generator.generate_similar_question(section_num, topic)
+
+    def _accept(self, section_num: int, key: str, question: Dict) -> bool:
+        self.stats["generated"] += 1
+        if not is_valid_question(section_num, question):
+            self.stats["invalid"] += 1
+            return False
+        text = question_text(section_num, question)
+        if text in self.seen or is_indexed_duplicate(self.vector_store, section_num, question):
+            self.stats["duplicates"] += 1
+            return False
+        self.seen.add(text)
+        self.stats["accepted"] += 1
+        self.batches.setdefault(section_num, []).append(question)
+        self.batch_keys.setdefault(section_num, []).append(key)
+        if len(self.batches[section_num]) >= self.batch_size:
+            self.flush(section_num)
+        return True
+
+    def flush(self, section_num: int):
+        """Index a section's pending batch and record what was indexed in the checkpoint"""
+        batch = self.batches.pop(section_num, [])
+        keys = self.batch_keys.pop(section_num, [])
+        if not batch:
+            return
+        by_key: Dict[str, List[Dict]] = {}
+        for key, question in zip(keys, batch):
+            by_key.setdefault(key, []).append(question)
+        # Indexed a topic at a time, so near-duplicates add_questions drops are
+        # charged to their own topic and a rerun generates replacements
+        for key, questions in by_key.items():
+            # A fresh pseudo video id per call keeps the generated Chroma ids unique
+            added = self.vector_store.add_questions(section_num, questions, f"generated-{uuid.uuid4().hex[:12]}")
+            self.stats["accepted"] -= len(questions) - added
+            self.stats["duplicates"] += len(questions) - added
+            self.checkpoint.indexed[key] = self.checkpoint.indexed.get(key, 0) + added
+        self.checkpoint.save()
+
+    def run(self, sections: List[int], topics: List[str], count: int):
+        remaining = {}
+        for section_num in sections:
+            for topic in topics:
+                key = f"{section_num}:{topic}"
+                missing = count - self.checkpoint.indexed.get(key, 0)
+                if missing > 0:
+                    remaining[key] = (section_num, topic, missing)
+        # Give up on a (section, topic) after this many rejected generations
+        attempts_left = {key: missing * 3 for key, (_, _, missing) in remaining.items()}
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            in_flight = {}
+
+            def schedule():
+                for key, (section_num, topic, missing) in remaining.items():
+                    while (missing - sum(1 for k in in_flight.values() if k == key) > 0
+                           and attempts_left[key] > 0 and len(in_flight) < self.concurrency * 2):
+                        attempts_left[key] -= 1
+                        in_flight[executor.submit(self._generate, section_num, topic)] = key
+
+            schedule()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = in_flight.pop(future)
+                    section_num, topic, missing = remaining[key]
+                    try:
+                        question = future.result()
+                    except Exception as e:
+                        print(f"Error generating question for {key}: {str(e)}")
+                        question = None
+                    if self._accept(section_num, key, question):
+                        remaining[key] = (section_num, topic, missing - 1)
+                schedule()
+
+        for section_num in list(self.batches):
+            self.flush(section_num)
+
+
+class StubVectorStore:
+    """In-memory stand-in for QuestionVectorStore used by --stub"""
+
+    def __init__(self):
+        self.texts = {2: set(), 3: set()}
+
+    def search_similar_questions(self, section_num, query, n_results=5):
+        return [{'similarity_score': 0.0}] if query in self.texts[section_num] else []
+
+    def is_near_duplicate(self, section_num, question):
+        return question_text(section_num, question) in self.texts[section_num]
+
+    def add_questions(self, section_num, questions, video_id):
+        added = 0
+        for question in questions:
+            text = question_text(section_num, question)
+            if text not in self.texts[section_num]:
+                self.texts[section_num].add(text)
+                added += 1
+        return added
+
+
+class StubGenerator:
+    """Sleeps like an LLM call and repeats itself often enough to exercise dedupe"""
+
+    def __init__(self, latency: float = 0.2):
+        self.vector_store = StubVectorStore()
+        self.latency = latency
+
+    def generate_similar_question(self, section_num, topic):
+        time.sleep(self.latency)
+        variant = random.randint(1, 40)
+        question = {"Question": f"{topic} question {variant}", "Options": ["1", "2", "3", "4"],
+                    "Answer": random.randint(1, 4), "Explanation": "stub"}
+        if section_num == 2:
+            question.update({"Introduction": topic, "Conversation": f"会話 {variant}"})
+        else:
+            question["Situation"] = f"{topic} {variant}"
+        return question
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", default="", help="comma separated topics")
+    parser.add_argument("--topics-file", help="file with one topic per line")
+    parser.add_argument("--count", type=int, default=10, help="questions per section and topic")
+    parser.add_argument("--sections", type=int, nargs="+", default=[2, 3], choices=[2, 3])
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=0, help="max LLM calls per minute (0 = unlimited)")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--checkpoint", default="backend/bulk_generate_checkpoint.json")
+    parser.add_argument("--stub", action="store_true", help="use a stub LLM and in-memory vector store")
+    args = parser.parse_args()
+
+    topics = [t.strip() for t in args.topics.split(",") if t.strip()]
+    if args.topics_file:
+        with open(args.topics_file, 'r', encoding='utf-8') as f:
+            topics += [line.strip() for line in f if line.strip()]
+    if not topics:
+        parser.error("no topics given")
+
+    if args.stub:
+        generator = StubGenerator()
+        checkpoint = Checkpoint(os.path.join(tempfile.mkdtemp(), "checkpoint.json"))
+    else:
+        from .question_generator import QuestionGenerator
+        generator = QuestionGenerator()
+        checkpoint = Checkpoint(args.checkpoint)
+
+    bulk = BulkGenerator(generator, checkpoint, args.concurrency, args.rate, args.batch_size)
+    start = time.perf_counter()
+    bulk.run(args.sections, topics, args.count)
+    minutes = (time.perf_counter() - start) / 60
+
+    stats = bulk.stats
+    print(f"Generated {stats['generated']}, accepted {stats['accepted']}, "
+          f"invalid {stats['invalid']}, duplicates {stats['duplicates']}")
+    print(f"{stats['accepted'] / minutes:.1f} accepted questions/minute, "
+          f"duplicate rejection rate {stats['duplicates'] / max(1, stats['generated']):.1%}")
+
+
+if __name__ == "__main__":
+    main()
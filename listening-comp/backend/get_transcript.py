@@ -1,10 +1,50 @@
 from youtube_transcript_api import YouTubeTranscriptApi
-from typing import Optional, List, Dict
+from .transcript_archive import TranscriptArchive
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, List, Dict, Iterable
+from urllib.parse import parse_qs, urlparse
+import urllib.request
+import json
+import os
+import re
+import tempfile
+import time
+
+# Video ids embedded in a playlist page's initial data
+PLAYLIST_VIDEO_ID = re.compile(r'"videoId":"([A-Za-z0-9_-]{11})"')
+
+
+def write_atomic(path: str, text: str):
+    """Write text to path via a temp file so readers never see a partial file"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
 
 
 class YouTubeTranscriptDownloader:
-    def __init__(self, languages: List[str] = ["ja", "en"]):
+    def __init__(self, languages: List[str] = ["ja", "en"], transcript_dir: str = "backend/transcripts",
+                 transcript_provider: Optional[Callable[[str, List[str]], List[Dict]]] = None,
+                 playlist_provider: Optional[Callable[[str], List[str]]] = None,
+                 max_workers: int = 8):
+        """
+        Args:
+            languages: Preferred transcript languages, in order
+            transcript_dir: Where transcripts and their cache entries are written
+            transcript_provider: fn(video_id, languages) -> transcript; YouTubeTranscriptApi by default
+            playlist_provider: fn(playlist_id) -> video ids; scrapes the playlist page by default
+            max_workers: Concurrent downloads in download_many
+        """
         self.languages = languages
+        self.transcript_dir = transcript_dir
+        self.cache_dir = os.path.join(transcript_dir, "cache")
+        self.transcript_provider = transcript_provider or (
+            lambda video_id, languages: YouTubeTranscriptApi.get_transcript(video_id, languages=languages)
+        )
+        self.playlist_provider = playlist_provider or self.fetch_playlist_video_ids
+        self.max_workers = max_workers
 
     def extract_video_id(self, url: str) -> Optional[str]:
         """
@@ -22,6 +62,40 @@ class YouTubeTranscriptDownloader:
             return url.split("youtu.be/")[1][:11]
         return None
 
+    def extract_playlist_id(self, url: str) -> Optional[str]:
+        """Return the list= parameter of a YouTube URL, if any"""
+        playlist = parse_qs(urlparse(url).query).get("list")
+        return playlist[0] if playlist else None
+
+    def fetch_playlist_video_ids(self, playlist_id: str) -> List[str]:
+        """Scrape the video ids of a playlist from its public page (first page of results only)"""
+        request = urllib.request.Request(
+            f"https://www.youtube.com/playlist?list={playlist_id}",
+            headers={"User-Agent": "Mozilla/5.0", "Accept-Language": "en"},
+        )
+        with urllib.request.urlopen(request, timeout=30) as response:
+            html = response.read().decode("utf-8", errors="replace")
+        return list(dict.fromkeys(PLAYLIST_VIDEO_ID.findall(html)))
+
+    def resolve_video_ids(self, sources: Iterable[str]) -> List[str]:
+        """Turn video ids, video URLs and playlist URLs into a de-duplicated list of video ids"""
+        video_ids = []
+        for source in sources:
+            source = source.strip()
+            if "youtube.com" in source or "youtu.be" in source:
+                video_id = self.extract_video_id(source)
+                if video_id:
+                    video_ids.append(video_id)
+                playlist_id = self.extract_playlist_id(source)
+                if playlist_id:
+                    try:
+                        video_ids.extend(self.playlist_provider(playlist_id))
+                    except Exception as e:
+                        print(f"Error expanding playlist {playlist_id}: {str(e)}")
+            elif source:
+                video_ids.append(source)
+        return list(dict.fromkeys(video_ids))
+
     def get_transcript(self, video_id: str) -> Optional[List[Dict]]:
         """
         Download YouTube Transcript
@@ -43,11 +117,99 @@ class YouTubeTranscriptDownloader:
         print(f"Downloading transcript for video ID: {video_id}")
         
         try:
-            return YouTubeTranscriptApi.get_transcript(video_id, languages=self.languages)
+            return self.transcript_provider(video_id, self.languages)
         except Exception as e:
             print(f"An error occurred: {str(e)}")
             return None
 
+    def cache_path(self, video_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{video_id}.json")
+
+    def load_cached(self, video_id: str) -> Optional[Dict]:
+        """Return the cache entry for a video (transcript plus fetch metadata), None if not cached"""
+        try:
+            with open(self.cache_path(video_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading cached transcript {video_id}: {str(e)}")
+            return None
+
+    def fetch(self, video_id: str) -> Optional[List[Dict]]:
+        """
+        Return a video's transcript from the cache, downloading and saving it on a miss
+
+        Args:
+            video_id (str): YouTube video ID or URL
+
+        Returns:
+            Optional[List[Dict]]: Transcript if available, None otherwise
+        """
+        if "youtube.com" in video_id or "youtu.be" in video_id:
+            video_id = self.extract_video_id(video_id)
+        if not video_id:
+            print("Invalid video ID or URL")
+            return None
+
+        cached = self.load_cached(video_id)
+        if cached is not None:
+            return cached["transcript"]
+
+        start = time.perf_counter()
+        transcript = self.get_transcript(video_id)
+        if not transcript:
+            return None
+        entry = {
+            "video_id": video_id,
+            "languages": self.languages,
+            "fetched_at": time.time(),
+            "fetch_seconds": round(time.perf_counter() - start, 3),
+            "transcript": transcript,
+        }
+        try:
+            write_atomic(self.cache_path(video_id), json.dumps(entry, ensure_ascii=False))
+        except Exception as e:
+            print(f"Error caching transcript {video_id}: {str(e)}")
+        self.save_transcript(transcript, video_id)
+        return transcript
+
+    def download_many(self, sources: Iterable[str]) -> Dict[str, str]:
+        """
+        Fetch many videos concurrently, skipping the ones already cached
+
+        Args:
+            sources: Video ids, video URLs and/or playlist URLs
+
+        Returns:
+            Dict[str, str]: "cached", "downloaded" or "failed" per video id
+        """
+        video_ids = self.resolve_video_ids(sources)
+        status = {video_id: "cached" for video_id in video_ids if os.path.exists(self.cache_path(video_id))}
+        missing = [video_id for video_id in video_ids if video_id not in status]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for video_id, transcript in zip(missing, executor.map(self.fetch, missing)):
+                status[video_id] = "downloaded" if transcript else "failed"
+        return status
+
+    def build_archive(self, path: str, video_ids: Optional[Iterable[str]] = None) -> int:
+        """
+        Pack cached transcripts into one TranscriptArchive file
+
+        Args:
+            path (str): Archive file to write
+            video_ids: Videos to include; every cached video by default
+
+        Returns:
+            int: Number of videos written
+        """
+        if video_ids is None:
+            video_ids = sorted(name[:-5] for name in os.listdir(self.cache_dir) if name.endswith(".json"))
+        cached = ((video_id, self.load_cached(video_id)) for video_id in video_ids)
+        transcripts = [(video_id, entry["transcript"]) for video_id, entry in cached if entry]
+        TranscriptArchive.write(path, transcripts)
+        return len(transcripts)
+
     def save_transcript(self, transcript: List[Dict], filename: str) -> bool:
         """
         Save transcript to file
@@ -59,12 +221,13 @@ class YouTubeTranscriptDownloader:
         Returns:
             bool: True if successful, False otherwise
         """
-        filename = f"backend/transcripts/{filename}.txt"
+        video_id = filename
+        filename = os.path.join(self.transcript_dir, f"{filename}.txt")
         
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                for entry in transcript:
-                    f.write(f"{entry['text']}\n")
+            write_atomic(filename, "".join(f"{entry['text']}\n" for entry in transcript))
+            # Compact copy that keeps the timestamps, for time and section slicing
+            TranscriptArchive.write(os.path.join(self.transcript_dir, f"{video_id}.jtr"), [(video_id, transcript)])
             return True
         except Exception as e:
             print(f"Error saving transcript: {str(e)}")
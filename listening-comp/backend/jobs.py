@@ -0,0 +1,138 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+_current = threading.local()
+
+
+class Job:
+    def __init__(self, job_id: str, key: Optional[str] = None):
+        """A unit of background work and its outcome"""
+        self.id = job_id
+        self.key = key
+        self.status = "queued"  # queued -> running -> done | failed
+        self.progress = 0.0
+        self.message = "Queued"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+def report_progress(progress: float, message: str = ""):
+    """Update the progress of the job running on this thread, if any"""
+    job = getattr(_current, "job", None)
+    if job is not None:
+        job.progress = max(0.0, min(1.0, progress))
+        if message:
+            job.message = message
+
+
+class JobQueue:
+    def __init__(self, max_workers: int = 8, max_jobs: int = 500):
+        """Thread pool for LLM and network work that would otherwise block a Streamlit rerun"""
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.keys: Dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, key: Optional[str] = None,
+               cache_result: Optional[Callable[[Any], bool]] = None, **kwargs) -> str:
+        """Queue fn(*args, **kwargs) and return its job id.
+
+        Jobs submitted with a key are cached: while a job with the same key is
+        pending or has succeeded, its id is returned instead of running fn again.
+        A result for which cache_result returns False, such as a partial one,
+        is not cached, so the next submit with the key runs fn again.
+        """
+        with self.lock:
+            if key is not None and key in self.keys:
+                existing = self.jobs.get(self.keys[key])
+                if existing is not None and existing.status != "failed":
+                    return existing.id
+
+            job = Job(uuid.uuid4().hex, key)
+            self.jobs[job.id] = job
+            if key is not None:
+                self.keys[key] = job.id
+            self._evict()
+
+        self.executor.submit(self._run, job, fn, args, kwargs, cache_result)
+        return job.id
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        if job_id is None:
+            return None
+        return self.jobs.get(job_id)
+
+    def _evict(self):
+        # Drop the oldest finished jobs once we hold too many
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            job = self.jobs[job_id]
+            if job.finished:
+                del self.jobs[job_id]
+                if job.key is not None and self.keys.get(job.key) == job_id:
+                    del self.keys[job.key]
+
+    def _forget(self, job: Job):
+        # Keep the job, but stop handing it out for its key
+        with self.lock:
+            if self.keys.get(job.key) == job.id:
+                del self.keys[job.key]
+
+    def _run(self, job: Job, fn: Callable, args, kwargs, cache_result: Optional[Callable[[Any], bool]]):
+        job.status = "running"
+        job.message = "Running"
+        _current.job = job
+        try:
+            job.result = fn(*args, **kwargs)
+            if job.key is not None and cache_result is not None and not cache_result(job.result):
+                self._forget(job)
+            job.status = "done"
+            job.progress = 1.0
+            job.message = "Done"
+        except Exception as e:
+            print(f"Error in background job {job.id}: {str(e)}")
+            job.error = str(e)
+            job.status = "failed"
+            job.message = "Failed"
+        finally:
+            job.finished_at = time.time()
+            _current.job = None
+
+
+if __name__ == "__main__":
+    # Compare 10 simultaneous generation requests run inline against the job queue,
+    # using a stub LLM call that takes two seconds.
+    def stub_generate(topic: str) -> Dict:
+        time.sleep(2)
+        return {"Question": f"{topic}?"}
+
+    requests = 10
+    start = time.perf_counter()
+    for i in range(requests):
+        stub_generate(f"topic {i}")
+    print(f"Inline: {time.perf_counter() - start:.1f}s until the last request gets its question")
+
+    queue = JobQueue(max_workers=requests)
+    submit_times = []
+    start = time.perf_counter()
+    job_ids = []
+    for i in range(requests):
+        submitted = time.perf_counter()
+        job_ids.append(queue.submit(stub_generate, f"topic {i}"))
+        submit_times.append(time.perf_counter() - submitted)
+    while not all(queue.get(job_id).finished for job_id in job_ids):
+        time.sleep(0.01)
+    print(f"Queued: {time.perf_counter() - start:.1f}s until the last request gets its question, "
+          f"max submit (rerun blocking) time {max(submit_times) * 1000:.2f}ms")
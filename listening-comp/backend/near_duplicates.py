@@ -0,0 +1,217 @@
+import os
+import re
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Estimated Jaccard similarity of character shingles above which two questions count as copies
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# New band keys are kept in dicts and merged into the sorted arrays in chunks of this size
+MERGE_EVERY = 65536
+
+_WHITESPACE = re.compile(r"\s+")
+_SHIFT32 = np.uint64(32)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+class MinHashIndex:
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 3,
+                 threshold: float = NEAR_DUPLICATE_THRESHOLD, seed: int = 1):
+        """MinHash signatures of character shingles with an LSH band index.
+
+        Each signature is split into bands; texts sharing any band key are
+        candidates, and candidates are confirmed by comparing full signatures.
+        With 16 bands of 4 rows a pair at similarity 0.8 becomes a candidate
+        with probability > 0.99, one at 0.3 with about 0.12.
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash family: h(x) = (a * x + b) mod 2^64 >> 32, with odd a
+        self.hash_a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.hash_b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self.band_mix = rng.integers(1, 2 ** 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+        self.signatures = np.empty((1024, num_perm), dtype=np.uint32)
+        self.count = 0
+        # Band keys of ids below `merged` live in sorted arrays, newer ones in per-band dicts
+        self.sorted_keys = np.empty((bands, 0), dtype=np.uint32)
+        self.sorted_ids = np.empty((bands, 0), dtype=np.int32)
+        self.merged = 0
+        self.pending: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def empty_copy(self) -> "MinHashIndex":
+        """An empty index with the same hash functions, whose signatures can be added to this one"""
+        return MinHashIndex(self.num_perm, self.bands, self.shingle_size, self.threshold, self.seed)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """32-bit hashes of the distinct character shingles of text, ignoring whitespace"""
+        text = _WHITESPACE.sub("", text)
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        k = self.shingle_size
+        if len(codes) < k:
+            codes = np.concatenate([codes, np.zeros(k - len(codes), dtype=np.uint64)])
+        hashes = np.zeros(len(codes) - k + 1, dtype=np.uint64)
+        for i in range(k):
+            hashes = hashes * _GOLDEN + codes[i:len(codes) - k + 1 + i]
+        return np.unique((hashes * _GOLDEN) >> _SHIFT32)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = self.shingles(text)
+        permuted = (self.hash_a[:, None] * hashes[None, :] + self.hash_b[:, None]) >> _SHIFT32
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """One 32-bit key per band, shape (n, bands), for an (n, num_perm) signature array"""
+        rows = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        mixed = (rows * self.band_mix).sum(axis=2, dtype=np.uint64)
+        return ((mixed * _GOLDEN) >> _SHIFT32).astype(np.uint32)
+
+    def add(self, text: str) -> int:
+        """Index text and return its id"""
+        return self.add_signatures(self.signature(text)[None, :])[0]
+
+    def add_signatures(self, signatures: np.ndarray) -> List[int]:
+        """Index precomputed signatures in bulk"""
+        start = self.count
+        end = start + len(signatures)
+        if end > len(self.signatures):
+            grown = np.empty((max(end, 2 * len(self.signatures)), self.num_perm), dtype=np.uint32)
+            grown[:start] = self.signatures[:start]
+            self.signatures = grown
+        self.signatures[start:end] = signatures
+        self.count = end
+
+        if end - self.merged >= MERGE_EVERY:
+            self._merge()
+        else:
+            for offset, keys in enumerate(self.band_keys(signatures)):
+                for band, key in enumerate(keys.tolist()):
+                    self.pending[band].setdefault(key, []).append(start + offset)
+        return list(range(start, end))
+
+    def _merge(self):
+        """Move every unmerged id's band keys into the sorted arrays"""
+        new_ids = np.arange(self.merged, self.count, dtype=np.int32)
+        new_keys = self.band_keys(self.signatures[self.merged:self.count]).T
+        order = np.argsort(new_keys, axis=1, kind="stable")
+        keys, ids = [], []
+        for band in range(self.bands):
+            band_keys = new_keys[band][order[band]]
+            positions = np.searchsorted(self.sorted_keys[band], band_keys)
+            keys.append(np.insert(self.sorted_keys[band], positions, band_keys))
+            ids.append(np.insert(self.sorted_ids[band], positions, new_ids[order[band]]))
+        self.sorted_keys = np.stack(keys)
+        self.sorted_ids = np.stack(ids)
+        self.merged = self.count
+        self.pending = [{} for _ in range(self.bands)]
+
+    def candidates(self, signature: np.ndarray) -> np.ndarray:
+        ids = []
+        for band, key in enumerate(self.band_keys(signature[None, :])[0]):
+            # key stays a numpy uint32 so searchsorted doesn't upcast the whole band
+            sorted_keys = self.sorted_keys[band]
+            lo = np.searchsorted(sorted_keys, key, side="left")
+            hi = np.searchsorted(sorted_keys, key, side="right")
+            if hi > lo:
+                ids.append(self.sorted_ids[band][lo:hi])
+            pending = self.pending[band].get(int(key))
+            if pending:
+                ids.append(np.asarray(pending, dtype=np.int32))
+        if not ids:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(ids))
+
+    def query(self, text: str, threshold: Optional[float] = None) -> List[Tuple[int, float]]:
+        """Ids of indexed texts whose estimated similarity to text is at least threshold, best first"""
+        threshold = self.threshold if threshold is None else threshold
+        signature = self.signature(text)
+        ids = self.candidates(signature)
+        if not len(ids):
+            return []
+        similarity = (self.signatures[ids] == signature).mean(axis=1)
+        matches = [(int(i), float(s)) for i, s in zip(ids, similarity) if s >= threshold]
+        return sorted(matches, key=lambda match: -match[1])
+
+    def is_near_duplicate(self, text: str) -> bool:
+        return bool(self.query(text))
+
+    def save(self, path: str):
+        """Persist the signatures atomically; band keys are rebuilt on load"""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, signatures=self.signatures[:self.count],
+                     params=np.array([self.num_perm, self.bands, self.shingle_size, self.seed]))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, threshold: float = NEAR_DUPLICATE_THRESHOLD) -> "MinHashIndex":
+        with np.load(path) as data:
+            num_perm, bands, shingle_size, seed = (int(p) for p in data["params"])
+            index = cls(num_perm, bands, shingle_size, threshold, seed)
+            signatures = data["signatures"]
+        index.signatures = np.array(signatures, dtype=np.uint32).reshape(-1, num_perm)
+        index.count = len(index.signatures)
+        index._merge()
+        return index
+
+
+if __name__ == "__main__":
+    # Insert and query throughput at 1M questions, and memory per indexed question
+    import random
+    import time
+
+    rng = random.Random(0)
+    kana = [chr(c) for c in range(0x3041, 0x3097)]
+    total = 1_000_000
+
+    index = MinHashIndex()
+    sample = ["".join(rng.choice(kana) for _ in range(60)) for _ in range(5000)]
+    start = time.perf_counter()
+    signatures = np.stack([index.signature(text) for text in sample])
+    per_signature = (time.perf_counter() - start) / len(sample)
+    print(f"Signature: {1 / per_signature:,.0f} texts/s")
+
+    # Fill the index with random signatures so the 1M run doesn't wait on text hashing
+    start = time.perf_counter()
+    random_signatures = np.random.default_rng(0).integers(0, 2 ** 32, size=(total - len(sample), index.num_perm),
+                                                          dtype=np.uint32)
+    for chunk in range(0, len(random_signatures), 10_000):
+        index.add_signatures(random_signatures[chunk:chunk + 10_000])
+    index.add_signatures(signatures)
+    elapsed = time.perf_counter() - start
+    print(f"Bulk insert: {total / elapsed:,.0f} signatures/s ({len(index):,} indexed)")
+
+    start = time.perf_counter()
+    for text in sample[:2000]:
+        index.add(text + "。")
+    print(f"Single insert incl. signature: {2000 / (time.perf_counter() - start):,.0f} texts/s")
+
+    queries = [text[:57] + "".join(rng.choice(kana) for _ in range(3)) for text in sample[:2000]]
+    start = time.perf_counter()
+    found = sum(index.is_near_duplicate(text) for text in queries)
+    print(f"Query (near copies): {len(queries) / (time.perf_counter() - start):,.0f} queries/s, "
+          f"{found}/{len(queries)} flagged")
+    fresh = ["".join(rng.choice(kana) for _ in range(60)) for _ in range(2000)]
+    start = time.perf_counter()
+    flagged = sum(index.is_near_duplicate(text) for text in fresh)
+    print(f"Query (new texts): {len(fresh) / (time.perf_counter() - start):,.0f} queries/s, "
+          f"{flagged}/{len(fresh)} flagged")
+
+    index._merge()
+    per_question = (index.signatures[:index.count].nbytes + index.sorted_keys.nbytes
+                    + index.sorted_ids.nbytes) / index.count
+    print(f"Memory: {index.num_perm * 4} bytes per signature, {per_question:.0f} bytes per question with band index")
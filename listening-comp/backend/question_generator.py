@@ -1,19 +1,37 @@
+import hashlib
 import json
+import threading
+import time
 from os import name
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from .vector_store import QuestionVectorStore
 from .chat import GeminiChat
+from .question_models import QUESTION_MODELS, Feedback, GenerationMetrics, parse_model
 from google.genai import types
 
+# Attempts per schema-constrained call before giving up
+MAX_SCHEMA_ATTEMPTS = 2
+
 class QuestionGenerator:
-    def __init__(self):
-        """Initialize Gemini client and vector store"""
-        self.gemini_client = GeminiChat()  # Initialize Gemini client
-        self.vector_store = QuestionVectorStore()
+    def __init__(self, gemini_client: Optional[GeminiChat] = None, vector_store: Optional[QuestionVectorStore] = None,
+                 structured_output: bool = True):
+        """Initialize Gemini client and vector store, reusing the given ones if provided.
+
+        With structured_output, questions and feedback are requested in Gemini's
+        JSON mode against the pydantic models in question_models; otherwise the
+        free-text prompts and parsers are used.
+        """
+        self.structured_output = structured_output
+        self.metrics = GenerationMetrics()
+        self.gemini_client = gemini_client or GeminiChat()  # Initialize Gemini client
+        self.vector_store = vector_store or QuestionVectorStore()
         self.model_id = "gemini-2.0-flash-lite-preview-02-05"  # Update with the actual Gemini model ID
+        # LLM explanations keyed by (question hash, selected option)
+        self.explanations: Dict[Tuple[str, int], str] = {}
+        self.explanations_lock = threading.Lock()
 
-    def _invoke_gemini(self, prompt: str) -> Optional[str]:
-        """Invoke Gemini with the given prompt"""
+    def _invoke_gemini(self, prompt: str, response_schema=None) -> Optional[str]:
+        """Invoke Gemini with the given prompt, constraining the output to response_schema if given"""
         try:
             messages = [{
                 "role": "user",
@@ -27,6 +45,8 @@ class QuestionGenerator:
                 contents=prompt,
                 config=types.GenerateContentConfig(
                     temperature=0.5,
+                    response_mime_type="application/json" if response_schema else None,
+                    response_schema=response_schema,
                 ),
             )
             return response.text
@@ -34,6 +54,23 @@ class QuestionGenerator:
             print(f"Error invoking Gemini: {str(e)}")
             return None
 
+    def _generate_structured(self, prompt: str, model) -> Optional[Dict]:
+        """Generate JSON matching model, retrying once if the call fails or the output doesn't validate"""
+        for attempt in range(MAX_SCHEMA_ATTEMPTS):
+            if attempt:
+                self.metrics.record("retries")
+            self.metrics.record("calls")
+            response = self._invoke_gemini(prompt, response_schema=model)
+            if response is None:
+                # The request failed, so there was no output to parse
+                self.metrics.record("call_failures")
+                continue
+            result = parse_model(response, model)
+            if result is not None:
+                return result
+            self.metrics.record("parse_failures")
+        return None
+
     def generate_similar_question(self, section_num: int, topic: str) -> Dict:
         """Generate a new question similar to existing ones on a given topic"""
         # Get similar questions for context
@@ -63,6 +100,34 @@ class QuestionGenerator:
                         context += f"{i}. {opt}\n"
             context += "\n"
 
+        # The LLM sometimes hands back one of the examples nearly verbatim
+        for attempt in range(MAX_SCHEMA_ATTEMPTS):
+            question = self._generate_from_context(section_num, topic, context)
+            if not question or not self._is_near_duplicate(section_num, question):
+                return question
+            self.metrics.record("near_duplicates")
+        return None
+
+    def _is_near_duplicate(self, section_num: int, question: Dict) -> bool:
+        try:
+            return self.vector_store.is_near_duplicate(section_num, question)
+        except KeyError:
+            # Free-text parsing can leave fields out; validation elsewhere rejects those
+            return False
+
+    def _generate_from_context(self, section_num: int, topic: str, context: str) -> Optional[Dict]:
+        if self.structured_output:
+            prompt = f"""Based on the following example JLPT listening questions, create a new question about {topic}.
+        The question should be different from the examples but test the same kind of listening comprehension.
+        
+        {context}
+        
+        Make sure the question is challenging but fair, and the options are plausible but with only one clearly
+        correct answer. Write the question in Japanese with exactly four options, give the number of the correct
+        option (1-4) as Answer and a brief English explanation of why it is correct as Explanation.
+        """
+            return self._generate_structured(prompt, QUESTION_MODELS[section_num])
+
         # Create prompt for generating new question
         prompt = f"""Based on the following example JLPT listening questions, create a new question about {topic}.
         The question should follow the same format but be different from the examples.
@@ -72,7 +137,10 @@ class QuestionGenerator:
         
         Generate a new question following the exact same format as above. Include all components (Introduction/Situation, 
         Conversation/Question, and Options). Make sure the question is challenging but fair, and the options are plausible 
-        but with only one clearly correct answer. Return ONLY the question without any additional text.
+        but with only one clearly correct answer. After the options, add these two lines:
+        Answer: [the number of the correct option (1-4)]
+        Explanation: [a brief explanation in English of why that option is correct]
+        Return ONLY the question without any additional text.
         
         New Question:
         """
@@ -81,7 +149,10 @@ class QuestionGenerator:
         response = self._invoke_gemini(prompt)
         if not response:
             return None
+        return self._parse_question_text(response)
 
+    def _parse_question_text(self, response: str) -> Optional[Dict]:
+        """Parse a free-text generated question"""
         # Parse the generated question
         try:
             lines = response.strip().split('\n')
@@ -119,6 +190,18 @@ class QuestionGenerator:
                         question[current_key] = ' '.join(current_value)
                     current_key = 'Options'
                     current_value = []
+                elif line.startswith("Answer:"):
+                    if current_key:
+                        question[current_key] = current_value if current_key == 'Options' else ' '.join(current_value)
+                    current_key = None
+                    answer = line.replace("Answer:", "").strip().rstrip('.')
+                    if answer.isdigit() and 1 <= int(answer) <= 4:
+                        question['Answer'] = int(answer)
+                elif line.startswith("Explanation:"):
+                    if current_key:
+                        question[current_key] = current_value if current_key == 'Options' else ' '.join(current_value)
+                    current_key = 'Explanation'
+                    current_value = [line.replace("Explanation:", "").strip()]
                 elif line[0].isdigit() and line[1] == "." and current_key == 'Options':
                     current_value.append(line[2:].strip())
                 elif current_key:
@@ -139,6 +222,9 @@ class QuestionGenerator:
                     "サラダを食べる",
                     "パスタを食べる"
                 ]
+                # The generated answer doesn't refer to these options
+                question.pop('Answer', None)
+                question.pop('Explanation', None)
             
             return question
         except Exception as e:
@@ -146,52 +232,110 @@ class QuestionGenerator:
             return None
 
     def get_feedback(self, question: Dict, selected_answer: int) -> Dict:
-        """Generate feedback for the selected answer"""
+        """Generate feedback for the selected answer.
+
+        Questions generated with an answer key are checked locally; only older
+        questions without one need an LLM round-trip.
+        """
         if not question or 'Options' not in question:
             return None
 
+        if isinstance(question.get('Answer'), int):
+            return {
+                "correct": selected_answer == question['Answer'],
+                "explanation": question.get('Explanation') or "No explanation available.",
+                "correct_answer": question['Answer']
+            }
+
         # Create prompt for generating feedback
         prompt = f"""Given this JLPT listening question and the selected answer, provide feedback explaining if it's correct 
         and why. Keep the explanation clear and concise.
         
         """
-        if 'Introduction' in question:
-            prompt += f"Introduction: {question['Introduction']}\n"
-            prompt += f"Conversation: {question['Conversation']}\n"
-        else:
-            prompt += f"Situation: {question['Situation']}\n"
-        
-        prompt += f"Question: {question['Question']}\n"
-        prompt += "Options:\n"
-        for i, opt in enumerate(question['Options'], 1):
-            prompt += f"{i}. {opt}\n"
-        
+        prompt += self._format_question(question)
         prompt += f"\nSelected Answer: {selected_answer}\n"
+
+        if self.structured_output:
+            feedback = self._generate_structured(prompt, Feedback)
+            if feedback:
+                return feedback
+            return {
+                "correct": False,
+                "explanation": "Unable to generate detailed feedback. Please try again.",
+                "correct_answer": None
+            }
+
         prompt += "\nProvide feedback in JSON format with these fields:\n"
         prompt += "- correct: true/false\n"
         prompt += "- explanation: brief explanation of why the answer is correct/incorrect\n"
         prompt += "- correct_answer: the number of the correct option (1-4)\n"
 
         # Get feedback
-        response = self._invoke_gemini(prompt).replace("```json", "").replace("```", "")
+        response = self._invoke_gemini(prompt)
         if not response:
             return None
         try:
             # Parse the JSON response
-            feedback = json.loads(response.strip())
+            feedback = json.loads(response.replace("```json", "").replace("```", "").strip())
             return feedback
         except:
-            # If JSON parsing fails, return a basic response with a default correct answer
+            # If JSON parsing fails, don't guess which option was correct
             return {
                 "correct": False,
                 "explanation": "Unable to generate detailed feedback. Please try again.",
-                "correct_answer": 1  # Default to first option
+                "correct_answer": None
             }
 
+    def explain_answer(self, question: Dict, selected_answer: int) -> Optional[str]:
+        """Ask the LLM for a detailed explanation, cached per (question, selected option)"""
+        question_hash = hashlib.sha256(
+            json.dumps(question, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        cache_key = (question_hash, selected_answer)
+        with self.explanations_lock:
+            if cache_key in self.explanations:
+                return self.explanations[cache_key]
+
+        prompt = "Explain to a Japanese learner why their answer to this JLPT listening question is right or wrong. "
+        prompt += "Point to the part of the conversation that gives the answer. Keep it short.\n\n"
+        prompt += self._format_question(question)
+        if isinstance(question.get('Answer'), int):
+            prompt += f"\nCorrect Answer: {question['Answer']}\n"
+        prompt += f"Selected Answer: {selected_answer}\n"
+
+        explanation = self._invoke_gemini(prompt)
+        if explanation:
+            with self.explanations_lock:
+                self.explanations[cache_key] = explanation
+        return explanation
+
+    def _format_question(self, question: Dict) -> str:
+        text = ""
+        if 'Introduction' in question:
+            text += f"Introduction: {question['Introduction']}\n"
+            text += f"Conversation: {question['Conversation']}\n"
+        else:
+            text += f"Situation: {question['Situation']}\n"
+
+        text += f"Question: {question['Question']}\n"
+        text += "Options:\n"
+        for i, opt in enumerate(question['Options'], 1):
+            text += f"{i}. {opt}\n"
+        return text
+
 if __name__ == "__main__":
     question_generator = QuestionGenerator()
     question = question_generator.generate_similar_question(2, "Shopping")
     print(question)
+
+    # Submit-to-feedback latency: local answer key versus an LLM round-trip
+    start = time.perf_counter()
     feedback = question_generator.get_feedback(question, 1)
+    print(f"Local feedback: {(time.perf_counter() - start) * 1000:.2f}ms")
     # print(feedback)
+    legacy_question = {k: v for k, v in question.items() if k not in ('Answer', 'Explanation')}
+    start = time.perf_counter()
+    question_generator.get_feedback(legacy_question, 1)
+    print(f"LLM feedback: {(time.perf_counter() - start) * 1000:.2f}ms")
+    print(question_generator.metrics.snapshot())
 
@@ -0,0 +1,80 @@
+import threading
+from typing import Dict, List, Optional, Type
+
+from pydantic import BaseModel, ValidationError, field_validator
+
+
+class _QuestionBase(BaseModel):
+    Question: str
+    Options: List[str]
+    Answer: int
+    Explanation: str
+
+    # Constraints live in validators rather than the field types so the JSON
+    # schema sent to Gemini stays within what its response_schema supports.
+    @field_validator('Options')
+    @classmethod
+    def four_options(cls, options: List[str]) -> List[str]:
+        if len(options) != 4 or not all(option.strip() for option in options):
+            raise ValueError("exactly four non-empty options are required")
+        return options
+
+    @field_validator('Answer')
+    @classmethod
+    def answer_in_range(cls, answer: int) -> int:
+        if not 1 <= answer <= 4:
+            raise ValueError("answer must be between 1 and 4")
+        return answer
+
+
+class DialogueQuestion(_QuestionBase):
+    """Section 2: a conversation followed by a question"""
+    Introduction: str
+    Conversation: str
+
+
+class PhraseQuestion(_QuestionBase):
+    """Section 3: pick the phrase that fits the situation"""
+    Situation: str
+
+
+class Feedback(BaseModel):
+    correct: bool
+    explanation: str
+    correct_answer: int
+
+
+QUESTION_MODELS: Dict[int, Type[_QuestionBase]] = {2: DialogueQuestion, 3: PhraseQuestion}
+
+
+def parse_model(text: Optional[str], model: Type[BaseModel]) -> Optional[Dict]:
+    """Validate and parse an LLM JSON response in one pass; None if it doesn't match the schema"""
+    if not text:
+        return None
+    try:
+        return model.model_validate_json(text).model_dump()
+    except ValidationError:
+        return None
+
+
+class GenerationMetrics:
+    def __init__(self):
+        """Counters for structured generation calls, failed calls, parse failures, retries and rejected near-copies"""
+        self.lock = threading.Lock()
+        self.counts = {"calls": 0, "call_failures": 0, "parse_failures": 0, "retries": 0, "near_duplicates": 0}
+
+    def record(self, name: str):
+        with self.lock:
+            self.counts[name] += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self.lock:
+            counts = dict(self.counts)
+        calls = counts["calls"] or 1
+        # Parse failures are a share of the calls that returned output
+        responses = counts["calls"] - counts["call_failures"] or 1
+        counts["call_failure_rate"] = counts["call_failures"] / calls
+        counts["parse_failure_rate"] = counts["parse_failures"] / responses
+        counts["retry_rate"] = counts["retries"] / calls
+        return counts
+
@@ -0,0 +1,180 @@
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# Chroma distance below which a generated question counts as a copy of an indexed one
+DUPLICATE_DISTANCE = 0.05
+
+REQUIRED_FIELDS = {
+    2: ['Introduction', 'Conversation', 'Question', 'Options'],
+    3: ['Situation', 'Question', 'Options'],
+}
+
+
+def is_valid_question(section_num: int, question: Optional[Dict]) -> bool:
+    """Check a generated question has its section's fields, four options and an answer key"""
+    if not question:
+        return False
+    if any(not question.get(field) for field in REQUIRED_FIELDS[section_num]):
+        return False
+    # Questions carry their answer key so feedback is a local lookup
+    answer = question.get('Answer')
+    return len(question['Options']) == 4 and isinstance(answer, int) and 1 <= answer <= 4
+
+
+def question_text(section_num: int, question: Dict) -> str:
+    """The text used to compare questions for duplicates"""
+    if section_num == 2:
+        return f"{question['Introduction']} {question['Conversation']} {question['Question']}"
+    return f"{question['Situation']} {question['Question']}"
+
+
+def is_indexed_duplicate(vector_store, section_num: int, question: Dict) -> bool:
+    """True if the vector store already holds a (near-)identical question"""
+    try:
+        if vector_store.is_near_duplicate(section_num, question):
+            return True
+        matches = vector_store.search_similar_questions(section_num, question_text(section_num, question), n_results=1)
+    except Exception as e:
+        print(f"Error checking question against vector store: {str(e)}")
+        return False
+    return bool(matches) and matches[0]['similarity_score'] < DUPLICATE_DISTANCE
+
+
+class QuestionPool:
+    def __init__(self, generator, path: str = "backend/question_pool.json",
+                 low_water: int = 2, target: int = 5, max_workers: int = 2):
+        """Pre-generated questions per (section, topic), refilled in the background"""
+        self.generator = generator
+        self.path = path
+        self.low_water = low_water
+        self.target = target
+        self.pools: Dict[str, List[Dict]] = {}
+        self.refilling = set()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="question-pool")
+        self.load()
+
+    def pool_key(self, section_num: int, topic: str) -> str:
+        return f"{section_num}:{topic}"
+
+    def take(self, section_num: int, topic: str) -> Optional[Dict]:
+        """Pop a ready question, or return None if the pool is empty. Schedules a refill when low."""
+        key = self.pool_key(section_num, topic)
+        with self.lock:
+            pool = self.pools.setdefault(key, [])
+            question = pool.pop(0) if pool else None
+            remaining = len(pool)
+        if question is not None:
+            self.save()
+        if remaining < self.low_water:
+            self.refill(section_num, topic)
+        return question
+
+    def size(self, section_num: int, topic: str) -> int:
+        with self.lock:
+            return len(self.pools.get(self.pool_key(section_num, topic), []))
+
+    def refill(self, section_num: int, topic: str):
+        """Top the pool up to the target size in the background"""
+        key = self.pool_key(section_num, topic)
+        with self.lock:
+            if key in self.refilling:
+                return
+            self.refilling.add(key)
+        self.executor.submit(self._refill, section_num, topic)
+
+    def _refill(self, section_num: int, topic: str):
+        key = self.pool_key(section_num, topic)
+        # Bound the attempts so a failing LLM can't spin forever
+        attempts = self.target * 2
+        try:
+            while self.size(section_num, topic) < self.target and attempts > 0:
+                attempts -= 1
+                question = self.generator.generate_similar_question(section_num, topic)
+                if not is_valid_question(section_num, question) or self.is_duplicate(section_num, question):
+                    continue
+                with self.lock:
+                    self.pools.setdefault(key, []).append(question)
+                self.save()
+        except Exception as e:
+            print(f"Error refilling question pool {key}: {str(e)}")
+        finally:
+            with self.lock:
+                self.refilling.discard(key)
+
+    def is_duplicate(self, section_num: int, question: Dict) -> bool:
+        """Reject questions already pooled or (near-)identical to an indexed one"""
+        text = question_text(section_num, question)
+        with self.lock:
+            pooled = [q for pool in self.pools.values() for q in pool]
+        if any(question_text(section_num, q) == text for q in pooled if is_valid_question(section_num, q)):
+            return True
+        return is_indexed_duplicate(self.generator.vector_store, section_num, question)
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.pools = json.load(f)
+        except FileNotFoundError:
+            self.pools = {}
+        except Exception as e:
+            print(f"Error loading question pool: {str(e)}")
+            self.pools = {}
+
+    def save(self):
+        """Persist the pools atomically so a restart keeps the pre-generated questions"""
+        with self.lock:
+            data = json.dumps(self.pools, ensure_ascii=False)
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving question pool: {str(e)}")
+
+
+if __name__ == "__main__":
+    # Click-to-question latency with a stub generator that takes 1.5s per question
+    import time
+
+    class StubVectorStore:
+        def search_similar_questions(self, section_num, query, n_results=5):
+            time.sleep(0.1)
+            return []
+
+        def is_near_duplicate(self, section_num, question):
+            return False
+
+    class StubGenerator:
+        vector_store = StubVectorStore()
+        count = 0
+
+        def generate_similar_question(self, section_num, topic):
+            time.sleep(1.5)
+            self.count += 1
+            return {"Situation": f"{topic} {self.count}", "Question": "何と言いますか",
+                    "Options": ["a", "b", "c", "d"], "Answer": 1, "Explanation": "a"}
+
+    generator = StubGenerator()
+    start = time.perf_counter()
+    generator.vector_store.search_similar_questions(3, "Weather Reports")
+    generator.generate_similar_question(3, "Weather Reports")
+    print(f"Without pool: {(time.perf_counter() - start) * 1000:.0f}ms per click")
+
+    pool = QuestionPool(generator, path=os.path.join(tempfile.mkdtemp(), "pool.json"), target=3)
+    pool.refill(3, "Weather Reports")
+    while pool.size(3, "Weather Reports") < 3:
+        time.sleep(0.05)
+    latencies = []
+    for _ in range(3):
+        start = time.perf_counter()
+        pool.take(3, "Weather Reports")
+        latencies.append(time.perf_counter() - start)
+    print(f"With pool: {max(latencies) * 1000:.1f}ms per click (max of {len(latencies)})")
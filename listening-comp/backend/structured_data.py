@@ -1,16 +1,29 @@
 from typing import Optional, Dict, List
+import hashlib
+import json
 import os
+import threading
 from .chat import GeminiChat
+from .structured_store import StructuredResultStore
 from google.genai import types
 
 # Model ID
 MODEL_ID = "amazon.nova-lite-v1:0"
+# Locks shared by the transcripts being structured at once
+LOCK_STRIPES = 64
+# Sections structure_transcript extracts, skipping section 1 for now
+SECTIONS = (2, 3)
 
 class TranscriptStructurer:
-    def __init__(self, model_id: str = MODEL_ID):
-        """Initialize Gemini chat client"""
-        self.gemini_chat = GeminiChat()
+    def __init__(self, model_id: str = MODEL_ID, gemini_chat: Optional[GeminiChat] = None,
+                 store: Optional[StructuredResultStore] = None):
+        """Initialize Gemini chat client, reusing the given one if provided"""
+        self.gemini_chat = gemini_chat or GeminiChat()
         self.model_id = model_id
+        self.store = store or StructuredResultStore()
+        # Transcripts hash onto a fixed set of locks, so concurrent sessions don't
+        # structure one twice and the locks don't grow with the transcripts seen
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
         self.prompts = {
             1: """Extract questions from section 問題1 of this JLPT transcript where the answer can be determined solely from the conversation without needing visual aids.
             
@@ -119,6 +132,10 @@ class TranscriptStructurer:
             - Output questions one after another with no extra text between them
             """
         }
+        # Cached results are invalidated whenever a prompt changes
+        self.prompt_version = hashlib.sha256(
+            json.dumps(self.prompts, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:12]
 
     def generate_questions(self, message: str, prompt):
         print(f"Generating questions for message: {message}")
@@ -138,14 +155,22 @@ class TranscriptStructurer:
             return None
 
     def structure_transcript(self, transcript: str) -> Dict[int, str]:
-        """Structure the transcript into three sections using separate prompts"""
-        results = {}
-        # Skipping section 1 for now
-        for section_num in range(2, 4):
-            result = self.generate_questions("Here's the transcript:\n" + transcript, self.prompts[section_num])
-            if result:
-                results[section_num] = result
-        return results
+        """Structure the transcript into three sections using separate prompts.
+
+        Sections already in the result store are reused, so each section is
+        only sent to the LLM once per unique transcript and prompt version.
+        """
+        key = self.store.key(transcript, self.prompt_version)
+        with self._locks[int(key[:8], 16) % LOCK_STRIPES]:
+            results = self.store.get(transcript, self.prompt_version)
+            missing = [n for n in SECTIONS if n not in results]
+            for section_num in missing:
+                result = self.generate_questions("Here's the transcript:\n" + transcript, self.prompts[section_num])
+                if result:
+                    results[section_num] = result
+            if missing:
+                self.store.put(transcript, self.prompt_version, results)
+            return results
 
     def save_questions(self, structured_sections: Dict[int, str], base_filename: str) -> bool:
         """Save each section to a separate file"""
@@ -177,5 +202,6 @@ if __name__ == "__main__":
     transcript = structurer.load_transcript("backend/transcripts/sY7L5cfCWno.txt")
     # if transcript:
     #     questions = structurer.generate_questions(transcript)
+    # Served from the result store after the first run
     structured_text = structurer.structure_transcript(transcript)
     structurer.save_questions(structured_text, "backend/questions/sY7L5cfCWno")
\ No newline at end of file
@@ -0,0 +1,42 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict
+
+
+class StructuredResultStore:
+    def __init__(self, directory: str = "backend/questions/structured"):
+        """Persisted structure_transcript results keyed by transcript and prompt version"""
+        self.directory = directory
+
+    def key(self, transcript: str, prompt_version: str) -> str:
+        digest = hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+        return f"{digest[:32]}_{prompt_version}"
+
+    def path(self, transcript: str, prompt_version: str) -> str:
+        return os.path.join(self.directory, f"{self.key(transcript, prompt_version)}.json")
+
+    def get(self, transcript: str, prompt_version: str) -> Dict[int, str]:
+        """Return the sections stored for this transcript, empty if none"""
+        try:
+            with open(self.path(transcript, prompt_version), 'r', encoding='utf-8') as f:
+                return {int(section): content for section, content in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error reading structured result: {str(e)}")
+            return {}
+
+    def put(self, transcript: str, prompt_version: str, sections: Dict[int, str]) -> bool:
+        """Write the sections atomically so readers never see a partial file"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({str(k): v for k, v in sections.items()}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path(transcript, prompt_version))
+            return True
+        except Exception as e:
+            print(f"Error saving structured result: {str(e)}")
+            return False
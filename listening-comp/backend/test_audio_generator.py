@@ -0,0 +1,60 @@
+import io
+import struct
+import wave
+from types import SimpleNamespace
+
+import pytest
+
+from .audio_generator import AudioGenerator, StubTTSEngine, is_japanese_voice, to_wav
+
+
+def aiff(wav: bytes, sowt: bool = False) -> bytes:
+    """The AIFF (or little-endian AIFF-C) NSSpeech would write for the same audio"""
+    with wave.open(io.BytesIO(wav), "rb") as source:
+        channels, width, rate, count = source.getparams()[:4]
+        frames = source.readframes(count)
+    if not sowt:
+        frames = struct.pack(f">{len(frames) // 2}h", *struct.unpack(f"<{len(frames) // 2}h", frames))
+    exponent = rate.bit_length() - 1
+    sample_rate = struct.pack(">HQ", 16383 + exponent, rate << (63 - exponent))
+    comm = struct.pack(">hIh", channels, count, width * 8) + sample_rate + (b"sowt\0\0" if sowt else b"")
+    ssnd = struct.pack(">II", 0, 0) + frames
+    chunks = b"COMM" + struct.pack(">I", len(comm)) + comm + b"SSND" + struct.pack(">I", len(ssnd)) + ssnd
+    return b"FORM" + struct.pack(">I", len(chunks) + 4) + (b"AIFC" if sowt else b"AIFF") + chunks
+
+
+class AiffEngine(StubTTSEngine):
+    def synthesize(self, text, voice):
+        return aiff(super().synthesize(text, voice))
+
+
+@pytest.mark.parametrize("voice, japanese", [
+    (SimpleNamespace(id="gmw/af", languages=[b"\x05af"]), False),
+    (SimpleNamespace(id="jpx/ja", languages=[b"\x05ja"]), True),
+    (SimpleNamespace(id="com.apple.speech.synthesis.voice.kyoko", languages=["ja_JP"]), True),
+    (SimpleNamespace(id="com.apple.speech.synthesis.voice.Alex", languages=["en_US"]), False),
+    (SimpleNamespace(id=r"HKEY_LOCAL_MACHINE\SOFTWARE\Microsoft\Speech\Voices\Tokens\TTS_MS_JA-JP_HARUKA_11.0",
+                     languages=[]), True),
+    (SimpleNamespace(id=r"HKEY_LOCAL_MACHINE\SOFTWARE\Microsoft\Speech\Voices\Tokens\TTS_MS_EN-US_ZIRA_11.0",
+                     languages=[]), False),
+])
+def test_only_japanese_voices_are_picked(voice, japanese):
+    assert is_japanese_voice(voice) == japanese
+
+
+@pytest.mark.parametrize("sowt", [False, True])
+def test_aiff_output_is_converted_to_the_same_wav(sowt):
+    wav = StubTTSEngine(seconds_per_char=0.01).synthesize("雨", "female")
+    assert to_wav(aiff(wav, sowt)) == wav
+
+
+def test_unknown_formats_are_rejected():
+    with pytest.raises(ValueError):
+        to_wav(b"ID3\x04" + b"\0" * 64)
+
+
+def test_aiff_segments_are_joined(tmp_path):
+    generator = AudioGenerator(AiffEngine(seconds_per_char=0.01), cache_dir=str(tmp_path / "cache"),
+                               output_dir=str(tmp_path))
+    path = generator.generate_audio({"Conversation": "男：すみません。女：はい。", "Question": "何と言いますか。"})
+    assert generator.duration(path) > 0
@@ -0,0 +1,32 @@
+from .bulk_generate import BulkGenerator, Checkpoint, StubVectorStore
+
+
+class DroppingVectorStore(StubVectorStore):
+    """Indexes only the first question of each call, as if the rest were near-copies of it"""
+    def add_questions(self, section_num, questions, video_id):
+        return super().add_questions(section_num, questions[:1], video_id)
+
+
+class CountingGenerator:
+    def __init__(self, vector_store):
+        self.vector_store = vector_store
+        self.calls = 0
+
+    def generate_similar_question(self, section_num, topic):
+        self.calls += 1
+        return {"Situation": f"{topic} {self.calls}", "Question": "何と言いますか",
+                "Options": ["1", "2", "3", "4"], "Answer": 1, "Explanation": "stub"}
+
+
+def test_checkpoint_counts_only_indexed_questions(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    generator = CountingGenerator(DroppingVectorStore())
+    BulkGenerator(generator, Checkpoint(path), concurrency=1, batch_size=3).run([3], ["Shopping"], 3)
+    # Two of the three were dropped at indexing, so they're still owed
+    assert Checkpoint(path).indexed == {"3:Shopping": 1}
+
+    generator.vector_store = StubVectorStore()
+    rerun = BulkGenerator(generator, Checkpoint(path), concurrency=1, batch_size=3)
+    rerun.run([3], ["Shopping"], 3)
+    assert Checkpoint(path).indexed == {"3:Shopping": 3}
+    assert rerun.stats["accepted"] == 2
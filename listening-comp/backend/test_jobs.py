@@ -0,0 +1,43 @@
+import time
+
+from .jobs import JobQueue
+
+
+def wait(queue, job_id):
+    while not queue.get(job_id).finished:
+        time.sleep(0.01)
+    return queue.get(job_id)
+
+
+def test_keyed_jobs_run_once_until_they_fail():
+    queue = JobQueue(max_workers=1)
+    outcomes = [RuntimeError("LLM unavailable"), {2: "q", 3: "q"}]
+
+    def structure():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    failed = wait(queue, queue.submit(structure, key="structure:abc"))
+    assert failed.error == "LLM unavailable"
+    # A failed job is only replaced when submitted again
+    assert queue.get(failed.id).status == "failed"
+
+    done = wait(queue, queue.submit(structure, key="structure:abc"))
+    assert done.result == {2: "q", 3: "q"}
+    assert queue.submit(structure, key="structure:abc") == done.id
+    assert outcomes == []
+
+
+def test_results_failing_cache_result_are_not_reused():
+    queue = JobQueue(max_workers=1)
+    results = [{2: "q"}, {2: "q", 3: "q"}]
+    complete = lambda result: all(n in result for n in (2, 3))
+
+    partial = wait(queue, queue.submit(results.pop, 0, key="structure:abc", cache_result=complete))
+    assert partial.result == {2: "q"}
+    retried = queue.submit(results.pop, 0, key="structure:abc", cache_result=complete)
+    assert retried != partial.id
+    assert wait(queue, retried).result == {2: "q", 3: "q"}
+    assert queue.submit(results.pop, 0, key="structure:abc", cache_result=complete) == retried
@@ -0,0 +1,38 @@
+import pytest
+
+from .bench_structured_output import MALFORMED, VALID_JSON, StubModels, generator, run
+from .question_generator import MAX_SCHEMA_ATTEMPTS
+from .question_models import PhraseQuestion
+
+
+@pytest.mark.parametrize("name", MALFORMED)
+def test_malformed_output_is_rejected_and_retried(name):
+    models = StubModels([MALFORMED[name][0], VALID_JSON])
+    question_generator = generator(models)
+    result = question_generator._generate_structured("prompt", PhraseQuestion)
+    assert result == PhraseQuestion.model_validate_json(VALID_JSON).model_dump()
+    metrics = question_generator.metrics.snapshot()
+    assert (metrics["calls"], metrics["parse_failures"], metrics["retries"]) == (2, 1, 1)
+
+
+def test_gives_up_after_max_attempts():
+    models = StubModels([json_output for json_output, _ in MALFORMED.values()])
+    question_generator = generator(models)
+    assert question_generator._generate_structured("prompt", PhraseQuestion) is None
+    assert models.calls == MAX_SCHEMA_ATTEMPTS
+    assert question_generator.metrics.snapshot()["parse_failures"] == MAX_SCHEMA_ATTEMPTS
+
+
+def test_failed_calls_are_not_parse_failures():
+    models = StubModels([ConnectionError("network down"), VALID_JSON])
+    question_generator = generator(models)
+    assert question_generator._generate_structured("prompt", PhraseQuestion) is not None
+    metrics = question_generator.metrics.snapshot()
+    assert (metrics["calls"], metrics["call_failures"], metrics["parse_failures"]) == (2, 1, 0)
+    assert metrics["parse_failure_rate"] == 0
+
+
+def test_schema_mode_wastes_fewer_calls_than_free_text():
+    free_text, structured = run(structured_output=False), run(structured_output=True)
+    assert structured["broken"] == 0 and structured["usable"] == len(MALFORMED)
+    assert structured["wasted"] < free_text["wasted"]
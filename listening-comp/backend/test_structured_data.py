@@ -0,0 +1,47 @@
+import threading
+from types import SimpleNamespace
+
+from .structured_data import TranscriptStructurer
+from .structured_store import StructuredResultStore
+
+
+class CountingModels:
+    """Stands in for client.models and counts generate_content calls"""
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, model, contents, config):
+        with self.lock:
+            self.calls += 1
+        return SimpleNamespace(text=f"<question>{self.calls}</question>")
+
+
+def structurer(models, directory):
+    chat = SimpleNamespace(client=SimpleNamespace(models=models))
+    return TranscriptStructurer(gemini_chat=chat, store=StructuredResultStore(str(directory)))
+
+
+def test_one_llm_call_per_section_of_each_unique_transcript(tmp_path):
+    models = CountingModels()
+    first = structurer(models, tmp_path).structure_transcript("問題2 ...")
+    assert models.calls == 2  # Sections 2 and 3
+
+    # Reruns, including from a new structurer as after a restart, are served from the store
+    for _ in range(3):
+        assert structurer(models, tmp_path).structure_transcript("問題2 ...") == first
+    assert models.calls == 2
+
+    structurer(models, tmp_path).structure_transcript("問題3 ...")
+    assert models.calls == 4
+
+
+def test_concurrent_sessions_structure_a_transcript_once(tmp_path):
+    models = CountingModels()
+    shared = structurer(models, tmp_path)
+    threads = [threading.Thread(target=shared.structure_transcript, args=("問題2 ...",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert models.calls == 2
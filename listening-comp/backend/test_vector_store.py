@@ -0,0 +1,50 @@
+import pytest
+
+from .near_duplicates import MinHashIndex
+from .vector_store import QuestionVectorStore
+
+SITUATION = "朝、駅で偶然大学時代の友達に会いました。久しぶりなので、一緒にお茶を飲みたいです。友達に何と言いますか。"
+
+
+class FlakyCollection:
+    """A Chroma collection whose first add fails"""
+    def __init__(self):
+        self.ids = []
+        self.failures = 1
+
+    def add(self, ids, documents, metadatas):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("embedding request failed")
+        self.ids += ids
+
+
+def store(tmp_path):
+    # Built by hand so no Chroma client or embedding API is needed
+    vector_store = QuestionVectorStore.__new__(QuestionVectorStore)
+    vector_store.persist_directory = str(tmp_path)
+    vector_store.collections = {"section3": FlakyCollection()}
+    vector_store.near_duplicates = {3: MinHashIndex()}
+    return vector_store
+
+
+def question(situation):
+    return {"Situation": situation, "Question": "何と言いますか", "Options": ["a", "b", "c", "d"]}
+
+
+def test_failed_write_leaves_no_trace_in_the_near_duplicate_index(tmp_path):
+    vector_store = store(tmp_path)
+    with pytest.raises(RuntimeError):
+        vector_store.add_questions(3, [question(SITUATION)], "video")
+    assert not vector_store.is_near_duplicate(3, question(SITUATION))
+
+    assert vector_store.add_questions(3, [question(SITUATION)], "video") == 1
+    assert vector_store.is_near_duplicate(3, question(SITUATION.replace("朝", "夜")))
+
+
+def test_near_copies_within_one_call_are_added_once(tmp_path):
+    vector_store = store(tmp_path)
+    vector_store.collections["section3"].failures = 0
+    questions = [question(SITUATION), question(SITUATION.replace("朝", "夜")), question("雨が降っています。")]
+    assert vector_store.add_questions(3, questions, "video") == 2
+    assert len(vector_store.near_duplicates[3]) == 2
@@ -0,0 +1,91 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict
+
+import numpy as np
+
+# Codepoint bin edges; np.searchsorted puts every character in exactly one bin
+BIN_EDGES = np.array([0x80, 0x3040, 0x30A0, 0x3100, 0x4E00, 0xA000], dtype=np.uint32)
+ASCII, HIRAGANA, KATAKANA, KANJI = 0, 2, 3, 5
+
+# Characters decoded per chunk, bounding the temporary arrays to a few tens of MB
+CHUNK_CHARS = 1 << 22
+
+# Stats of recently seen texts keyed by content hash
+CACHE_SIZE = 64
+_cache: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _compute(text: str) -> Dict[str, int]:
+    bins = np.zeros(len(BIN_EDGES) + 1, dtype=np.int64)
+    for offset in range(0, len(text), CHUNK_CHARS):
+        codepoints = np.frombuffer(text[offset:offset + CHUNK_CHARS].encode("utf-32-le"), dtype=np.uint32)
+        bins += np.bincount(np.searchsorted(BIN_EDGES, codepoints, side="right"), minlength=len(bins))
+    hiragana, katakana, kanji = int(bins[HIRAGANA]), int(bins[KATAKANA]), int(bins[KANJI])
+    return {
+        "total": len(text),
+        "japanese": hiragana + katakana + kanji,
+        "hiragana": hiragana,
+        "katakana": katakana,
+        "kana": hiragana + katakana,
+        "kanji": kanji,
+        "ascii": int(bins[ASCII]),
+        "lines": text.count("\n") + 1,
+    }
+
+
+def text_stats(text: str) -> Dict[str, int]:
+    """Character class and line counts of text, cached by content hash.
+
+    Japanese counts cover hiragana (U+3040-309F), katakana (U+30A0-30FF) and
+    CJK unified ideographs (U+4E00-9FFF); lines are newline separated.
+    """
+    if not text:
+        return {"total": 0, "japanese": 0, "hiragana": 0, "katakana": 0, "kana": 0,
+                "kanji": 0, "ascii": 0, "lines": 0}
+    key = hashlib.sha256(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return dict(_cache[key])
+    stats = _compute(text)
+    with _cache_lock:
+        _cache[key] = stats
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return dict(stats)
+
+
+if __name__ == "__main__":
+    # Throughput on a 50MB transcript corpus against the per-character loop it replaces
+    import time
+
+    line = "問題１ 男の人と女の人が話しています。Kaisha de meeting wa 3時からです。カタカナ\n"
+    text = line * (50_000_000 // len(line.encode("utf-8")))
+    print(f"Corpus: {len(text.encode('utf-8')) / 1e6:.0f}MB, {len(text):,} characters")
+
+    def is_japanese(char):
+        return any([
+            '\u4e00' <= char <= '\u9fff',  # Kanji
+            '\u3040' <= char <= '\u309f',  # Hiragana
+            '\u30a0' <= char <= '\u30ff',  # Katakana
+        ])
+
+    sample = text[:len(text) // 20]
+    start = time.perf_counter()
+    expected = sum(1 for char in sample if is_japanese(char))
+    loop = (time.perf_counter() - start) * 20
+    print(f"Per-character loop:  {loop:7.2f}s (extrapolated from 1/20 of the corpus)")
+    assert text_stats(sample)["japanese"] == expected
+
+    start = time.perf_counter()
+    stats = text_stats(text)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    text_stats(text)
+    cached = time.perf_counter() - start
+    print(f"text_stats:          {first:7.2f}s ({loop / first:.0f}x faster)")
+    print(f"text_stats (cached): {cached:7.2f}s (hash only)")
+    print(stats)
@@ -0,0 +1,245 @@
+import json
+import os
+import re
+import struct
+import tempfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"JTRARCH1"
+
+# Section headings as read out in JLPT listening tests, e.g. 問題2 or 問題２
+SECTION_HEADING = re.compile(r"問題\s*([1-4１-４])")
+SECTIONS = 4
+
+# Column name -> dtype; all columns are little-endian
+COLUMNS = {
+    "start": "<f4",
+    "duration": "<f4",
+    "text_offsets": "<u8",   # entries + 1 byte offsets into the text blob
+    "video_offsets": "<u8",  # videos + 1 entry offsets
+    "sections": "<i8",       # videos * SECTIONS first entry of each 問題 section, -1 if absent
+    "text": "u1",
+}
+
+
+def _section_starts(texts: List[str]) -> List[int]:
+    starts = [-1] * SECTIONS
+    for idx, text in enumerate(texts):
+        match = SECTION_HEADING.search(text)
+        if match:
+            section = int(match.group(1).translate(str.maketrans("１２３４", "1234")))
+            if starts[section - 1] == -1:
+                starts[section - 1] = idx
+    return starts
+
+
+class TranscriptArchive:
+    """Timestamped transcripts of many videos in one memory-mapped file.
+
+    Layout: magic, header length, JSON header (video ids and column offsets),
+    then the columns of COLUMNS, each 8-byte aligned. Entries of a video are
+    contiguous and sorted by start time, so time and section slices are a
+    binary search plus reading just those entries' bytes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self.data[:8]) != MAGIC:
+            raise ValueError(f"{path} is not a transcript archive")
+        header_len = struct.unpack("<Q", bytes(self.data[8:16]))[0]
+        header = json.loads(bytes(self.data[16:16 + header_len]).decode("utf-8"))
+        self.video_ids: List[str] = header["video_ids"]
+        self.index = {video_id: idx for idx, video_id in enumerate(self.video_ids)}
+        for name, (offset, count) in header["columns"].items():
+            dtype = np.dtype(COLUMNS[name])
+            setattr(self, f"_{name}", self.data[offset:offset + count * dtype.itemsize].view(dtype))
+        self._sections = self._sections.reshape(-1, SECTIONS)
+
+    @staticmethod
+    def write(path: str, transcripts: Iterable[Tuple[str, List[Dict]]]):
+        """Write (video_id, transcript) pairs to path atomically"""
+        video_ids, starts, durations, texts, video_offsets, sections = [], [], [], [], [0], []
+        for video_id, transcript in transcripts:
+            entries = sorted(transcript, key=lambda entry: entry.get("start", 0.0))
+            video_ids.append(video_id)
+            starts.extend(entry.get("start", 0.0) for entry in entries)
+            durations.extend(entry.get("duration", 0.0) for entry in entries)
+            entry_texts = [entry["text"] for entry in entries]
+            texts.extend(entry_texts)
+            video_offsets.append(len(texts))
+            sections.extend(_section_starts(entry_texts))
+
+        encoded = [text.encode("utf-8") for text in texts]
+        text_offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+        np.cumsum([len(b) for b in encoded], out=text_offsets[1:])
+        columns = {
+            "start": np.asarray(starts, dtype="<f4"),
+            "duration": np.asarray(durations, dtype="<f4"),
+            "text_offsets": text_offsets,
+            "video_offsets": np.asarray(video_offsets, dtype="<u8"),
+            "sections": np.asarray(sections, dtype="<i8"),
+            "text": np.frombuffer(b"".join(encoded), dtype="u1"),
+        }
+
+        # Column offsets depend on the header length, which depends on the offsets;
+        # reserve a fixed-width header by padding the offsets to 20 digits
+        def header_bytes(offsets):
+            header = {"video_ids": video_ids,
+                      "columns": {name: [offsets[name], len(columns[name])] for name in columns}}
+            return json.dumps(header, ensure_ascii=False).encode("utf-8")
+
+        header = header_bytes({name: 10 ** 19 for name in columns})
+        position = 16 + len(header)
+        offsets = {}
+        for name, column in columns.items():
+            position += -position % 8
+            offsets[name] = position
+            position += column.nbytes
+        header = header_bytes(offsets).ljust(len(header))
+
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+            for name, column in columns.items():
+                f.write(b"\0" * (offsets[name] - f.tell()))
+                f.write(column.tobytes())
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return len(self.video_ids)
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self.index
+
+    def _entry_range(self, video_id: str) -> Tuple[int, int]:
+        idx = self.index[video_id]
+        return int(self._video_offsets[idx]), int(self._video_offsets[idx + 1])
+
+    def _entries(self, first: int, last: int) -> List[Dict]:
+        offsets = self._text_offsets[first:last + 1].tolist()
+        blob = bytes(self._text[offsets[0]:offsets[-1]])
+        base = offsets[0]
+        return [
+            {"text": blob[offsets[i] - base:offsets[i + 1] - base].decode("utf-8"),
+             "start": start, "duration": duration}
+            for i, (start, duration) in enumerate(zip(self._start[first:last].tolist(),
+                                                      self._duration[first:last].tolist()))
+        ]
+
+    def _text_between(self, first: int, last: int) -> str:
+        if first >= last:
+            return ""
+        blob = bytes(self._text[int(self._text_offsets[first]):int(self._text_offsets[last])])
+        offsets = (self._text_offsets[first:last + 1] - self._text_offsets[first]).tolist()
+        return "\n".join(blob[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:]))
+
+    def entries(self, video_id: str) -> List[Dict]:
+        """The full transcript of a video in YouTubeTranscriptApi's entry format"""
+        return self._entries(*self._entry_range(video_id))
+
+    def text(self, video_id: str) -> str:
+        """The transcript as newline separated lines, like the .txt transcripts"""
+        return self._text_between(*self._entry_range(video_id))
+
+    def _time_range(self, video_id: str, start: float, end: float) -> Tuple[int, int]:
+        first, last = self._entry_range(video_id)
+        starts = self._start[first:last]
+        # Include an entry that began before start but is still being spoken
+        lo = max(int(np.searchsorted(starts, start, side="right")) - 1, 0)
+        if lo < len(starts) and starts[lo] + self._duration[first + lo] <= start:
+            lo += 1
+        hi = int(np.searchsorted(starts, end, side="left"))
+        return first + lo, first + max(lo, hi)
+
+    def slice_time(self, video_id: str, start: float, end: float) -> List[Dict]:
+        """Entries overlapping [start, end) seconds"""
+        return self._entries(*self._time_range(video_id, start, end))
+
+    def _section_range(self, video_id: str, section_num: int) -> Optional[Tuple[int, int]]:
+        first, last = self._entry_range(video_id)
+        starts = self._sections[self.index[video_id]].tolist()
+        begin = starts[section_num - 1]
+        if begin == -1:
+            return None
+        later = [s for s in starts if s > begin]
+        return first + begin, first + min(later) if later else last
+
+    def section(self, video_id: str, section_num: int) -> List[Dict]:
+        """Entries of the 問題 section_num (1-4), empty if the transcript has no such heading"""
+        entry_range = self._section_range(video_id, section_num)
+        return self._entries(*entry_range) if entry_range else []
+
+    def section_text(self, video_id: str, section_num: int) -> str:
+        entry_range = self._section_range(video_id, section_num)
+        return self._text_between(*entry_range) if entry_range else ""
+
+
+if __name__ == "__main__":
+    # Load and slice speed on a 10k-video archive against the JSON transcript cache
+    import random
+    import shutil
+    import time
+
+    rng = random.Random(0)
+    videos, entries_per_video = 10_000, 200
+    directory = tempfile.mkdtemp()
+
+    def fake_transcript(video_number):
+        transcript, start = [], 0.0
+        for i in range(entries_per_video):
+            text = f"問題{i // 50 + 1}" if i % 50 == 0 else f"動画{video_number}の{i}番目の文です"
+            duration = rng.uniform(1.0, 4.0)
+            transcript.append({"text": text, "start": round(start, 2), "duration": round(duration, 2)})
+            start += duration
+        return transcript
+
+    try:
+        transcripts = [(f"vid{n:08d}", fake_transcript(n)) for n in range(videos)]
+        cache_dir = os.path.join(directory, "cache")
+        os.makedirs(cache_dir)
+        for video_id, transcript in transcripts:
+            with open(os.path.join(cache_dir, f"{video_id}.json"), "w", encoding="utf-8") as f:
+                json.dump({"video_id": video_id, "transcript": transcript}, f, ensure_ascii=False)
+
+        path = os.path.join(directory, "archive.jtr")
+        start = time.perf_counter()
+        TranscriptArchive.write(path, transcripts)
+        print(f"Write: {time.perf_counter() - start:.2f}s, {os.path.getsize(path) / 1e6:.1f}MB "
+              f"(JSON cache {sum(os.path.getsize(os.path.join(cache_dir, n)) for n in os.listdir(cache_dir)) / 1e6:.1f}MB)")
+
+        start = time.perf_counter()
+        archive = TranscriptArchive(path)
+        print(f"Open archive: {(time.perf_counter() - start) * 1000:.1f}ms for {len(archive):,} videos")
+
+        sample = rng.sample([video_id for video_id, _ in transcripts], 1000)
+
+        def timed(name, fn):
+            start = time.perf_counter()
+            for video_id in sample:
+                fn(video_id)
+            print(f"{name:36s} {(time.perf_counter() - start) / len(sample) * 1e6:8.1f}us per video")
+
+        def json_slice(video_id):
+            with open(os.path.join(cache_dir, f"{video_id}.json"), encoding="utf-8") as f:
+                entries = json.load(f)["transcript"]
+            return [e for e in entries if e["start"] < 120 and e["start"] + e["duration"] > 60]
+
+        def json_section(video_id):
+            with open(os.path.join(cache_dir, f"{video_id}.json"), encoding="utf-8") as f:
+                texts = [e["text"] for e in json.load(f)["transcript"]]
+            starts = _section_starts(texts)
+            return "\n".join(texts[starts[1]:starts[2]])
+
+        timed("JSON cache: full transcript", lambda v: json_slice(v) and None)
+        timed("JSON cache: 60-120s slice", json_slice)
+        timed("JSON cache: section 2 text", json_section)
+        timed("archive: full transcript entries", archive.entries)
+        timed("archive: 60-120s slice", lambda v: archive.slice_time(v, 60, 120))
+        timed("archive: section 2 text", lambda v: archive.section_text(v, 2))
+    finally:
+        shutil.rmtree(directory)
@@ -4,6 +4,8 @@ import json
 import os
 from google import genai
 from typing import Dict, List, Optional
+from .near_duplicates import MinHashIndex
+from .question_pool import question_text
 
 class GeminiEmbeddingFunction(embedding_functions.EmbeddingFunction):
     def __init__(self, model_id="text-embedding-004"):
@@ -55,18 +57,58 @@ class QuestionVectorStore:
             )
         }
 
-    def add_questions(self, section_num: int, questions: List[Dict], video_id: str):
-        """Add questions to the vector store"""
+        # MinHash indexes over question text, kept next to the collections
+        self.near_duplicates = {
+            section_num: self._load_near_duplicates(section_num) for section_num in (2, 3)
+        }
+
+    def _near_duplicates_path(self, section_num: int) -> str:
+        return os.path.join(self.persist_directory, f"minhash_section{section_num}.npz")
+
+    def _load_near_duplicates(self, section_num: int) -> MinHashIndex:
+        """Load the section's MinHash index, rebuilding it from the collection if missing"""
+        path = self._near_duplicates_path(section_num)
+        try:
+            return MinHashIndex.load(path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading near-duplicate index, rebuilding: {str(e)}")
+
+        index = MinHashIndex()
+        existing = self.collections[f"section{section_num}"].get(include=['metadatas'])
+        for metadata in existing['metadatas']:
+            index.add(question_text(section_num, json.loads(metadata['full_structure'])))
+        index.save(path)
+        return index
+
+    def is_near_duplicate(self, section_num: int, question: Dict) -> bool:
+        """True if a question with (nearly) the same text is already indexed"""
+        if section_num not in [2, 3]:
+            raise ValueError("Only sections 2 and 3 are currently supported")
+        return self.near_duplicates[section_num].is_near_duplicate(question_text(section_num, question))
+
+    def add_questions(self, section_num: int, questions: List[Dict], video_id: str) -> int:
+        """Add questions to the vector store, skipping near-duplicates. Returns the number added."""
         if section_num not in [2, 3]:
             raise ValueError("Only sections 2 and 3 are currently supported")
             
         collection = self.collections[f"section{section_num}"]
+        near_duplicates = self.near_duplicates[section_num]
+        # Questions of this call, kept out of near_duplicates until Chroma has them
+        added = near_duplicates.empty_copy()
         
         ids = []
         documents = []
         metadatas = []
         
         for idx, question in enumerate(questions):
+            # Overlapping transcripts yield the same questions again
+            text = question_text(section_num, question)
+            if near_duplicates.is_near_duplicate(text) or added.is_near_duplicate(text):
+                continue
+            added.add(text)
+
             # Create a unique ID for each question
             question_id = f"{video_id}_{section_num}_{idx}"
             ids.append(question_id)
@@ -93,12 +135,19 @@ class QuestionVectorStore:
                 """
             documents.append(document)
         
+        if not ids:
+            return 0
+
         # Add to collection
         collection.add(
             ids=ids,
             documents=documents,
             metadatas=metadatas
         )
+        # Only after the write, so questions Chroma didn't take don't block later copies
+        near_duplicates.add_signatures(added.signatures[:len(added)])
+        near_duplicates.save(self._near_duplicates_path(section_num))
+        return len(ids)
 
     def search_similar_questions(
         self, 
@@ -202,8 +251,8 @@ class QuestionVectorStore:
         
         # Add to vector store
         if questions:
-            self.add_questions(section_num, questions, video_id)
-            print(f"Indexed {len(questions)} questions from {filename}")
+            added = self.add_questions(section_num, questions, video_id)
+            print(f"Indexed {added} of {len(questions)} questions from {filename}")
 
 if __name__ == "__main__":
     # Example usage
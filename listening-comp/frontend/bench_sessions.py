@@ -0,0 +1,68 @@
+"""Simulate concurrent Streamlit sessions and report rerun latency and memory.
+
+Uses Streamlit's AppTest harness so no browser is needed. Run it from the
+listening-comp directory, with the same environment as the app:
+
+    python frontend/bench_sessions.py --sessions 20 --reruns 10 --stage "4. RAG Implementation"
+"""
+import argparse
+import os
+import resource
+import statistics
+import threading
+import time
+
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def run_session(stage: str, reruns: int, latencies: list, lock: threading.Lock):
+    app = AppTest.from_file(APP_PATH, default_timeout=120)
+    app.run()
+    app.sidebar.radio[0].set_value(stage)
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+
+def main(args):
+    latencies = []
+    lock = threading.Lock()
+    rss_before = current_rss_mb()
+
+    threads = [
+        threading.Thread(target=run_session, args=(args.stage, args.reruns, latencies, lock))
+        for _ in range(args.sessions)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"sessions={args.sessions} reruns/session={args.reruns} stage={args.stage!r}")
+    print(f"rerun p50={statistics.median(latencies) * 1000:.1f}ms "
+          f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms "
+          f"max={latencies[-1] * 1000:.1f}ms wall={wall:.1f}s")
+    print(f"rss before={rss_before:.0f}MB after={current_rss_mb():.0f}MB "
+          f"peak={resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--stage", default="4. RAG Implementation")
+    main(parser.parse_args())
@@ -2,6 +2,7 @@ import streamlit as st
 from typing import Dict
 import json
 from collections import Counter
+import hashlib
 import re
 
 import sys
@@ -10,9 +11,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backend.chat import GeminiChat
 from backend.get_transcript import YouTubeTranscriptDownloader
-from backend.structured_data import TranscriptStructurer
+from backend.text_stats import text_stats
+from backend.structured_data import SECTIONS, TranscriptStructurer
 from backend.vector_store import QuestionVectorStore
 from backend.question_generator import QuestionGenerator
+from backend.jobs import JobQueue, report_progress
+from backend.question_pool import QuestionPool
+from backend.audio_generator import AudioGenerator
 
 # Page config
 st.set_page_config(
@@ -21,6 +26,66 @@ st.set_page_config(
     layout="wide"
 )
 
+# Practice topics per practice type, and the JLPT section their questions come from
+PRACTICE_TOPICS = {
+    "Dialogue Practice": ["Daily Conversation", "Shopping", "Restaurant", "Travel", "School/Work"],
+    "Phrase Matching": ["Announcements", "Instructions", "Weather Reports", "News Updates"]
+}
+PRACTICE_SECTIONS = {"Dialogue Practice": 2, "Phrase Matching": 3}
+
+# Heavy clients are shared by every session in the process instead of being
+# rebuilt on each rerun. clear_cached_resources() drops them all.
+@st.cache_resource
+def get_gemini_chat() -> GeminiChat:
+    return GeminiChat()
+
+@st.cache_resource
+def get_vector_store() -> QuestionVectorStore:
+    return QuestionVectorStore()
+
+@st.cache_resource
+def get_structurer() -> TranscriptStructurer:
+    return TranscriptStructurer(gemini_chat=get_gemini_chat())
+
+@st.cache_resource
+def get_question_generator() -> QuestionGenerator:
+    return QuestionGenerator(gemini_client=get_gemini_chat(), vector_store=get_vector_store())
+
+@st.cache_resource
+def get_question_pool() -> QuestionPool:
+    return QuestionPool(get_question_generator())
+
+@st.cache_resource
+def get_audio_generator() -> AudioGenerator:
+    return AudioGenerator()
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    return JobQueue()
+
+CACHED_RESOURCES = [get_audio_generator, get_question_pool, get_question_generator, get_structurer, get_vector_store, get_gemini_chat]
+
+def clear_cached_resources():
+    """Drop all shared clients so they are rebuilt on next use"""
+    for resource in CACHED_RESOURCES:
+        resource.clear()
+
+@st.cache_resource
+def warm_up():
+    """Build the shared clients once when the server handles its first session"""
+    try:
+        get_question_generator()
+        get_structurer()
+        # Start filling the question pools so the first click is served instantly
+        pool = get_question_pool()
+        for practice_type, topics in PRACTICE_TOPICS.items():
+            for topic in topics:
+                pool.refill(PRACTICE_SECTIONS[practice_type], topic)
+    except Exception as e:
+        print(f"Error warming up resources: {str(e)}")
+
+warm_up()
+
 # Initialize session state
 if 'transcript' not in st.session_state:
     st.session_state.transcript = None
@@ -30,10 +95,6 @@ if 'url' not in st.session_state:
     st.session_state.url = None
 if 'transcript' not in st.session_state:
     st.session_state.transcript = None
-if 'question_generator' not in st.session_state:
-    st.session_state.question_generator = QuestionGenerator()
-# if 'audio_generator' not in st.session_state:
-#     st.session_state.audio_generator = AudioGenerator()
 if 'current_question' not in st.session_state:
     st.session_state.current_question = None
 if 'feedback' not in st.session_state:
@@ -44,6 +105,47 @@ if 'current_topic' not in st.session_state:
     st.session_state.current_topic = None
 if 'current_audio' not in st.session_state:
     st.session_state.current_audio = None
+# Ids of background jobs this session is waiting on
+for job_slot in ['transcript_job', 'structure_job', 'question_job', 'feedback_job', 'explanation_job', 'audio_job']:
+    if job_slot not in st.session_state:
+        st.session_state[job_slot] = None
+
+
+@st.fragment(run_every=0.5)
+def poll_job(job_id: str):
+    """Show job progress and rerun the page once the job finishes"""
+    job = get_job_queue().get(job_id)
+    if job is None or job.finished:
+        st.rerun()
+    st.progress(job.progress, text=job.message)
+
+def finished_job(job_slot: str):
+    """Return the session's job in job_slot once it has finished, showing progress until then"""
+    job = get_job_queue().get(st.session_state[job_slot])
+    if job is None:
+        return None
+    if not job.finished:
+        poll_job(job.id)
+        return None
+    return job
+
+def download_transcript(url: str):
+    """Background job: download and save a transcript, returning its text"""
+    downloader = YouTubeTranscriptDownloader()
+    report_progress(0.1, "Downloading transcript...")
+    # fetch serves cached videos from disk and saves new downloads
+    transcript = downloader.fetch(url)
+    if not transcript:
+        return None
+    return "\n".join([entry['text'] for entry in transcript])
+
+def structure_and_save(transcript: str, video_id: str):
+    """Background job: structure a transcript and save its sections"""
+    structurer = get_structurer()
+    report_progress(0.1, "Structuring transcript...")
+    structured_data = structurer.structure_transcript(transcript)
+    structurer.save_questions(structured_data, f"backend/questions/{video_id}")
+    return structured_data
 
 
 def render_header():
@@ -116,6 +218,11 @@ def render_sidebar():
         
         st.markdown("---")
         st.markdown(stage_info[selected_stage])
+
+        st.markdown("---")
+        if st.button("Reload Clients", help="Rebuild the shared LLM and vector store clients"):
+            clear_cached_resources()
+            warm_up.clear()
         
         return selected_stage
 
@@ -128,10 +235,6 @@ def render_chat_stage():
         pass
         # st.session_state.bedrock_chat = BedrockChat()
 
-    # Initialize GeminiChat instance if not in session state
-    if 'gemini_chat' not in st.session_state:
-        st.session_state.gemini_chat = GeminiChat()
-
     # Introduction text
     st.markdown("""
     Start by exploring Nova's base Japanese language capabilities. Try asking questions about Japanese grammar, 
@@ -186,25 +289,15 @@ def process_message(message: str):
     # Generate and display assistant's response
     with st.chat_message("assistant", avatar="🤖"):
         # response = st.session_state.bedrock_chat.generate_response(message)
-        response = st.session_state.gemini_chat.generate_response(message)
+        # Render tokens as they arrive instead of waiting for the full response
+        response = st.write_stream(get_gemini_chat().generate_response_stream(message))
         if response:
-            st.markdown(response)
             st.session_state.messages.append({"role": "assistant", "content": response})
 
 def count_characters(text):
     """Count Japanese and total characters in text"""
-    if not text:
-        return 0, 0
-        
-    def is_japanese(char):
-        return any([
-            '\u4e00' <= char <= '\u9fff',  # Kanji
-            '\u3040' <= char <= '\u309f',  # Hiragana
-            '\u30a0' <= char <= '\u30ff',  # Katakana
-        ])
-    
-    jp_chars = sum(1 for char in text if is_japanese(char))
-    return jp_chars, len(text)
+    stats = text_stats(text)
+    return stats["japanese"], stats["total"]
 
 def render_transcript_stage():
     """Render the raw transcript stage"""
@@ -220,19 +313,19 @@ def render_transcript_stage():
     # Download button and processing
     if url:
         if st.button("Download Transcript"):
-            try:
-                downloader = YouTubeTranscriptDownloader()
-                transcript = downloader.get_transcript(url)
-                if transcript:
-                    # Store the raw transcript text in session state
-                    transcript_text = "\n".join([entry['text'] for entry in transcript])
-                    st.session_state.transcript = transcript_text
-                    downloader.save_transcript(transcript, downloader.extract_video_id(url))
-                    st.success("Transcript downloaded successfully!")
-                else:
-                    st.error("No transcript found for this video.")
-            except Exception as e:
-                st.error(f"Error downloading transcript: {str(e)}")
+            st.session_state.transcript_job = get_job_queue().submit(download_transcript, url)
+
+        job = finished_job('transcript_job')
+        if job:
+            st.session_state.transcript_job = None
+            if job.error:
+                st.error(f"Error downloading transcript: {job.error}")
+            elif job.result:
+                # Store the raw transcript text in session state
+                st.session_state.transcript = job.result
+                st.success("Transcript downloaded successfully!")
+            else:
+                st.error("No transcript found for this video.")
 
     col1, col2 = st.columns(2)
     
@@ -254,7 +347,8 @@ def render_transcript_stage():
         if st.session_state.transcript:
             # Calculate stats
             jp_chars, total_chars = count_characters(st.session_state.transcript)
-            total_lines = len(st.session_state.transcript.split('\n'))
+            # Cached by content hash, so reruns don't rescan the transcript
+            total_lines = text_stats(st.session_state.transcript)["lines"]
             
             # Display stats
             st.metric("Total Characters", total_chars)
@@ -267,20 +361,53 @@ def render_structured_stage():
     """Render the structured data stage"""
     st.header("Structured Data Processing")
     
-    # Instantiate the TranscriptStructurer
-    structurer = TranscriptStructurer()
+    structurer = get_structurer()
     downloader = YouTubeTranscriptDownloader()
 
+    # Structuring runs in the background; the job is keyed by transcript content so
+    # other sessions reuse the same job and its result
+    structured_data = None
+    if 'url' in st.session_state and st.session_state.url:
+        video_id = downloader.extract_video_id(st.session_state.url)
+        transcript = structurer.load_transcript(f"backend/transcripts/{video_id}.txt")  # Update the path as needed
+        if transcript:
+            st.session_state.transcript = transcript
+            transcript_hash = hashlib.sha256(transcript.encode('utf-8')).hexdigest()
+            key = f"structure:{transcript_hash}"
+
+            def submit_structuring():
+                st.session_state.structure_job = get_job_queue().submit(
+                    structure_and_save, transcript, video_id, key=key,
+                    # Partial results aren't reused, so a retry asks for the missing sections
+                    cache_result=lambda result: all(n in result for n in SECTIONS)
+                )
+
+            # Submitted once per transcript; a failed or partial job stays until the user retries
+            job = get_job_queue().get(st.session_state.structure_job)
+            if job is None or job.key != key:
+                submit_structuring()
+            job = finished_job('structure_job')
+            missing = []
+            if job and job.error:
+                st.error(f"Error structuring transcript: {job.error}")
+            elif job:
+                structured_data = job.result
+                missing = [n for n in SECTIONS if n not in structured_data]
+                if missing:
+                    st.warning(f"Could not structure section(s) {', '.join(map(str, missing))}")
+            if job and (job.error or missing):
+                if st.button("Retry Structuring"):
+                    submit_structuring()
+                    st.rerun()
+
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Dialogue Extraction")
         # Example of loading a transcript and extracting dialogue
-        if 'url' in st.session_state and st.session_state.url:
-            transcript = structurer.load_transcript(f"backend/transcripts/{downloader.extract_video_id(st.session_state.url)}.txt")  # Update the path as needed
-            dialogue = structurer.structure_transcript(transcript)[2]
+        if structured_data:
+            dialogue = structured_data.get(2, "")
             conversation_tags = re.findall(r"Conversation:\s*\[(.*?)\]\s*Question", dialogue, re.DOTALL)  # Updated regex pattern
-            st.session_state.transcript = transcript
             for tag in conversation_tags:
                 st.info(tag)
             # st.info(dialogue)  # Display the extracted dialogue
@@ -290,8 +417,7 @@ def render_structured_stage():
     with col2:
         st.subheader("Data Structure")
         # Example of displaying structured data
-        if st.session_state.transcript:
-            structured_data = structurer.structure_transcript(transcript) 
+        if structured_data:
             st.json(structured_data)  # Display structured data in JSON format
         else:
             st.warning("No structured data available.")
@@ -300,8 +426,7 @@ def render_rag_stage():
     """Render the RAG implementation stage"""
     st.header("RAG System")
     
-    # Instantiate the QuestionVectorStore
-    vector_store = QuestionVectorStore()
+    vector_store = get_vector_store()
     
     # Query input
     query = st.text_input(
@@ -334,7 +459,7 @@ def render_rag_stage():
                 if conversation:  
                     conversations += conversation
 
-            response = GeminiChat().generate_response(query+conversations)  # Implement this function
+            response = get_gemini_chat().generate_response(query+conversations)  # Implement this function
             
             if response:
                 st.info(response)  # Display the generated response
@@ -360,25 +485,34 @@ def render_interactive_stage():
         st.subheader("Practice Scenario")
         # Placeholder for scenario
         # Topic selection
-        topics = {
-            "Dialogue Practice": ["Daily Conversation", "Shopping", "Restaurant", "Travel", "School/Work"],
-            "Phrase Matching": ["Announcements", "Instructions", "Weather Reports", "News Updates"]
-        }
-        
         topic = st.selectbox(
             "Select Topic",
-            topics[practice_type]
+            PRACTICE_TOPICS[practice_type]
         )
 
         if st.button("Generate New Question"):
-            section_num = 2 if practice_type == "Dialogue Practice" else 3
-            new_question = st.session_state.question_generator.generate_similar_question(
-                section_num, topic
-            )
-            st.session_state.current_question = new_question
+            section_num = PRACTICE_SECTIONS[practice_type]
             st.session_state.current_practice_type = practice_type
             st.session_state.current_topic = topic
+            # Serve a pre-generated question if one is ready, otherwise generate one in the background
+            question = get_question_pool().take(section_num, topic)
+            if question:
+                st.session_state.current_question = question
+                st.session_state.feedback = None
+                st.session_state.current_audio = None
+            else:
+                st.session_state.question_job = get_job_queue().submit(
+                    get_question_generator().generate_similar_question, section_num, topic
+                )
+
+        job = finished_job('question_job')
+        if job:
+            st.session_state.question_job = None
+            if job.error:
+                st.error(f"Error generating question: {job.error}")
+            st.session_state.current_question = job.result
             st.session_state.feedback = None
+            st.session_state.current_audio = None
 
         if st.session_state.current_question:
             st.write("**Question:**")
@@ -424,10 +558,25 @@ def render_interactive_stage():
                     st.success(explanation)
                 else:
                     st.error(explanation)
+
+                # A longer LLM explanation is only fetched on request
+                if st.button("Explain in more detail"):
+                    st.session_state.explanation_job = get_job_queue().submit(
+                        get_question_generator().explain_answer,
+                        st.session_state.current_question,
+                        st.session_state.selected_answer
+                    )
+                job = finished_job('explanation_job')
+                if job:
+                    if job.result:
+                        st.info(job.result)
+                    else:
+                        st.warning("Unable to generate a detailed explanation.")
                 
                 # Add button to try new question
                 if st.button("Try Another Question"):
                     st.session_state.feedback = None
+                    st.session_state.explanation_job = None
                     st.rerun()
             else:
                 # Display options as radio buttons when no feedback yet
@@ -442,17 +591,60 @@ def render_interactive_stage():
                 if selected and st.button("Submit Answer"):
                     selected_index = options.index(selected) + 1
                     st.session_state.selected_answer = selected_index
-                    st.session_state.feedback = st.session_state.question_generator.get_feedback(
+                    st.session_state.explanation_job = None
+                    if isinstance(st.session_state.current_question.get('Answer'), int):
+                        # Answer key is stored with the question, no LLM call needed
+                        st.session_state.feedback = get_question_generator().get_feedback(
+                            st.session_state.current_question,
+                            selected_index
+                        )
+                        st.rerun()
+                    st.session_state.feedback_job = get_job_queue().submit(
+                        get_question_generator().get_feedback,
                         st.session_state.current_question,
                         selected_index
                     )
-                    # st.write(st.session_state.feedback)
-                    st.rerun()
+
+                job = finished_job('feedback_job')
+                if job:
+                    st.session_state.feedback_job = None
+                    if job.error:
+                        st.error(f"Error generating feedback: {job.error}")
+                    else:
+                        st.session_state.feedback = job.result
+                        # st.write(st.session_state.feedback)
+                        st.rerun()
 
     with col2:
         st.subheader("Audio")
-        # Placeholder for audio player
-        st.info("Audio will appear here") 
+        question = st.session_state.current_question
+        if question:
+            if st.button("Generate Audio"):
+                st.session_state.current_audio = None
+                try:
+                    audio_generator = get_audio_generator()
+                except RuntimeError as e:
+                    # No TTS engine; not cached, so the next click tries again
+                    st.error(str(e))
+                else:
+                    st.session_state.audio_job = get_job_queue().submit(
+                        audio_generator.generate_audio, question
+                    )
+
+            job = finished_job('audio_job')
+            if job:
+                st.session_state.audio_job = None
+                if job.error:
+                    st.error(f"Error generating audio: {job.error}")
+                else:
+                    st.session_state.current_audio = job.result
+
+            if st.session_state.current_audio:
+                st.audio(st.session_state.current_audio, format="audio/wav")
+                if get_audio_generator().engine.name == "stub":
+                    st.warning("TTS_ENGINE=stub is set, so this audio is placeholder tones, not speech.")
+        else:
+            st.info("Audio will appear here")
         
 
 def main():
@@ -1,4 +1,4 @@
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
 from comps.cores.proto.api_protocol import (
     ChatCompletionRequest,
     ChatCompletionResponse,
@@ -8,6 +8,9 @@ from comps.cores.proto.api_protocol import (
 )
 from comps.cores.mega.constants import ServiceType, ServiceRoleType
 from comps import MicroService, ServiceOrchestrator
+from llm_router import LLMRouter, LLM_ENDPOINTS, completion_text, parse_endpoints
+from conversation import ConversationStore, message_tokens
+import json
 import os
 import warnings
 warnings.filterwarnings("ignore", category=SyntaxWarning)
@@ -16,6 +19,7 @@ EMBEDDING_SERVICE_HOST_IP = os.getenv("EMBEDDING_SERVICE_HOST_IP", "0.0.0.0")
 EMBEDDING_SERVICE_PORT = os.getenv("EMBEDDING_SERVICE_PORT", 6000)
 LLM_SERVICE_HOST_IP = os.getenv("LLM_SERVICE_HOST_IP", "0.0.0.0")
 LLM_SERVICE_PORT = os.getenv("LLM_SERVICE_PORT", 9000)
+CONVERSATION_ID_HEADER = "X-Conversation-Id"
 
 
 class ExampleService:
@@ -24,6 +28,10 @@ class ExampleService:
         self.port = port
         self.endpoint = "/v1/example-service"
         self.megaservice = ServiceOrchestrator()
+        # LLM_ENDPOINTS backends, even just one, are routed directly instead of through the orchestrator
+        backends = parse_endpoints(LLM_ENDPOINTS)
+        self.router = LLMRouter(backends) if backends else None
+        self.conversations = ConversationStore()
 
     def add_remote_service(self):
         # embedding = MicroService(
@@ -60,36 +68,52 @@ class ExampleService:
         self.service.add_route(self.endpoint, self.handle_request, methods=["POST"])
         self.service.start()
 
-    async def handle_request(self, request: ChatCompletionRequest) -> ChatCompletionResponse:
+    async def _read_orchestrator_result(self, result) -> str:
+        # Extract the actual content from the response
+        if isinstance(result, tuple) and len(result) > 0:
+            llm_response = result[0].get('llm/MicroService')
+            if hasattr(llm_response, 'body'):
+                # Read and process the response
+                response_body = b""
+                async for chunk in llm_response.body_iterator:
+                    response_body += chunk
+                # The same assistant text the router path returns, not the raw JSON body
+                return completion_text(json.loads(response_body))
+            return "No response content available"
+        return "Invalid response format"
+
+    def _conversation_id(self, request: ChatCompletionRequest, http_request: Request):
+        # `user` names the end user, who may have several conversations, so it isn't a key
+        conversation_id = http_request.headers.get(CONVERSATION_ID_HEADER)
+        metadata = getattr(request, "metadata", None)
+        if not conversation_id and isinstance(metadata, dict):
+            conversation_id = metadata.get("conversation_id")
+        return str(conversation_id) if conversation_id else None
+
+    async def handle_request(self, request: ChatCompletionRequest, http_request: Request) -> ChatCompletionResponse:
         try:
+            # Conversations are keyed by the X-Conversation-Id header or
+            # metadata.conversation_id; without one the request is windowed on its own
+            conversation_id = self._conversation_id(request, http_request)
+            messages = self.conversations.build_prompt(conversation_id, request.messages)
+            prompt_tokens = sum(message_tokens(m) for m in messages)
+
             # Format the request for Ollama
             ollama_request = {
                 "model": request.model or "llama3.2:1b",  # or whatever default model you're using
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": request.messages  # assuming messages is a string
-                    }
-                ],
+                "messages": messages,
                 "stream": False  # disable streaming for now
             }
             
-            # Schedule the request through the orchestrator
-            result = await self.megaservice.schedule(ollama_request)
-            
-            # Extract the actual content from the response
-            if isinstance(result, tuple) and len(result) > 0:
-                llm_response = result[0].get('llm/MicroService')
-                if hasattr(llm_response, 'body'):
-                    # Read and process the response
-                    response_body = b""
-                    async for chunk in llm_response.body_iterator:
-                        response_body += chunk
-                    content = response_body.decode('utf-8')
-                else:
-                    content = "No response content available"
+            if self.router:
+                self.router.start_health_checks()
+                result = await self.router.complete(ollama_request)
+                content = completion_text(result)
             else:
-                content = "Invalid response format"
+                # Schedule the request through the orchestrator
+                result = await self.megaservice.schedule(ollama_request)
+                content = await self._read_orchestrator_result(result)
+            self.conversations.record_reply(conversation_id, content)
 
             # Create the response
             response = ChatCompletionResponse(
@@ -105,9 +129,9 @@ class ExampleService:
                     )
                 ],
                 usage=UsageInfo(
-                    prompt_tokens=0,
+                    prompt_tokens=prompt_tokens,
                     completion_tokens=0,
-                    total_tokens=0
+                    total_tokens=prompt_tokens
                 )
             )
             
@@ -0,0 +1,74 @@
+"""Replay a synthetic multi-turn conversation and report prompt size per turn.
+
+Without --url the prompts are only built locally, which shows the token count
+and whether each prompt extends the previous one (a warm KV-cache prefix).
+With --url every turn is also sent to a running mega-service and timed.
+
+    python benchmark_conversation.py --turns 50
+    python benchmark_conversation.py --turns 50 --url http://localhost:8000/v1/example-service
+"""
+import argparse
+import json
+import time
+import urllib.request
+
+from conversation import ConversationStore, message_tokens
+
+
+def synthetic_turn(i: int) -> str:
+    return f"Turn {i}: how would I say 'I went to the station on day {i}' politely? " * 3
+
+
+def synthetic_reply(i: int) -> str:
+    return f"駅に行きました (day {i}). Remember to use the polite ます form when speaking. " * 4
+
+
+def post(url: str, conversation_id: str, message: str) -> str:
+    body = json.dumps({"model": "llama3.2:1b", "messages": message}).encode("utf-8")
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json",
+                                                              "X-Conversation-Id": conversation_id})
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)["choices"][0]["message"]["content"]
+
+
+def main(args):
+    store = ConversationStore(token_budget=args.budget)
+    previous = []
+    naive_tokens = 0
+    total_tokens = 0
+    prefix_hits = 0
+
+    print(f"{'turn':>4} {'prompt_tokens':>13} {'unbounded':>9} {'prefix':>6} {'latency_ms':>10}")
+    for turn in range(1, args.turns + 1):
+        message = synthetic_turn(turn)
+        prompt = store.build_prompt("bench", message)
+        tokens = sum(message_tokens(m) for m in prompt)
+        naive_tokens += sum(message_tokens(m) for m in store.histories["bench"])
+        total_tokens += tokens
+
+        reused = len(previous) > 0 and prompt[:len(previous)] == previous
+        prefix_hits += reused
+
+        latency = ""
+        if args.url:
+            start = time.perf_counter()
+            reply = post(args.url, "bench", message)
+            latency = f"{(time.perf_counter() - start) * 1000:.0f}"
+        else:
+            reply = synthetic_reply(turn)
+        store.record_reply("bench", reply)
+        previous = prompt + [{"role": "assistant", "content": reply}]
+
+        unbounded = sum(message_tokens(m) for m in store.histories["bench"][:-1])
+        print(f"{turn:>4} {tokens:>13} {unbounded:>9} {'yes' if reused else 'no':>6} {latency:>10}")
+
+    print(f"\nprompt tokens sent: {total_tokens} (unbounded history: {naive_tokens})")
+    print(f"turns reusing previous prefix: {prefix_hits}/{args.turns - 1}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--budget", type=int, default=2048)
+    parser.add_argument("--url")
+    main(parser.parse_args())
@@ -0,0 +1,90 @@
+"""Compare single-backend routing against LLMRouter using local fake backends.
+
+Each fake backend answers /v1/chat/completions after a random delay; one in
+ten requests hits a slow path to simulate a stalled model.
+
+    python benchmark_router.py --requests 400 --concurrency 16
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from aiohttp import web
+
+from llm_router import Backend, LLMRouter
+
+
+def make_app(base_latency: float, slow_latency: float, slow_ratio: float, seed: int):
+    rng = random.Random(seed)
+
+    async def completions(request):
+        await request.json()
+        delay = slow_latency if rng.random() < slow_ratio else base_latency * rng.uniform(0.5, 1.5)
+        await asyncio.sleep(delay)
+        return web.json_response({"choices": [{"message": {"role": "assistant", "content": "ok"}}]})
+
+    async def tags(request):
+        return web.json_response({"models": []})
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", completions)
+    app.router.add_get("/api/tags", tags)
+    return app
+
+
+async def start_backends(count: int, base_port: int):
+    runners = []
+    for i in range(count):
+        runner = web.AppRunner(make_app(0.05 * (1 + i % 2), 1.0, 0.1, seed=i))
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", base_port + i).start()
+        runners.append(runner)
+    return runners
+
+
+async def run(router: LLMRouter, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    payload = {"model": "fake", "messages": [{"role": "user", "content": "hi"}]}
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await router.complete(payload)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+async def main(args):
+    runners = await start_backends(args.backends, args.port)
+    try:
+        single = LLMRouter([Backend("127.0.0.1", args.port)], hedge_percentile=0)
+        multi = LLMRouter([Backend("127.0.0.1", args.port + i) for i in range(args.backends)],
+                          hedge_percentile=args.hedge_percentile)
+        for name, router in (("single", single), ("multi+hedge", multi)):
+            stats = await run(router, args.requests, args.concurrency)
+            print(f"{name:12s} p50={stats['p50'] * 1000:7.1f}ms "
+                  f"p95={stats['p95'] * 1000:7.1f}ms p99={stats['p99'] * 1000:7.1f}ms")
+            await router.close()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", type=int, default=3)
+    parser.add_argument("--port", type=int, default=18000)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--hedge-percentile", type=float, default=90)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,103 @@
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 2048))
+# Old turns are dropped this many messages at a time so the prompt prefix stays
+# identical between drops and Ollama can keep reusing its KV cache.
+CONTEXT_DROP_CHUNK = int(os.getenv("CONTEXT_DROP_CHUNK", 8))
+MAX_CONVERSATIONS = int(os.getenv("MAX_CONVERSATIONS", 1000))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate: ~4 ASCII characters per token, one token per CJK character"""
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def message_tokens(message: Dict) -> int:
+    # A few tokens of overhead for the role and message delimiters
+    return estimate_tokens(message["content"]) + 4
+
+
+def normalize_messages(messages: Union[str, List]) -> List[Dict]:
+    """Turn a ChatCompletionRequest.messages value into a list of {role, content} dicts"""
+    if isinstance(messages, str):
+        return [{"role": "user", "content": messages}]
+
+    normalized = []
+    for message in messages:
+        if not isinstance(message, dict):
+            message = message.dict()
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            # OpenAI content parts, keep the text ones
+            content = "\n".join(part.get("text", "") for part in content if part.get("type") == "text")
+        normalized.append({"role": message.get("role", "user"), "content": content})
+    return normalized
+
+
+class ConversationStore:
+    """Per-conversation message history with a bounded context window"""
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET,
+                 drop_chunk: int = CONTEXT_DROP_CHUNK,
+                 max_conversations: int = MAX_CONVERSATIONS):
+        self.token_budget = token_budget
+        self.drop_chunk = max(1, drop_chunk)
+        self.max_conversations = max_conversations
+        self.histories: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self.offsets: Dict[str, int] = {}
+
+    def build_prompt(self, conversation_id: Optional[str], messages: Union[str, List]) -> List[Dict]:
+        """Merge the incoming messages into the history and return the window to forward"""
+        incoming = normalize_messages(messages)
+        if conversation_id is None:
+            return self.window(incoming)
+
+        if len(incoming) > 1:
+            # The client sent the whole conversation, trust it over our copy
+            history = incoming
+        else:
+            history = self.histories.get(conversation_id, []) + incoming
+
+        self.histories[conversation_id] = history
+        self.histories.move_to_end(conversation_id)
+        while len(self.histories) > self.max_conversations:
+            evicted, _ = self.histories.popitem(last=False)
+            self.offsets.pop(evicted, None)
+
+        offset = self.offsets.get(conversation_id, 0)
+        window = self.window(history, offset)
+        # Number of non-system turns that were left out of the window
+        self.offsets[conversation_id] = len(history) - len(window)
+        return window
+
+    def record_reply(self, conversation_id: Optional[str], content: str):
+        if conversation_id in self.histories:
+            self.histories[conversation_id].append({"role": "assistant", "content": content})
+
+    def window(self, history: List[Dict], offset: int = 0) -> List[Dict]:
+        """Keep system messages plus the newest turns that fit the token budget.
+
+        Turns before `offset` were already dropped on an earlier call; the
+        offset only moves forward, and in whole chunks, so consecutive prompts
+        share the same prefix.
+        """
+        system = [m for m in history if m["role"] == "system"]
+        turns = [m for m in history if m["role"] != "system"]
+        offset = min(offset, max(0, len(turns) - 1))
+
+        budget = self.token_budget - sum(message_tokens(m) for m in system)
+        tokens = sum(message_tokens(m) for m in turns[offset:])
+        while tokens > budget and offset < len(turns) - 1:
+            dropped = turns[offset:min(offset + self.drop_chunk, len(turns) - 1)]
+            tokens -= sum(message_tokens(m) for m in dropped)
+            offset += len(dropped)
+
+        kept = turns[offset:]
+        # Never start the window on an assistant message
+        while len(kept) > 1 and kept[0]["role"] == "assistant":
+            kept = kept[1:]
+        return system + kept
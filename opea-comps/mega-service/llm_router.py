@@ -0,0 +1,208 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import aiohttp
+
+
+# Comma separated list of "host:port" or "host:port=weight" entries,
+# e.g. "10.0.0.5:9000=2,10.0.0.6:9000=1"
+LLM_ENDPOINTS = os.getenv("LLM_ENDPOINTS", "")
+LLM_ENDPOINT_PATH = os.getenv("LLM_ENDPOINT_PATH", "/v1/chat/completions")
+LLM_HEALTH_PATH = os.getenv("LLM_HEALTH_PATH", "/api/tags")
+LLM_HEALTH_INTERVAL = float(os.getenv("LLM_HEALTH_INTERVAL", 5))
+LLM_MAX_FAILURES = int(os.getenv("LLM_MAX_FAILURES", 3))
+LLM_EJECT_SECONDS = float(os.getenv("LLM_EJECT_SECONDS", 30))
+# Fire a second (hedged) request once the first one has been running longer
+# than this percentile of recently observed latencies. Set to 0 to disable.
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 95))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", 120))
+
+
+class Backend:
+    def __init__(self, host: str, port: int, weight: float = 1.0):
+        self.host = host
+        self.port = port
+        self.weight = weight
+        self.outstanding = 0
+        # Completions and health probes eject a backend separately, so a probe
+        # that passes can't re-admit a backend whose completions keep failing
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.probe_failures = 0
+        self.probe_ejected_until = 0.0
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def is_healthy(self, now: Optional[float] = None) -> bool:
+        return (now or time.monotonic()) >= max(self.ejected_until, self.probe_ejected_until)
+
+    def record_success(self):
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= LLM_MAX_FAILURES:
+            self.ejected_until = time.monotonic() + LLM_EJECT_SECONDS
+
+    def record_probe_success(self):
+        self.probe_failures = 0
+        self.probe_ejected_until = 0.0
+
+    def record_probe_failure(self):
+        self.probe_failures += 1
+        if self.probe_failures >= LLM_MAX_FAILURES:
+            self.probe_ejected_until = time.monotonic() + LLM_EJECT_SECONDS
+
+    def __repr__(self):
+        return f"Backend({self.host}:{self.port}, weight={self.weight})"
+
+
+def parse_endpoints(spec: str) -> List[Backend]:
+    """Parse an LLM_ENDPOINTS style string into a list of backends"""
+    backends = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        weight = 1.0
+        if "=" in entry:
+            entry, weight = entry.split("=", 1)
+            weight = float(weight)
+        host, port = entry.rsplit(":", 1)
+        backends.append(Backend(host, int(port), weight))
+    return backends
+
+
+def completion_text(data: Dict) -> str:
+    """The assistant message of an OpenAI style chat completion response"""
+    return data["choices"][0]["message"]["content"]
+
+
+class LLMRouter:
+    """Routes chat completion requests across several LLM backends.
+
+    Picks the healthy backend with the fewest outstanding requests (scaled by
+    weight), ejects backends after consecutive failures and hedges slow
+    requests onto a second backend.
+    """
+
+    def __init__(self, backends: List[Backend], hedge_percentile: float = LLM_HEDGE_PERCENTILE):
+        if not backends:
+            raise ValueError("At least one LLM backend is required")
+        self.backends = backends
+        self.hedge_percentile = hedge_percentile
+        self.latencies = deque(maxlen=500)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=LLM_REQUEST_TIMEOUT)
+            )
+        return self.session
+
+    def pick(self, exclude: Optional[Backend] = None) -> Optional[Backend]:
+        """Least-outstanding-requests selection over healthy backends"""
+        now = time.monotonic()
+        candidates = [b for b in self.backends if b is not exclude and b.is_healthy(now)]
+        if not candidates:
+            # Everything is ejected, fall back to all backends rather than failing outright
+            candidates = [b for b in self.backends if b is not exclude]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda b: (b.outstanding + 1) / b.weight)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Latency percentile after which a hedged request is sent"""
+        if not self.hedge_percentile or len(self.backends) < 2 or len(self.latencies) < 20:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return ordered[index]
+
+    async def _send(self, backend: Backend, payload: Dict) -> Dict:
+        backend.outstanding += 1
+        start = time.monotonic()
+        try:
+            async with self._get_session().post(backend.url + LLM_ENDPOINT_PATH, json=payload) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+            backend.record_success()
+            self.latencies.append(time.monotonic() - start)
+            return data
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            backend.record_failure()
+            raise
+        finally:
+            backend.outstanding -= 1
+
+    async def complete(self, payload: Dict) -> Dict:
+        """Send a chat completion request, hedging it if it runs too long"""
+        primary = self.pick()
+        first = asyncio.ensure_future(self._send(primary, payload))
+        delay = self.hedge_delay()
+        if delay is None:
+            return await first
+
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        secondary = self.pick(exclude=primary)
+        if secondary is None:
+            return await first
+        second = asyncio.ensure_future(self._send(secondary, payload))
+
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    async def check_health(self):
+        """Probe every backend once and update its probe failure count"""
+        session = self._get_session()
+
+        async def probe(backend: Backend):
+            try:
+                async with session.get(backend.url + LLM_HEALTH_PATH,
+                                       timeout=aiohttp.ClientTimeout(total=LLM_HEALTH_INTERVAL)) as response:
+                    if response.status < 500:
+                        backend.record_probe_success()
+                    else:
+                        backend.record_probe_failure()
+            except Exception:
+                backend.record_probe_failure()
+
+        await asyncio.gather(*(probe(b) for b in self.backends))
+
+    async def _health_loop(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(LLM_HEALTH_INTERVAL)
+
+    def start_health_checks(self):
+        if self._health_task is None:
+            self._health_task = asyncio.ensure_future(self._health_loop())
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        if self.session is not None:
+            await self.session.close()